@@ -17,9 +17,10 @@ config = context.config
 # Override sqlalchemy.url from our app settings (so we don't duplicate it in alembic.ini)
 config.set_main_option("sqlalchemy.url", settings.database_url)
 
-# Interpret the config file for Python logging.
+# Interpret the config file for Python logging. Migrations also run inside the
+# app's lifespan, so keep the loggers the app has already created enabled.
 if config.config_file_name is not None:
-    fileConfig(config.config_file_name)
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
 
 # Point Alembic at our models' metadata for autogenerate support
 target_metadata = Base.metadata
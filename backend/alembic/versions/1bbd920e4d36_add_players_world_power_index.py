@@ -0,0 +1,25 @@
+"""add players (world_id, clock_power, id) index
+
+Revision ID: 1bbd920e4d36
+Revises: e89e3047c9c0
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1bbd920e4d36'
+down_revision: Union[str, Sequence[str], None] = 'e89e3047c9c0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_players_world_power', 'players', ['world_id', 'clock_power', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_players_world_power', table_name='players')
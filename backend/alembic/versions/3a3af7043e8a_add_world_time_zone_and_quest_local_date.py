@@ -0,0 +1,58 @@
+"""add worlds.time_zone and quests.local_date
+
+Revision ID: 3a3af7043e8a
+Revises: a6f2d94c3b17
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from datetime import timezone
+from typing import Sequence, Union
+from zoneinfo import ZoneInfo
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a3af7043e8a'
+down_revision: Union[str, Sequence[str], None] = 'a6f2d94c3b17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Existing worlds keep a NULL time_zone (the default calendar); cards issued
+# so far were dated in Brisbane time.
+BACKFILL_TZ = ZoneInfo("Australia/Brisbane")
+BATCH_SIZE = 5000
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('worlds', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('time_zone', sa.String(length=64), nullable=True))
+
+    with op.batch_alter_table('quests', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('local_date', sa.Date(), nullable=True))
+
+    bind = op.get_bind()
+    quests = sa.table('quests', sa.column('id', sa.Integer()), sa.column('local_date', sa.Date()))
+    set_day = sa.update(quests).where(quests.c.id == sa.bindparam('b_id')).values(local_date=sa.bindparam('b_day'))
+    rows = bind.execute(
+        sa.text("SELECT id, COALESCE(created_at, CURRENT_TIMESTAMP) AS created_at FROM quests")
+        .columns(created_at=sa.DateTime())
+    ).all()
+    updates = [
+        {'b_id': quest_id, 'b_day': created_at.replace(tzinfo=timezone.utc).astimezone(BACKFILL_TZ).date()}
+        for quest_id, created_at in rows
+    ]
+    for i in range(0, len(updates), BATCH_SIZE):
+        bind.execute(set_day, updates[i:i + BATCH_SIZE])
+
+    with op.batch_alter_table('quests', schema=None) as batch_op:
+        batch_op.alter_column('local_date', existing_type=sa.Date(), nullable=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('quests', schema=None) as batch_op:
+        batch_op.drop_column('local_date')
+
+    with op.batch_alter_table('worlds', schema=None) as batch_op:
+        batch_op.drop_column('time_zone')
@@ -0,0 +1,35 @@
+"""add player_id to the point bucket rank indexes
+
+Revision ID: 4d8e2b7c1a90
+Revises: f0d1fd1f115b
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4d8e2b7c1a90'
+down_revision: Union[str, Sequence[str], None] = 'f0d1fd1f115b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _rank_indexes(columns: list[str]) -> None:
+    op.drop_index('ix_point_buckets_rank', table_name='player_point_buckets')
+    op.drop_index('ix_point_buckets_world_rank', table_name='player_point_buckets')
+    op.create_index(
+        'ix_point_buckets_world_rank', 'player_point_buckets', ['period', 'bucket_start', 'world_id', 'points', *columns]
+    )
+    op.create_index('ix_point_buckets_rank', 'player_point_buckets', ['period', 'bucket_start', 'points', *columns])
+
+
+def upgrade() -> None:
+    # Leaderboards break ties on player_id; keep the ORDER BY index-only
+    _rank_indexes(['player_id'])
+
+
+def downgrade() -> None:
+    _rank_indexes([])
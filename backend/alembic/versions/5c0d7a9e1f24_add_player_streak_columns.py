@@ -0,0 +1,77 @@
+"""add stored player streak columns
+
+Revision ID: 5c0d7a9e1f24
+Revises: e3c47ceba941
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Sequence, Union
+from zoneinfo import ZoneInfo
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c0d7a9e1f24'
+down_revision: Union[str, Sequence[str], None] = 'e3c47ceba941'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Calendar streaks are counted in (matches quests.BRISBANE_TZ).
+BACKFILL_TZ = ZoneInfo("Australia/Brisbane")
+REQUIRED_MINUTES_PER_DAY = 10
+
+
+def _streak_through(minutes_by_day, today):
+    """Same 'today pending' rule as quests._streak_through."""
+    day = today
+    if minutes_by_day.get(day, 0.0) < REQUIRED_MINUTES_PER_DAY:
+        day = today - timedelta(days=1)
+        if minutes_by_day.get(day, 0.0) < REQUIRED_MINUTES_PER_DAY:
+            return 0, None
+    through, streak = day, 0
+    while minutes_by_day.get(day, 0.0) >= REQUIRED_MINUTES_PER_DAY:
+        streak += 1
+        day -= timedelta(days=1)
+    return streak, through
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('players', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('streak_days', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('streak_through', sa.Date(), nullable=True))
+        batch_op.create_index('ix_players_world_streak', ['world_id', 'streak_days', 'id'], unique=False)
+        batch_op.create_index('ix_players_streak', ['streak_days', 'id'], unique=False)
+
+    # Backfill current streaks from quest-run history.
+    minutes = defaultdict(lambda: defaultdict(float))
+    result = op.get_bind().execute(sa.text(
+        "SELECT player_id, started_at, duration_seconds FROM quest_runs"
+    ).columns(started_at=sa.DateTime()).execution_options(yield_per=10_000))
+    for player_id, started_at, duration_seconds in result:
+        day = started_at.replace(tzinfo=timezone.utc).astimezone(BACKFILL_TZ).date()
+        minutes[player_id][day] += duration_seconds / 60.0
+
+    today = datetime.now(BACKFILL_TZ).date()
+    rows = []
+    for player_id, by_day in minutes.items():
+        streak, through = _streak_through(by_day, today)
+        if streak:
+            rows.append({'pid': player_id, 'streak': streak, 'through': through})
+    if rows:
+        op.get_bind().execute(
+            sa.text("UPDATE players SET streak_days = :streak, streak_through = :through WHERE id = :pid")
+            .bindparams(sa.bindparam('through', type_=sa.Date())),
+            rows,
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('players', schema=None) as batch_op:
+        batch_op.drop_index('ix_players_streak')
+        batch_op.drop_index('ix_players_world_streak')
+        batch_op.drop_column('streak_through')
+        batch_op.drop_column('streak_days')
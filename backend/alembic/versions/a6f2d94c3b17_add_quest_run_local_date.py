@@ -0,0 +1,54 @@
+"""add quest_runs.local_date
+
+Revision ID: a6f2d94c3b17
+Revises: 5c0d7a9e1f24
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from datetime import timezone
+from typing import Sequence, Union
+from zoneinfo import ZoneInfo
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6f2d94c3b17'
+down_revision: Union[str, Sequence[str], None] = '5c0d7a9e1f24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Calendar quest play is counted in (matches quests.BRISBANE_TZ).
+BACKFILL_TZ = ZoneInfo("Australia/Brisbane")
+BATCH_SIZE = 5000
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('quest_runs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('local_date', sa.Date(), nullable=True))
+
+    bind = op.get_bind()
+    runs = sa.table('quest_runs', sa.column('id', sa.Integer()), sa.column('local_date', sa.Date()))
+    set_day = sa.update(runs).where(runs.c.id == sa.bindparam('b_id')).values(local_date=sa.bindparam('b_day'))
+    rows = bind.execute(
+        sa.text("SELECT id, started_at FROM quest_runs").columns(started_at=sa.DateTime())
+    ).all()
+    updates = [
+        {'b_id': run_id, 'b_day': started_at.replace(tzinfo=timezone.utc).astimezone(BACKFILL_TZ).date()}
+        for run_id, started_at in rows
+    ]
+    for i in range(0, len(updates), BATCH_SIZE):
+        bind.execute(set_day, updates[i:i + BATCH_SIZE])
+
+    with op.batch_alter_table('quest_runs', schema=None) as batch_op:
+        batch_op.alter_column('local_date', existing_type=sa.Date(), nullable=False)
+        batch_op.create_index(
+            'ix_quest_runs_player_day', ['player_id', 'local_date', 'duration_seconds'], unique=False
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('quest_runs', schema=None) as batch_op:
+        batch_op.drop_index('ix_quest_runs_player_day')
+        batch_op.drop_column('local_date')
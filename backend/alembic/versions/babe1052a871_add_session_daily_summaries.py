@@ -0,0 +1,44 @@
+"""add session_daily_summaries table
+
+Revision ID: babe1052a871
+Revises: 9a1b2c3d4e5f
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'babe1052a871'
+down_revision: Union[str, Sequence[str], None] = '9a1b2c3d4e5f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'session_daily_summaries',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('player_id', sa.Integer(), sa.ForeignKey('players.id'), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('mode', sa.String(length=20), nullable=False),
+        sa.Column('difficulty', sa.String(length=20), nullable=False),
+        sa.Column('sessions', sa.Integer(), nullable=False),
+        sa.Column('questions', sa.Integer(), nullable=False),
+        sa.Column('correct', sa.Integer(), nullable=False),
+        sa.Column('hints_used', sa.Integer(), nullable=False),
+        sa.Column('points_earned', sa.Float(), nullable=False),
+        sa.Column('timed_sessions', sa.Integer(), nullable=False),
+        sa.Column('timed_questions', sa.Integer(), nullable=False),
+        sa.Column('response_ms_total', sa.Float(), nullable=False),
+        sa.UniqueConstraint('player_id', 'day', 'mode', 'difficulty', name='uq_session_summary_bucket'),
+    )
+    op.create_index(op.f('ix_session_daily_summaries_id'), 'session_daily_summaries', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_session_daily_summaries_id'), table_name='session_daily_summaries')
+    op.drop_table('session_daily_summaries')
@@ -0,0 +1,76 @@
+"""add player_point_buckets table
+
+Revision ID: e3c47ceba941
+Revises: 1bbd920e4d36
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from collections import defaultdict
+from datetime import timedelta, timezone
+from typing import Sequence, Union
+from zoneinfo import ZoneInfo
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3c47ceba941'
+down_revision: Union[str, Sequence[str], None] = '1bbd920e4d36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Calendar the existing history is bucketed in (matches the app default).
+BACKFILL_TZ = ZoneInfo("Australia/Brisbane")
+
+
+def _bucket_starts(day):
+    return {
+        'day': day,
+        'week': day - timedelta(days=day.weekday()),
+        'month': day.replace(day=1),
+    }
+
+
+def upgrade() -> None:
+    buckets = op.create_table(
+        'player_point_buckets',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('player_id', sa.Integer(), sa.ForeignKey('players.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('world_id', sa.Integer(), sa.ForeignKey('worlds.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('period', sa.String(length=10), nullable=False),
+        sa.Column('bucket_start', sa.Date(), nullable=False),
+        sa.Column('points', sa.Float(), nullable=False),
+        sa.UniqueConstraint('player_id', 'period', 'bucket_start', name='uq_point_bucket'),
+    )
+    op.create_index(op.f('ix_player_point_buckets_id'), 'player_point_buckets', ['id'], unique=False)
+    op.create_index(
+        'ix_point_buckets_world_rank', 'player_point_buckets', ['period', 'bucket_start', 'world_id', 'points']
+    )
+    op.create_index('ix_point_buckets_rank', 'player_point_buckets', ['period', 'bucket_start', 'points'])
+
+    # Backfill from session history, streamed so memory is bounded by the
+    # number of buckets rather than sessions.
+    totals = defaultdict(float)
+    result = op.get_bind().execute(sa.text(
+        "SELECT s.player_id, p.world_id, s.created_at, s.points_earned "
+        "FROM sessions s JOIN players p ON p.id = s.player_id WHERE s.points_earned > 0"
+    ).columns(created_at=sa.DateTime()).execution_options(yield_per=10_000))
+    for player_id, world_id, created_at, points in result:
+        day = created_at.replace(tzinfo=timezone.utc).astimezone(BACKFILL_TZ).date()
+        for period, start in _bucket_starts(day).items():
+            totals[(player_id, world_id, period, start)] += points
+
+    rows = [
+        {'player_id': pid, 'world_id': wid, 'period': period, 'bucket_start': start, 'points': round(points, 1)}
+        for (pid, wid, period, start), points in totals.items()
+    ]
+    for i in range(0, len(rows), 5000):
+        op.bulk_insert(buckets, rows[i:i + 5000])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_point_buckets_rank', table_name='player_point_buckets')
+    op.drop_index('ix_point_buckets_world_rank', table_name='player_point_buckets')
+    op.drop_index(op.f('ix_player_point_buckets_id'), table_name='player_point_buckets')
+    op.drop_table('player_point_buckets')
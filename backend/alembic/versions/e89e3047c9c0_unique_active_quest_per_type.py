@@ -0,0 +1,41 @@
+"""unique active quest per player and type
+
+Revision ID: e89e3047c9c0
+Revises: feeb0807f918
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e89e3047c9c0'
+down_revision: Union[str, Sequence[str], None] = 'feeb0807f918'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Retire duplicate active cards left by earlier races, keeping the oldest.
+    op.execute(
+        """
+        UPDATE quests SET completed = 1
+        WHERE completed = 0 AND id NOT IN (
+            SELECT MIN(id) FROM quests WHERE completed = 0 GROUP BY player_id, quest_type
+        )
+        """
+    )
+    op.create_index(
+        'uq_quests_active_player_type',
+        'quests',
+        ['player_id', 'quest_type'],
+        unique=True,
+        sqlite_where=sa.text('completed = 0'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_quests_active_player_type', table_name='quests')
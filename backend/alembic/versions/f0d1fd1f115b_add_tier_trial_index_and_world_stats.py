@@ -0,0 +1,54 @@
+"""add tier_trials (player_id, tier, passed) index and world_tier_trial_stats
+
+Revision ID: f0d1fd1f115b
+Revises: 3a3af7043e8a
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f0d1fd1f115b'
+down_revision: Union[str, Sequence[str], None] = '3a3af7043e8a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_tier_trials_player_tier', 'tier_trials', ['player_id', 'tier', 'passed'], unique=False)
+
+    op.create_table(
+        'world_tier_trial_stats',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('world_id', sa.Integer(), sa.ForeignKey('worlds.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('tier', sa.Integer(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('passes', sa.Integer(), nullable=False),
+        sa.Column('players_attempted', sa.Integer(), nullable=False),
+        sa.Column('players_passed', sa.Integer(), nullable=False),
+        sa.Column('questions', sa.Integer(), nullable=False),
+        sa.Column('correct', sa.Integer(), nullable=False),
+        sa.UniqueConstraint('world_id', 'tier', name='uq_world_tier_trial_stats'),
+    )
+    op.create_index(op.f('ix_world_tier_trial_stats_id'), 'world_tier_trial_stats', ['id'], unique=False)
+
+    # Backfill the counters from existing trials in one grouped pass.
+    op.execute(
+        "INSERT INTO world_tier_trial_stats "
+        "(world_id, tier, attempts, passes, players_attempted, players_passed, questions, correct) "
+        "SELECT p.world_id, t.tier, count(*), sum(CASE WHEN t.passed THEN 1 ELSE 0 END), "
+        "count(DISTINCT t.player_id), count(DISTINCT CASE WHEN t.passed THEN t.player_id END), "
+        "sum(t.questions), sum(t.correct) "
+        "FROM tier_trials t JOIN players p ON p.id = t.player_id "
+        "GROUP BY p.world_id, t.tier"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_world_tier_trial_stats_id'), table_name='world_tier_trial_stats')
+    op.drop_table('world_tier_trial_stats')
+    op.drop_index('ix_tier_trials_player_tier', table_name='tier_trials')
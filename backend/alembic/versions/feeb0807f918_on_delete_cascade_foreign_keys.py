@@ -0,0 +1,59 @@
+"""on delete cascade foreign keys
+
+Revision ID: feeb0807f918
+Revises: babe1052a871
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'feeb0807f918'
+down_revision: Union[str, Sequence[str], None] = 'babe1052a871'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The original FKs were created unnamed; this convention gives batch mode a
+# name to drop them by when it reflects and recreates each table.
+NAMING_CONVENTION = {
+    "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
+}
+
+# (table, column, referred table)
+FOREIGN_KEYS = [
+    ('players', 'world_id', 'worlds'),
+    ('sessions', 'player_id', 'players'),
+    ('session_daily_summaries', 'player_id', 'players'),
+    ('tier_trials', 'player_id', 'players'),
+    ('quests', 'player_id', 'players'),
+    ('quest_runs', 'player_id', 'players'),
+]
+
+
+def _recreate_foreign_keys(ondelete: str | None) -> None:
+    for table, column, referred in FOREIGN_KEYS:
+        name = f"fk_{table}_{column}_{referred}"
+        with op.batch_alter_table(table, naming_convention=NAMING_CONVENTION) as batch_op:
+            batch_op.drop_constraint(name, type_='foreignkey')
+            batch_op.create_foreign_key(name, referred, [column], ['id'], ondelete=ondelete)
+
+
+# Child-side FK columns need an index, otherwise every cascaded parent delete
+# is a full scan of the child table. session_daily_summaries is already
+# covered by its (player_id, day, mode, difficulty) unique constraint.
+FK_INDEXES = [(table, column) for table, column, _ in FOREIGN_KEYS if table != 'session_daily_summaries']
+
+
+def upgrade() -> None:
+    _recreate_foreign_keys('CASCADE')
+    for table, column in FK_INDEXES:
+        op.create_index(op.f(f'ix_{table}_{column}'), table, [column], unique=False)
+
+
+def downgrade() -> None:
+    for table, column in FK_INDEXES:
+        op.drop_index(op.f(f'ix_{table}_{column}'), table_name=table)
+    _recreate_foreign_keys(None)
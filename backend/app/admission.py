@@ -0,0 +1,289 @@
+"""Admission control for write endpoints.
+
+Every POST/PUT/PATCH/DELETE under ``/api`` takes one token from a bucket for
+its player and one from a bucket for its world; an empty bucket means 429
+with ``Retry-After``. An optional global cap on concurrent writes keeps a
+burst from piling up behind SQLite's single writer.
+
+Ids are read from the path (``/api/players/{id}``, ``/api/worlds/{id}``) or
+from a small JSON body (``player_id``/``world_id``). A request that names a
+player is charged to that player's own world, looked up through
+``PlayerWorldCache``, never to a ``world_id`` in its body: the client chooses
+the body, and could otherwise drain another world's bucket or dodge its own.
+A body ``world_id`` only counts for requests without a player, such as
+creating a player. Players never change world, so a cached entry stays valid.
+
+Buckets live in an ``OrderedDict`` kept in last-use order. A bucket idle long
+enough to refill completely is the same as a new one, so idle buckets are
+dropped from the front. All state is touched only from the event loop, so no
+locking is needed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from starlette.concurrency import run_in_threadpool
+
+from .config import settings
+from .database import ReadSessionLocal
+from .models import Player
+
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+MAX_INSPECTED_BODY = 64 * 1024
+_PATH_IDS = [
+    (re.compile(r"^/api/players/(\d+)(?:/|$)"), "player"),
+    (re.compile(r"^/api/worlds/(\d+)(?:/|$)"), "world"),
+]
+
+
+@dataclass(slots=True)
+class TokenBucket:
+    tokens: float
+    updated_at: float
+
+
+class RateLimiter:
+    """Token buckets keyed by arbitrary hashable keys, sharing one rate and burst."""
+
+    def __init__(self, rate_per_second: float, burst: int, clock=time.monotonic):
+        self.rate = rate_per_second
+        self.burst = burst
+        self._clock = clock
+        self._buckets: OrderedDict[object, TokenBucket] = OrderedDict()
+        # Time for an empty bucket to refill; idle longer than this == full.
+        self.idle_after = burst / rate_per_second if rate_per_second > 0 else math.inf
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _evict_idle(self, now: float) -> None:
+        buckets = self._buckets
+        while buckets:
+            key, oldest = next(iter(buckets.items()))
+            if now - oldest.updated_at < self.idle_after:
+                break
+            del buckets[key]
+
+    def acquire(self, key) -> float:
+        """Take a token for ``key``. Returns 0 on success, else seconds to wait."""
+        now = self._clock()
+        self._evict_idle(now)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(tokens=float(self.burst), updated_at=now)
+        else:
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated_at) * self.rate)
+            bucket.updated_at = now
+            self._buckets.move_to_end(key)
+
+        if bucket.tokens >= 1.0:
+            bucket.tokens -= 1.0
+            return 0.0
+        return (1.0 - bucket.tokens) / self.rate if self.rate > 0 else math.inf
+
+    def refund(self, key) -> None:
+        """Give back a token taken for a request that was then rejected elsewhere."""
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            bucket.tokens = min(self.burst, bucket.tokens + 1.0)
+
+    def clear(self) -> None:
+        self._buckets.clear()
+
+
+class PlayerWorldCache:
+    """Bounded player_id -> world_id map backed by a DB lookup on miss."""
+
+    def __init__(self, session_factory, max_entries: int = 50_000):
+        self.session_factory = session_factory
+        self.max_entries = max_entries
+        self._worlds: OrderedDict[int, int] = OrderedDict()
+
+    def _lookup(self, player_id: int) -> int | None:
+        db = self.session_factory()
+        try:
+            return db.query(Player.world_id).filter(Player.id == player_id).scalar()
+        finally:
+            db.close()
+
+    async def world_for(self, player_id: int) -> int | None:
+        world_id = self._worlds.get(player_id)
+        if world_id is not None:
+            self._worlds.move_to_end(player_id)
+            return world_id
+        world_id = await run_in_threadpool(self._lookup, player_id)
+        if world_id is not None:
+            self._worlds[player_id] = world_id
+            if len(self._worlds) > self.max_entries:
+                self._worlds.popitem(last=False)
+        return world_id
+
+    def clear(self) -> None:
+        self._worlds.clear()
+
+
+class AdmissionController:
+    """Holds the limiters shared by every request in this process."""
+
+    def __init__(self, session_factory=ReadSessionLocal):
+        self.session_factory = session_factory
+        self.configure()
+
+    def configure(
+        self,
+        *,
+        enabled: bool | None = None,
+        player_rate: float | None = None,
+        player_burst: int | None = None,
+        world_rate: float | None = None,
+        world_burst: int | None = None,
+        max_concurrent_writes: int | None = None,
+        queue_timeout: float | None = None,
+    ) -> None:
+        """(Re)build limiters from ``settings``, with optional overrides."""
+        self.enabled = settings.rate_limit_enabled if enabled is None else enabled
+        self.players = RateLimiter(
+            settings.player_write_rate_per_second if player_rate is None else player_rate,
+            settings.player_write_burst if player_burst is None else player_burst,
+        )
+        self.worlds = RateLimiter(
+            settings.world_write_rate_per_second if world_rate is None else world_rate,
+            settings.world_write_burst if world_burst is None else world_burst,
+        )
+        cap = settings.max_concurrent_writes if max_concurrent_writes is None else max_concurrent_writes
+        self.max_concurrent_writes = cap
+        self.write_slots = asyncio.Semaphore(cap) if cap > 0 else None
+        self.queue_timeout = settings.write_queue_timeout_seconds if queue_timeout is None else queue_timeout
+        self.player_worlds = PlayerWorldCache(self.session_factory)
+
+    def reset(self) -> None:
+        self.players.clear()
+        self.worlds.clear()
+        self.player_worlds.clear()
+
+
+admission_controller = AdmissionController()
+
+
+async def _too_many_requests(send, retry_after: float, detail: str) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 429,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def _header(scope, name: bytes) -> bytes | None:
+    return next((value for key, value in scope["headers"] if key == name), None)
+
+
+def _as_id(value) -> int | None:
+    return value if isinstance(value, int) and not isinstance(value, bool) else None
+
+
+class AdmissionMiddleware:
+    """Rate-limit and optionally cap concurrency for write requests."""
+
+    def __init__(self, app, controller: AdmissionController = admission_controller):
+        self.app = app
+        self.controller = controller
+
+    async def _identify(self, scope, receive):
+        """Return (player_id, world_id, receive) for a write request."""
+        player_id = world_id = body_world_id = None
+        for pattern, kind in _PATH_IDS:
+            match = pattern.match(scope["path"])
+            if match:
+                if kind == "player":
+                    player_id = int(match.group(1))
+                else:
+                    world_id = int(match.group(1))
+
+        content_type = _header(scope, b"content-type") or b""
+        length = _header(scope, b"content-length")
+        if b"json" in content_type and length is not None and length.isdigit() and int(length) <= MAX_INSPECTED_BODY:
+            chunks = []
+            while True:
+                message = await receive()
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body"):
+                    break
+            body = b"".join(chunks)
+            try:
+                data = json.loads(body)
+            except ValueError:
+                data = None
+            if isinstance(data, dict):
+                player_id = player_id or _as_id(data.get("player_id"))
+                body_world_id = _as_id(data.get("world_id"))
+
+            replayed = False
+
+            async def replay():
+                nonlocal replayed
+                if not replayed:
+                    replayed = True
+                    return {"type": "http.request", "body": body, "more_body": False}
+                return await receive()
+
+            receive = replay
+
+        if world_id is None:
+            if player_id is not None:
+                world_id = await self.controller.player_worlds.world_for(player_id)
+            else:
+                world_id = body_world_id
+        return player_id, world_id, receive
+
+    async def __call__(self, scope, receive, send):
+        controller = self.controller
+        if (
+            scope["type"] != "http"
+            or not controller.enabled
+            or scope["method"] not in WRITE_METHODS
+            or not scope["path"].startswith("/api/")
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        player_id, world_id, receive = await self._identify(scope, receive)
+
+        if player_id is not None:
+            wait = controller.players.acquire(player_id)
+            if wait:
+                await _too_many_requests(send, wait, "Too many requests for this player")
+                return
+        if world_id is not None:
+            wait = controller.worlds.acquire(world_id)
+            if wait:
+                if player_id is not None:
+                    controller.players.refund(player_id)
+                await _too_many_requests(send, wait, "Too many requests for this world")
+                return
+
+        slots = controller.write_slots
+        if slots is None:
+            await self.app(scope, receive, send)
+            return
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout=controller.queue_timeout)
+        except asyncio.TimeoutError:
+            await _too_many_requests(send, controller.queue_timeout, "Server is busy, please retry")
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            slots.release()
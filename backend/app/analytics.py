@@ -0,0 +1,217 @@
+"""Per-world analytics over session history.
+
+The columns needed from ``sessions`` (and compacted daily summaries) are
+pulled for a whole world in a single query straight into a NumPy matrix, and
+every grouped aggregate (accuracy by mode/difficulty, response-time trend,
+per-player hint usage) is computed with ``bincount``/``unique`` over that
+matrix. Cost is one scan plus a handful of linear passes, so it scales with
+session count rather than with ORM overhead.
+"""
+
+from __future__ import annotations
+
+from datetime import date
+from itertools import chain
+
+import numpy as np
+from sqlalchemy import case, func, literal, select
+from sqlalchemy.orm import Session as DbSession
+
+from .models import Player, Session, SessionDailySummary
+
+MODES = ["read", "set", "speedrun", "quest"]
+DIFFICULTIES = ["hour", "half", "quarter", "five_min", "one_min", "interval"]
+
+# floor(julianday(ts) - offset) == ts.date().toordinal()
+_JULIAN_ORDINAL_OFFSET = 1721424.5
+# COL_JULIAN for a row without a timestamp. Julian days of real timestamps are
+# positive, so these rows are easy to mask out of per-day binning.
+_NO_TIMESTAMP = -1.0
+
+# Column order of the matrix returned by load_session_matrix(). Each row is
+# either one live session (sessions=1) or one compacted daily summary, so every
+# aggregate is a weighted bincount over these columns.
+(
+    COL_PLAYER, COL_MODE, COL_DIFFICULTY, COL_SESSIONS, COL_QUESTIONS, COL_CORRECT, COL_HINTS,
+    COL_TIMED_SESSIONS, COL_TIMED_QUESTIONS, COL_RESPONSE_MS_TOTAL, COL_JULIAN,
+) = range(11)
+_NUM_COLUMNS = 11
+
+
+def _label_codes(column, labels: list[str]):
+    """Encode a string column as its index in ``labels`` (-1 if unknown)."""
+    return case({label: i for i, label in enumerate(labels)}, value=column, else_=-1)
+
+
+def session_columns_query(world_id: int):
+    """SELECT producing the numeric session columns for one world.
+
+    Live sessions are unioned with compacted ``session_daily_summaries`` so
+    history folded away by the retention job is still counted.
+    """
+    timed = Session.avg_response_ms.isnot(None)
+    live = (
+        select(
+            Session.player_id,
+            _label_codes(Session.mode, MODES),
+            _label_codes(Session.difficulty, DIFFICULTIES),
+            literal(1),
+            Session.questions,
+            Session.correct,
+            func.coalesce(Session.hints_used, 0),
+            case((timed, 1), else_=0),
+            case((timed, Session.questions), else_=0),
+            case((timed, Session.avg_response_ms * Session.questions), else_=0),
+            func.coalesce(func.julianday(Session.created_at), _NO_TIMESTAMP),
+        )
+        .join(Player, Player.id == Session.player_id)
+        .where(Player.world_id == world_id)
+    )
+    compacted = (
+        select(
+            SessionDailySummary.player_id,
+            _label_codes(SessionDailySummary.mode, MODES),
+            _label_codes(SessionDailySummary.difficulty, DIFFICULTIES),
+            SessionDailySummary.sessions,
+            SessionDailySummary.questions,
+            SessionDailySummary.correct,
+            SessionDailySummary.hints_used,
+            SessionDailySummary.timed_sessions,
+            SessionDailySummary.timed_questions,
+            SessionDailySummary.response_ms_total,
+            func.julianday(SessionDailySummary.day),
+        )
+        .join(Player, Player.id == SessionDailySummary.player_id)
+        .where(Player.world_id == world_id)
+    )
+    return live.union_all(compacted)
+
+
+def load_session_matrix(db: DbSession, world_id: int) -> np.ndarray:
+    """Return an (n, 11) float64 matrix of a world's sessions and summaries.
+
+    Rows are streamed from the cursor into ``np.fromiter`` so no intermediate
+    list of ORM objects or tuples is built.
+    """
+    result = db.execute(session_columns_query(world_id))
+    flat = np.fromiter(chain.from_iterable(result), dtype=np.float64)
+    return flat.reshape(-1, _NUM_COLUMNS)
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    out = np.zeros_like(numerator, dtype=np.float64)
+    np.divide(numerator, denominator, out=out, where=denominator > 0)
+    return out
+
+
+def accuracy_by_mode_difficulty(matrix: np.ndarray) -> list[dict]:
+    mode = matrix[:, COL_MODE].astype(np.int64)
+    difficulty = matrix[:, COL_DIFFICULTY].astype(np.int64)
+    known = (mode >= 0) & (difficulty >= 0)
+    key = mode[known] * len(DIFFICULTIES) + difficulty[known]
+    size = len(MODES) * len(DIFFICULTIES)
+
+    sessions = np.bincount(key, weights=matrix[known, COL_SESSIONS], minlength=size)
+    questions = np.bincount(key, weights=matrix[known, COL_QUESTIONS], minlength=size)
+    correct = np.bincount(key, weights=matrix[known, COL_CORRECT], minlength=size)
+    hints = np.bincount(key, weights=matrix[known, COL_HINTS], minlength=size)
+    accuracy = _ratio(correct, questions) * 100
+    hint_rate = _ratio(hints, questions)
+
+    return [
+        {
+            "mode": MODES[k // len(DIFFICULTIES)],
+            "difficulty": DIFFICULTIES[k % len(DIFFICULTIES)],
+            "sessions": int(sessions[k]),
+            "questions": int(questions[k]),
+            "correct": int(correct[k]),
+            "accuracy_pct": round(float(accuracy[k]), 1),
+            "hints_per_question": round(float(hint_rate[k]), 3),
+        }
+        for k in np.flatnonzero(sessions)
+    ]
+
+
+def response_time_trend(matrix: np.ndarray) -> list[dict]:
+    """Question-weighted mean response time per UTC day (rows without a timestamp are skipped)."""
+    timed = (matrix[:, COL_TIMED_QUESTIONS] > 0) & (matrix[:, COL_JULIAN] != _NO_TIMESTAMP)
+    days = np.floor(matrix[timed, COL_JULIAN] - _JULIAN_ORDINAL_OFFSET).astype(np.int64)
+    unique_days, inverse = np.unique(days, return_inverse=True)
+    n = len(unique_days)
+
+    sessions = np.bincount(inverse, weights=matrix[timed, COL_TIMED_SESSIONS], minlength=n)
+    response_total = np.bincount(inverse, weights=matrix[timed, COL_RESPONSE_MS_TOTAL], minlength=n)
+    timed_questions = np.bincount(inverse, weights=matrix[timed, COL_TIMED_QUESTIONS], minlength=n)
+    avg_ms = _ratio(response_total, timed_questions)
+
+    return [
+        {
+            "day": date.fromordinal(int(day)),
+            "sessions": int(sessions[i]),
+            "avg_response_ms": round(float(avg_ms[i]), 1),
+        }
+        for i, day in enumerate(unique_days)
+    ]
+
+
+def per_player_totals(matrix: np.ndarray) -> dict[int, dict]:
+    """Aggregate sessions, accuracy, hint usage and response time per player."""
+    player_ids, inverse = np.unique(matrix[:, COL_PLAYER].astype(np.int64), return_inverse=True)
+    n = len(player_ids)
+
+    def total(column: int) -> np.ndarray:
+        return np.bincount(inverse, weights=matrix[:, column], minlength=n)
+
+    sessions = total(COL_SESSIONS)
+    questions = total(COL_QUESTIONS)
+    correct = total(COL_CORRECT)
+    hints = total(COL_HINTS)
+    timed_questions = total(COL_TIMED_QUESTIONS)
+
+    accuracy = _ratio(correct, questions) * 100
+    hint_rate = _ratio(hints, questions)
+    avg_ms = _ratio(total(COL_RESPONSE_MS_TOTAL), timed_questions)
+
+    return {
+        int(pid): {
+            "sessions": int(sessions[i]),
+            "questions": int(questions[i]),
+            "correct": int(correct[i]),
+            "accuracy_pct": round(float(accuracy[i]), 1),
+            "hints_used": int(hints[i]),
+            "hints_per_question": round(float(hint_rate[i]), 3),
+            "avg_response_ms": round(float(avg_ms[i]), 1) if timed_questions[i] > 0 else None,
+        }
+        for i, pid in enumerate(player_ids)
+    }
+
+
+def world_analytics(db: DbSession, world_id: int) -> dict:
+    """Compute all analytics for a world. Players without sessions get zeros."""
+    matrix = load_session_matrix(db, world_id)
+    totals = per_player_totals(matrix)
+
+    roster = db.execute(
+        select(Player.id, Player.nickname).where(Player.world_id == world_id).order_by(Player.id)
+    ).all()
+    empty = {
+        "sessions": 0,
+        "questions": 0,
+        "correct": 0,
+        "accuracy_pct": 0.0,
+        "hints_used": 0,
+        "hints_per_question": 0.0,
+        "avg_response_ms": None,
+    }
+    players = [
+        {"player_id": pid, "nickname": nickname, **totals.get(pid, empty)}
+        for pid, nickname in roster
+    ]
+
+    return {
+        "world_id": world_id,
+        "total_sessions": int(matrix[:, COL_SESSIONS].sum()),
+        "accuracy_by_mode_difficulty": accuracy_by_mode_difficulty(matrix),
+        "response_time_trend": response_time_trend(matrix),
+        "players": players,
+    }
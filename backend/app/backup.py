@@ -0,0 +1,337 @@
+"""Online backups of the SQLite database.
+
+Copying ``clockquest.db`` while uvicorn writes to it can capture a torn file
+or miss the WAL. Instead, ``create_backup`` uses SQLite's online backup API.
+It copies ``backup_pages_per_step`` pages per step and sleeps
+``backup_step_pause_seconds`` between steps. Each step takes only a brief
+read snapshot, so the writer connection is never held up. If a writer changes
+the source mid-copy, SQLite restarts the copy. After ``MAX_RESTARTS``
+restarts the remaining pages are copied in one step from a single WAL read
+snapshot, which still never blocks the writer.
+
+A snapshot is written beside its final name, converted to a single
+self-contained file (rollback journal mode), checked with ``quick_check``,
+optionally gzipped and then renamed into place. Only the newest
+``backup_keep`` snapshots are kept.
+
+``verify_backup`` does a trial restore into a temporary file and runs a full
+``integrity_check``. ``restore_backup`` verifies the snapshot before moving it
+into place.
+
+Run from backend/:
+    python -m app.backup create [--dir DIR] [--keep N] [--no-compress]
+    python -m app.backup list [--dir DIR]
+    python -m app.backup verify SNAPSHOT
+    python -m app.backup restore SNAPSHOT DEST [--force]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gzip
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy.engine import make_url
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_PREFIX = "clockquest-"
+SNAPSHOT_SUFFIXES = (".db", ".db.gz")
+MAX_RESTARTS = 3
+
+
+class BackupError(RuntimeError):
+    """Raised when a backup or restore cannot be completed."""
+
+
+class _Restarted(Exception):
+    """Aborts a stepped copy that keeps restarting under write load."""
+
+
+@dataclass
+class BackupResult:
+    path: Path
+    pages: int
+    steps: int
+    restarts: int
+    seconds: float
+    size_bytes: int
+    removed: list[Path] = field(default_factory=list)
+
+
+@dataclass
+class VerifyReport:
+    path: Path
+    ok: bool
+    integrity: str
+    revision: str | None = None
+    tables: dict[str, int] = field(default_factory=dict)
+
+
+def database_path(url: str | None = None) -> Path:
+    """Filesystem path of the configured SQLite database."""
+    url = url or settings.database_url
+    database = make_url(url).database
+    if not database or database == ":memory:" or "mode=memory" in url:
+        raise BackupError("in-memory databases cannot be backed up")
+    return Path(database)
+
+
+def backup_dir() -> Path:
+    return Path(settings.backup_dir)
+
+
+def list_snapshots(directory: Path) -> list[Path]:
+    """Snapshots in ``directory``, oldest first (names sort by timestamp)."""
+    if not directory.is_dir():
+        return []
+    return sorted(
+        p for p in directory.iterdir()
+        if p.name.startswith(SNAPSHOT_PREFIX) and p.name.endswith(SNAPSHOT_SUFFIXES)
+    )
+
+
+def rotate_snapshots(directory: Path, keep: int) -> list[Path]:
+    """Delete all but the newest ``keep`` snapshots. Returns the removed paths."""
+    snapshots = list_snapshots(directory)
+    removed = snapshots[:-keep] if keep > 0 else []
+    for path in removed:
+        path.unlink(missing_ok=True)
+    return removed
+
+
+def _copy_online(source: Path, target: Path, pages_per_step: int, pause: float) -> tuple[int, int, int]:
+    """Online-backup ``source`` into ``target``. Returns (pages, steps, restarts)."""
+    steps = restarts = 0
+    last_remaining = None
+    total = 0
+
+    src = sqlite3.connect(f"file:{source}?mode=ro", uri=True)
+    dst = sqlite3.connect(target)
+    try:
+        def progress(_status, remaining, pages):
+            nonlocal steps, restarts, last_remaining, total
+            steps += 1
+            total = pages
+            if last_remaining is not None and remaining > last_remaining:
+                restarts += 1
+            last_remaining = remaining
+            if restarts >= MAX_RESTARTS:
+                # Abort the stepped copy; finished below in a single step
+                raise _Restarted
+            if remaining and pause > 0:
+                time.sleep(pause)
+
+        try:
+            src.backup(dst, pages=pages_per_step, progress=progress)
+        except _Restarted:
+            src.backup(dst, pages=-1)
+        except sqlite3.Error as exc:
+            raise BackupError(f"backup failed: {exc}") from exc
+
+        # A WAL source leaves the copy in WAL mode; make it one standalone file
+        dst.execute("PRAGMA journal_mode=DELETE")
+        result = dst.execute("PRAGMA quick_check").fetchone()[0]
+        if result != "ok":
+            raise BackupError(f"snapshot failed quick_check: {result}")
+    finally:
+        dst.close()
+        src.close()
+    return total, steps, restarts
+
+
+def _gzip_file(source: Path, target: Path) -> None:
+    with open(source, "rb") as raw, gzip.open(target, "wb", compresslevel=6) as packed:
+        shutil.copyfileobj(raw, packed, 1024 * 1024)
+
+
+def create_backup(
+    directory: Path | None = None,
+    *,
+    source: Path | None = None,
+    keep: int | None = None,
+    compress: bool | None = None,
+    pages_per_step: int | None = None,
+    pause: float | None = None,
+    now: datetime | None = None,
+) -> BackupResult:
+    """Write a new snapshot of the live database into ``directory`` and rotate."""
+    directory = directory or backup_dir()
+    source = source or database_path()
+    keep = settings.backup_keep if keep is None else keep
+    compress = settings.backup_compress if compress is None else compress
+    pages_per_step = pages_per_step or settings.backup_pages_per_step
+    pause = settings.backup_step_pause_seconds if pause is None else pause
+    if not source.exists():
+        raise BackupError(f"database {source} does not exist")
+
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = (now or datetime.now(timezone.utc)).strftime("%Y%m%dT%H%M%S%fZ")
+    final = directory / f"{SNAPSHOT_PREFIX}{stamp}{'.db.gz' if compress else '.db'}"
+
+    started = time.perf_counter()
+    fd, raw_name = tempfile.mkstemp(prefix=".backup-", suffix=".db", dir=directory)
+    os.close(fd)
+    raw = Path(raw_name)
+    partial = final.with_name(final.name + ".part")
+    try:
+        pages, steps, restarts = _copy_online(source, raw, pages_per_step, pause)
+        if compress:
+            _gzip_file(raw, partial)
+        else:
+            shutil.move(raw, partial)
+        os.replace(partial, final)
+    finally:
+        raw.unlink(missing_ok=True)
+        partial.unlink(missing_ok=True)
+
+    removed = rotate_snapshots(directory, keep)
+    return BackupResult(
+        path=final,
+        pages=pages,
+        steps=steps,
+        restarts=restarts,
+        seconds=time.perf_counter() - started,
+        size_bytes=final.stat().st_size,
+        removed=removed,
+    )
+
+
+def _expand(snapshot: Path, target: Path) -> None:
+    if snapshot.name.endswith(".gz"):
+        with gzip.open(snapshot, "rb") as packed, open(target, "wb") as raw:
+            shutil.copyfileobj(packed, raw, 1024 * 1024)
+    else:
+        shutil.copyfile(snapshot, target)
+
+
+def _inspect(path: Path, report: VerifyReport) -> None:
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute("PRAGMA integrity_check").fetchall()
+        report.integrity = "; ".join(r[0] for r in rows)
+        report.ok = report.integrity == "ok"
+        tables = [r[0] for r in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        )]
+        if "alembic_version" in tables:
+            row = conn.execute("SELECT version_num FROM alembic_version").fetchone()
+            report.revision = row[0] if row else None
+        for name in tables:
+            report.tables[name] = conn.execute(f'SELECT count(*) FROM "{name}"').fetchone()[0]
+    finally:
+        conn.close()
+
+
+def verify_backup(snapshot: Path) -> VerifyReport:
+    """Trial-restore ``snapshot`` into a temporary file and check it."""
+    report = VerifyReport(path=snapshot, ok=False, integrity="not checked")
+    with tempfile.TemporaryDirectory(prefix="clockquest-verify-") as scratch:
+        target = Path(scratch) / "restore.db"
+        try:
+            _expand(snapshot, target)
+            _inspect(target, report)
+        except (OSError, EOFError, sqlite3.DatabaseError) as exc:
+            report.ok = False
+            report.integrity = f"unreadable: {exc}"
+    return report
+
+
+def restore_backup(snapshot: Path, destination: Path, *, force: bool = False) -> VerifyReport:
+    """Verify ``snapshot`` and install it at ``destination``.
+
+    Stop the app first: a running server keeps the old file (and its WAL) open.
+    """
+    if destination.exists() and not force:
+        raise BackupError(f"{destination} exists; pass force=True to replace it")
+    report = verify_backup(snapshot)
+    if not report.ok:
+        raise BackupError(f"snapshot {snapshot} failed verification: {report.integrity}")
+
+    partial = destination.with_name(destination.name + ".restore")
+    try:
+        _expand(snapshot, partial)
+        os.replace(partial, destination)
+    finally:
+        partial.unlink(missing_ok=True)
+    # A stale WAL from the old database must not be replayed over the restored file
+    for suffix in ("-wal", "-shm"):
+        Path(f"{destination}{suffix}").unlink(missing_ok=True)
+    return report
+
+
+async def run_backups_forever(interval_seconds: float) -> None:
+    """Background task: snapshot every ``interval_seconds`` (in a worker thread)."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            result = await asyncio.to_thread(create_backup)
+            logger.info(
+                "Backup %s: %d pages in %d steps (%.1fs, %d bytes, %d rotated out)",
+                result.path.name, result.pages, result.steps, result.seconds,
+                result.size_bytes, len(result.removed),
+            )
+        except Exception:
+            logger.exception("Scheduled backup failed")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Back up, verify and restore the ClockQuest database.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    create = commands.add_parser("create", help="write a new snapshot and rotate old ones")
+    create.add_argument("--dir", type=Path, default=None, help="snapshot directory (default: settings.backup_dir)")
+    create.add_argument("--keep", type=int, default=None, help="snapshots to keep")
+    create.add_argument("--no-compress", action="store_true", help="store the snapshot uncompressed")
+
+    listing = commands.add_parser("list", help="list snapshots, oldest first")
+    listing.add_argument("--dir", type=Path, default=None)
+
+    verify = commands.add_parser("verify", help="trial-restore a snapshot and check its integrity")
+    verify.add_argument("snapshot", type=Path)
+
+    restore = commands.add_parser("restore", help="verify a snapshot and install it (stop the app first)")
+    restore.add_argument("snapshot", type=Path)
+    restore.add_argument("destination", type=Path)
+    restore.add_argument("--force", action="store_true", help="replace an existing database file")
+
+    args = parser.parse_args()
+    try:
+        if args.command == "create":
+            result = create_backup(args.dir, keep=args.keep, compress=False if args.no_compress else None)
+            print(
+                f"Wrote {result.path} ({result.size_bytes} bytes): {result.pages} pages in {result.steps} steps, "
+                f"{result.restarts} restarts, {result.seconds:.2f}s"
+            )
+            for path in result.removed:
+                print(f"  rotated out {path.name}")
+        elif args.command == "list":
+            for path in list_snapshots(args.dir or backup_dir()):
+                print(f"{path}  {path.stat().st_size} bytes")
+        else:
+            report = (
+                verify_backup(args.snapshot) if args.command == "verify"
+                else restore_backup(args.snapshot, args.destination, force=args.force)
+            )
+            print(f"{report.path}: integrity {report.integrity}, revision {report.revision or 'unknown'}")
+            for name, count in report.tables.items():
+                print(f"  {name}: {count} rows")
+            if not report.ok:
+                raise SystemExit(1)
+    except BackupError as exc:
+        raise SystemExit(str(exc))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,65 @@ from pathlib import Path
 
 class Settings(BaseSettings):
     database_url: str = f"sqlite:///{Path(__file__).resolve().parent.parent / 'clockquest.db'}"
+    # Read-only connections for GET requests (writes share one connection)
+    read_pool_size: int = 8
+    writer_pool_timeout_seconds: float = 30.0
+    # Test mode: raise on any lazy relationship load instead of querying
+    strict_loading: bool = False
+    # Tasks recomputing challenge cards after submits; 0 recomputes inline
+    quest_worker_concurrency: int = 2
     cors_origins: list[str] = ["http://localhost:5173", "http://localhost:3000"]
+    # Calendar used for daily/weekly/monthly leaderboards
+    default_time_zone: str = "Australia/Brisbane"
+    # Sessions older than this are folded into session_daily_summaries
+    session_retention_days: int = 180
+    session_compaction_batch_size: int = 1000
+    bulk_roster_max_players: int = 5000
+    # Stored responses for Idempotency-Key replays
+    idempotency_ttl_seconds: int = 24 * 60 * 60
+    idempotency_max_entries: int = 100_000
+    # Admission control for write endpoints (token buckets per player/world)
+    rate_limit_enabled: bool = True
+    player_write_rate_per_second: float = 2.0
+    player_write_burst: int = 20
+    world_write_rate_per_second: float = 40.0
+    world_write_burst: int = 200
+    # 0 disables the global cap on in-flight writes
+    max_concurrent_writes: int = 0
+    write_queue_timeout_seconds: float = 2.0
+    # Responses at least this large are gzipped for clients that accept it
+    gzip_minimum_size: int = 1024
+    # Reset lapsed play streaks just after each local midnight (in-app task)
+    streak_decay_enabled: bool = True
+    # Optional JSON/TOML tier definitions replacing the built-in tiers.TIERS;
+    # re-read when the file changes (polled) or on SIGHUP
+    tier_config_path: str | None = None
+    tier_config_poll_seconds: float = 5.0
+    # JSON-lines log of statements slower than the threshold (see slow_queries.py)
+    slow_query_log_path: str | None = None
+    slow_query_threshold_ms: float = 100.0
+    slow_query_log_max_bytes: int = 10 * 1024 * 1024
+    slow_query_log_backups: int = 5
+    # OTLP/JSON request traces (see tracing.py); unset disables tracing
+    trace_path: str | None = None
+    trace_sample_rate: float = 0.05
+    # > 0: also keep unsampled requests at least this slow (records every request)
+    trace_slow_request_ms: float = 0.0
+    trace_max_bytes: int = 50 * 1024 * 1024
+    trace_backups: int = 5
+    # /api/health/ready returns 503 past any of these (see health.py)
+    health_probe_timeout_seconds: float = 1.0
+    ready_max_db_latency_ms: float = 250.0
+    ready_max_writer_held_ms: float = 500.0
+    ready_max_quest_queue: int = 500
+    # Online snapshots (see backup.py); 0 disables the in-app schedule
+    backup_dir: str = str(Path(__file__).resolve().parent.parent / "backups")
+    backup_interval_minutes: float = 0.0
+    backup_keep: int = 14
+    backup_compress: bool = True
+    # Pages copied per backup step, and the pause between steps
+    backup_pages_per_step: int = 256
+    backup_step_pause_seconds: float = 0.005
 
     class Config:
         env_prefix = "CLOCKQUEST_"
@@ -1,19 +1,171 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+"""Engines, sessions and the request-scoped session dependencies.
+
+Writes go through ``engine``. It has a single pooled connection, so writers
+queue in the pool instead of fighting over SQLite's write lock and retrying
+on "database is locked". Reads go through ``read_engine``, a pool of
+``PRAGMA query_only`` connections. The database runs in WAL mode, so those
+readers never block the writer and the writer never blocks them.
+
+``get_db`` picks the engine from the HTTP method: GET/HEAD get a reader and
+everything else gets the writer. Routes that write on a GET depend on
+``get_write_db`` explicitly, and routes that only read on a POST can use
+``get_read_db``. In-memory databases cannot be shared between connections, so
+for them both names refer to the same engine.
+
+Request sessions do not expire objects on commit. They are short-lived, so
+re-SELECTing every loaded row after each commit only adds round trips. Code
+that changes a row behind the ORM's back, such as a Core ``UPDATE ...
+RETURNING``, puts the returned value on the object itself. Relationships
+never lazy-load (see models.py). ``raise_on_lazy_load`` is the test-mode guard
+that also rejects a lazy load reintroduced with a per-query ``lazyload()``.
+
+Routers use ``SessionRoute``, which closes a sync endpoint's sessions as soon
+as it returns. FastAPI serializes a sync endpoint's result in the threadpool
+and only then closes yield dependencies. Under load every pool thread can be
+blocked waiting for a connection (the writer pool has exactly one), and then
+the request that holds the connection cannot get a thread to finish. Nothing
+moves until pool timeouts fire. Closing on return releases the connection
+first. The returned objects stay readable, since they are not expired and
+never lazy-load.
+"""
+
+import functools
+import inspect
+
+from fastapi import Request
+from fastapi.routing import APIRoute
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, sessionmaker, DeclarativeBase, ORMExecuteState
 
 from .config import settings
 
-engine = create_engine(settings.database_url, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+READ_METHODS = frozenset({"GET", "HEAD"})
+SESSION_OPTIONS = {"autocommit": False, "autoflush": False, "expire_on_commit": False}
+
+
+class LazyLoadError(RuntimeError):
+    """Raised in strict-loading mode when a relationship is lazy-loaded."""
+
+
+def raise_on_lazy_load(session_factory) -> None:
+    """Make sessions from ``session_factory`` fail on any lazy relationship load."""
+    @event.listens_for(session_factory, "do_orm_execute")
+    def _guard(state: ORMExecuteState):
+        if state.is_select and state.lazy_loaded_from is not None:
+            raise LazyLoadError(
+                f"lazy load from {state.lazy_loaded_from.class_.__name__}; "
+                "add selectinload()/joinedload() to the query"
+            )
+
+
+def enable_sqlite_foreign_keys(target_engine) -> None:
+    """Turn on FK enforcement (and so ON DELETE CASCADE) for every connection.
+
+    SQLite ships with foreign keys off per connection. Alembic's own engine
+    deliberately does not get this, since batch migrations drop and recreate
+    tables and would otherwise cascade-delete child rows.
+    """
+    @event.listens_for(target_engine, "connect")
+    def _set_foreign_keys(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+def _set_pragmas(target_engine, *pragmas: str) -> None:
+    @event.listens_for(target_engine, "connect")
+    def _apply(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(f"PRAGMA {pragma}")
+        cursor.close()
+
+
+def is_memory_database(url: str) -> bool:
+    database = make_url(url).database
+    return not database or database == ":memory:" or "mode=memory" in url
+
+
+def create_engines(url: str, read_pool_size: int | None = None, writer_timeout: float | None = None):
+    """Build the (writer, reader) engine pair for ``url``."""
+    connect_args = {"check_same_thread": False}
+    if is_memory_database(url):
+        writer = create_engine(url, connect_args=connect_args)
+        enable_sqlite_foreign_keys(writer)
+        return writer, writer
+
+    writer = create_engine(
+        url,
+        connect_args=connect_args,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=settings.writer_pool_timeout_seconds if writer_timeout is None else writer_timeout,
+    )
+    enable_sqlite_foreign_keys(writer)
+    # journal_mode is persistent in the file; synchronous=NORMAL is the usual
+    # WAL pairing (durable across application crashes, fsync per checkpoint).
+    _set_pragmas(writer, "journal_mode=WAL", "synchronous=NORMAL")
+
+    size = settings.read_pool_size if read_pool_size is None else read_pool_size
+    reader = create_engine(url, connect_args=connect_args, pool_size=size, max_overflow=size)
+    _set_pragmas(reader, "query_only=ON")
+    return writer, reader
+
+
+engine, read_engine = create_engines(settings.database_url)
+SessionLocal = sessionmaker(bind=engine, **SESSION_OPTIONS)
+ReadSessionLocal = sessionmaker(bind=read_engine, **SESSION_OPTIONS)
+if settings.strict_loading:
+    raise_on_lazy_load(SessionLocal)
+    raise_on_lazy_load(ReadSessionLocal)
 
 
 class Base(DeclarativeBase):
     pass
 
 
-def get_db():
+def get_write_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def _closing_sessions(endpoint):
+    @functools.wraps(endpoint)
+    def run(*args, **kwargs):
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            for value in kwargs.values():
+                if isinstance(value, Session):
+                    value.close()
+    return run
+
+
+class SessionRoute(APIRoute):
+    """APIRoute that releases a sync endpoint's DB sessions before serialization."""
+
+    def __init__(self, path, endpoint, **kwargs):
+        if not inspect.iscoroutinefunction(endpoint):
+            endpoint = _closing_sessions(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+def get_db(request: Request):
+    """Reader session for GET/HEAD, writer session for everything else."""
+    db = ReadSessionLocal() if request.method in READ_METHODS else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,134 @@
+"""Readiness probe for load balancers.
+
+``/api/health`` only says the process is up. ``readiness`` checks that this
+worker can actually serve:
+
+* a ``SELECT 1`` through the reader pool, timed end to end, so it includes any
+  wait for a free connection;
+* how long the writer pool's connection has been checked out. Every write in
+  this worker queues for that one connection, so this is how long the next
+  write would already have to wait. Checkouts are tracked with pool events;
+  the probe only reads a timestamp and never takes the writer connection or
+  SQLite's write lock itself;
+* pool checked-out / overflow counts and background queue depths.
+
+Probes run in asyncio's default executor, not the threadpool the routes use,
+so a saturated route threadpool cannot hide its own saturation. At most one
+probe is in flight at a time. While one is still stuck, later polls report
+unavailable straight away instead of piling up threads. Each poll costs one
+trivial read, cheap enough for once a second.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+from sqlalchemy import event
+
+from .config import settings
+from .database import engine, is_memory_database, read_engine
+from .quest_worker import quest_worker
+
+_probe_lock = threading.Lock()
+# perf_counter() at checkout, per checked-out writer connection record
+_writer_checkouts: dict[int, float] = {}
+
+
+def track_checkouts(target_engine, checkouts: dict[int, float]) -> None:
+    """Keep ``checkouts`` up to date with when each pooled connection was checked out."""
+    @event.listens_for(target_engine, "checkout")
+    def _checked_out(_dbapi_connection, connection_record, _connection_proxy):
+        checkouts[id(connection_record)] = time.perf_counter()
+
+    @event.listens_for(target_engine, "checkin")
+    def _checked_in(_dbapi_connection, connection_record):
+        checkouts.pop(id(connection_record), None)
+
+
+if not is_memory_database(settings.database_url):
+    track_checkouts(engine, _writer_checkouts)
+
+
+def pool_status(target_engine) -> dict:
+    pool = target_engine.pool
+    status = {"class": type(pool).__name__}
+    for name in ("size", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if callable(method):
+            status[name] = method()
+    max_overflow = getattr(pool, "_max_overflow", None)
+    if "size" in status and max_overflow is not None and max_overflow >= 0:
+        status["capacity"] = status["size"] + max_overflow
+    return status
+
+
+def _round_trip_ms() -> float:
+    began = time.perf_counter()
+    with read_engine.connect() as conn:
+        conn.exec_driver_sql("SELECT 1").scalar()
+    return (time.perf_counter() - began) * 1000
+
+
+def _writer_held_ms() -> float | None:
+    """How long the longest current writer checkout has lasted (0 when the writer is free)."""
+    if is_memory_database(settings.database_url):
+        return None
+    started = min(list(_writer_checkouts.values()), default=None)
+    return 0.0 if started is None else (time.perf_counter() - started) * 1000
+
+
+def _probe() -> dict:
+    try:
+        latency = _round_trip_ms()
+    finally:
+        _probe_lock.release()
+    held = _writer_held_ms()
+    return {"latency_ms": round(latency, 2), "writer_held_ms": None if held is None else round(held, 2)}
+
+
+async def readiness() -> tuple[bool, dict]:
+    """(ready, report) for this worker."""
+    timeout = settings.health_probe_timeout_seconds
+    reasons: list[str] = []
+    db: dict = {}
+
+    if not _probe_lock.acquire(blocking=False):
+        reasons.append("previous database probe still running")
+    else:
+        loop = asyncio.get_running_loop()
+        probe = loop.run_in_executor(None, _probe)
+        # A probe that outlives the timeout finishes unobserved; retrieve its outcome
+        probe.add_done_callback(lambda f: f.cancelled() or f.exception())
+        try:
+            db = await asyncio.wait_for(asyncio.shield(probe), timeout)
+        except asyncio.TimeoutError:
+            reasons.append(f"database probe exceeded {timeout:g}s")
+        except Exception as exc:  # e.g. "unable to open database file"
+            reasons.append(f"database probe failed: {exc}")
+
+    if db.get("latency_ms", 0) > settings.ready_max_db_latency_ms:
+        reasons.append(f"database round trip {db['latency_ms']:.0f}ms")
+    if (db.get("writer_held_ms") or 0) > settings.ready_max_writer_held_ms:
+        reasons.append(f"writer connection held {db['writer_held_ms']:.0f}ms")
+
+    pools = {"writer": pool_status(engine)}
+    if read_engine is not engine:
+        pools["reader"] = pool_status(read_engine)
+    reader = pools.get("reader", {})
+    if "capacity" in reader and reader["checkedout"] >= reader["capacity"]:
+        reasons.append("reader pool exhausted")
+
+    queues = {"quest_worker": quest_worker.depth}
+    if queues["quest_worker"] > settings.ready_max_quest_queue:
+        reasons.append(f"quest worker backlog {queues['quest_worker']}")
+
+    ready = not reasons
+    return ready, {
+        "status": "ready" if ready else "unavailable",
+        "reasons": reasons,
+        "db": db,
+        "pools": pools,
+        "queues": queues,
+    }
@@ -0,0 +1,181 @@
+"""Idempotency-Key support for retried write requests.
+
+Clients on flaky networks retry POSTs. When a request carries an
+``Idempotency-Key`` header, the first successful response is stored and any
+retry with the same key (same method and path) gets that stored response
+back without the handler running, so points are never double-awarded.
+
+The store is an in-process ``OrderedDict``. Every entry has the same TTL, so
+insertion order is expiry order: expired entries are popped from the front,
+and lookups, inserts and evictions are all O(1). It is only touched from the
+event loop (the middleware is pure ASGI), so it needs no lock. With several
+worker processes each has its own store; retries are normally routed back to
+the same worker by the client's keep-alive connection.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from .config import settings
+
+IDEMPOTENCY_HEADER = b"idempotency-key"
+MAX_KEY_LENGTH = 255
+
+
+@dataclass(slots=True)
+class StoredResponse:
+    expires_at: float
+    fingerprint: bytes
+    status: int = 0
+    headers: list[tuple[bytes, bytes]] | None = None
+    body: bytes = b""
+
+    @property
+    def in_flight(self) -> bool:
+        return self.status == 0
+
+
+class IdempotencyStore:
+    """Bounded key -> response map with a uniform TTL."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int, clock=time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: OrderedDict[tuple, StoredResponse] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self, make_room: bool = False) -> None:
+        """Drop expired entries, and the oldest live ones if room is needed."""
+        now = self._clock()
+        entries = self._entries
+        limit = self.max_entries - 1 if make_room else self.max_entries
+        while entries:
+            key, oldest = next(iter(entries.items()))
+            if oldest.expires_at > now and len(entries) <= limit:
+                break
+            del entries[key]
+
+    def get(self, key: tuple) -> StoredResponse | None:
+        self._evict()
+        return self._entries.get(key)
+
+    def reserve(self, key: tuple, fingerprint: bytes) -> None:
+        """Mark ``key`` as in flight so concurrent duplicates are rejected."""
+        self._evict(make_room=True)
+        self._entries[key] = StoredResponse(expires_at=self._clock() + self.ttl_seconds, fingerprint=fingerprint)
+
+    def complete(self, key: tuple, status: int, headers: list[tuple[bytes, bytes]], body: bytes) -> None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.status, entry.headers, entry.body = status, headers, body
+
+    def release(self, key: tuple) -> None:
+        """Forget a key whose request failed, so the client may retry it."""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+idempotency_store = IdempotencyStore(
+    ttl_seconds=settings.idempotency_ttl_seconds,
+    max_entries=settings.idempotency_max_entries,
+)
+
+
+async def _json_response(send, status: int, detail: str) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class IdempotencyMiddleware:
+    """Replay stored responses for POSTs to ``paths`` that carry an Idempotency-Key."""
+
+    def __init__(self, app, paths: set[str], store: IdempotencyStore = idempotency_store):
+        self.app = app
+        self.paths = frozenset(paths)
+        self.store = store
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        raw_key = next((value for name, value in scope["headers"] if name == IDEMPOTENCY_HEADER), None)
+        if raw_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not raw_key or len(raw_key) > MAX_KEY_LENGTH:
+            await _json_response(send, 400, f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+            return
+
+        # Bodies on these endpoints are small JSON documents; buffer them so
+        # the fingerprint can be checked before deciding to replay.
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        body = b"".join(chunks)
+        fingerprint = hashlib.blake2b(body, digest_size=16).digest()
+
+        key = (scope["path"], raw_key)
+        entry = self.store.get(key)
+        if entry is not None:
+            if entry.fingerprint != fingerprint:
+                await _json_response(send, 422, "Idempotency-Key was already used with a different request body")
+            elif entry.in_flight:
+                await _json_response(send, 409, "A request with this Idempotency-Key is still in progress")
+            else:
+                await send({
+                    "type": "http.response.start",
+                    "status": entry.status,
+                    "headers": entry.headers + [(b"idempotent-replayed", b"true")],
+                })
+                await send({"type": "http.response.body", "body": entry.body})
+            return
+
+        self.store.reserve(key, fingerprint)
+        body_sent = False
+
+        async def replay_receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        status = 0
+        headers: list[tuple[bytes, bytes]] = []
+        response_chunks: list[bytes] = []
+
+        async def capture_send(message):
+            nonlocal status, headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                response_chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture_send)
+        finally:
+            if 200 <= status < 300:
+                self.store.complete(key, status, headers, b"".join(response_chunks))
+            else:
+                self.store.release(key)
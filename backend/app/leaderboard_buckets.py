@@ -0,0 +1,131 @@
+"""Calendar-bucketed points for today / this week / this month leaderboards.
+
+``submit_session`` adds each session's points to three rows in
+``player_point_buckets`` (day, ISO week starting Monday, month), keyed by the
+bucket's first local date in the player's world calendar (see timezones.py).
+A leaderboard is then a single top-K read from the ``(period, bucket_start,
+world_id, points, player_id)`` index instead of summing sessions per player.
+Ties on points go to the higher player id, as on the other leaderboards, so
+pages are stable between requests.
+
+Across worlds there is no single "today": each world's current bucket follows
+its own calendar. Cross-world reads take one range per calendar in use
+(``timezones.zone_groups``), so a world in another zone never shows
+yesterday's or tomorrow's bucket around midnight.
+"""
+
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+from sqlalchemy import and_, or_, select, union_all
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session as DbSession
+
+from .models import Player, PlayerPointBucket
+from .timezones import local_date, zone_groups
+from .tracing import traced
+
+PERIODS = ("day", "week", "month")
+
+
+def bucket_start(period: str, day: date) -> date:
+    if period == "day":
+        return day
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    if period == "month":
+        return day.replace(day=1)
+    raise ValueError(f"Unknown period {period!r}")
+
+
+@traced()
+def record_points(db: DbSession, player_id: int, world_id: int, points: float, day: date) -> None:
+    """Add ``points`` to the player's day, week and month buckets (in the caller's transaction)."""
+    if points <= 0:
+        return
+    stmt = insert(PlayerPointBucket).values([
+        {
+            "player_id": player_id,
+            "world_id": world_id,
+            "period": period,
+            "bucket_start": bucket_start(period, day),
+            "points": points,
+        }
+        for period in PERIODS
+    ])
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["player_id", "period", "bucket_start"],
+        set_={"points": PlayerPointBucket.points + stmt.excluded.points},
+    ))
+
+
+def current_buckets(db: DbSession, period: str) -> list[tuple[date, object]]:
+    """(bucket start, SELECT of world ids or None for all) per calendar in use, as of now."""
+    groups = zone_groups(db)
+    if len(groups) == 1:
+        return [(bucket_start(period, local_date(tz=groups[0][0])), None)]
+    return [(bucket_start(period, local_date(tz=tz)), worlds) for tz, worlds in groups]
+
+
+def _bucket_filter(period: str, start: date, worlds=None):
+    clause = and_(PlayerPointBucket.period == period, PlayerPointBucket.bucket_start == start)
+    if worlds is not None:
+        clause = and_(clause, PlayerPointBucket.world_id.in_(worlds))
+    return clause
+
+
+def top_players(
+    db: DbSession, period: str, day: date | None = None, world_id: int | None = None, limit: int = 100,
+):
+    """Highest-scoring players in the bucket containing ``day``, best first.
+
+    Without ``day`` every world's current bucket in its own calendar is used.
+    """
+    by_rank = (PlayerPointBucket.points.desc(), PlayerPointBucket.player_id.desc())
+    if day is not None or world_id is not None:
+        stmt = (
+            select(Player, PlayerPointBucket.points)
+            .join(Player, Player.id == PlayerPointBucket.player_id)
+            .where(_bucket_filter(period, bucket_start(period, day)))
+            .order_by(*by_rank)
+            .limit(limit)
+        )
+        if world_id is not None:
+            stmt = stmt.where(PlayerPointBucket.world_id == world_id)
+        return db.execute(stmt).all()
+
+    # Top ``limit`` of each calendar's bucket, then the top ``limit`` of those
+    ranges = [
+        select(PlayerPointBucket.player_id, PlayerPointBucket.points)
+        .where(_bucket_filter(period, start, worlds))
+        .order_by(*by_rank)
+        .limit(limit)
+        .subquery()
+        for start, worlds in current_buckets(db, period)
+    ]
+    ranked = ranges[0] if len(ranges) == 1 else union_all(*(select(r) for r in ranges)).subquery()
+    return db.execute(
+        select(Player, ranked.c.points)
+        .join(Player, Player.id == ranked.c.player_id)
+        .order_by(ranked.c.points.desc(), ranked.c.player_id.desc())
+        .limit(limit)
+    ).all()
+
+
+def points_in_bucket(
+    db: DbSession, player_ids: list[int], period: str, day: date | None = None,
+) -> dict[int, float]:
+    """Points per player in the bucket containing ``day`` (each world's current bucket without it)."""
+    if not player_ids:
+        return {}
+    if day is not None:
+        buckets = _bucket_filter(period, bucket_start(period, day))
+    else:
+        buckets = or_(*(_bucket_filter(period, start, worlds) for start, worlds in current_buckets(db, period)))
+    rows = db.execute(
+        select(PlayerPointBucket.player_id, PlayerPointBucket.points).where(
+            PlayerPointBucket.player_id.in_(player_ids), buckets,
+        )
+    ).all()
+    return {player_id: points for player_id, points in rows}
@@ -1,13 +1,26 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 import logging
 
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
 from .config import settings
-from .database import engine, Base
+from .database import engine, read_engine, Base, SessionLocal
 from .routers import worlds, players, sessions, trials, leaderboard, challenges
 from .tiers import tier_list_for_api
+from .idempotency import IdempotencyMiddleware
+from .admission import AdmissionMiddleware
+from .streaks import run_decay_forever
+from .tier_config import install_reload_signal, watch_tier_config
+from .quest_worker import quest_worker
+from .backup import run_backups_forever
+from .health import readiness
+from .request_context import RequestContextMiddleware
+from .slow_queries import install_from_settings as install_slow_query_log
+from .tracing import TracingMiddleware, install_from_settings as install_tracing
 
 logger = logging.getLogger(__name__)
 
@@ -35,17 +48,55 @@ def _run_alembic_migrations() -> None:
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     _run_alembic_migrations()
+    slow_query_log = install_slow_query_log(engine, read_engine)
+    tracer = install_tracing(engine, read_engine)
+    background = []
+    if settings.streak_decay_enabled:
+        background.append(asyncio.create_task(run_decay_forever(SessionLocal)))
+    if settings.tier_config_path:
+        background.append(asyncio.create_task(
+            watch_tier_config(settings.tier_config_path, settings.tier_config_poll_seconds)
+        ))
+        install_reload_signal(settings.tier_config_path)
+    if settings.backup_interval_minutes > 0:
+        background.append(asyncio.create_task(run_backups_forever(settings.backup_interval_minutes * 60)))
+    quest_worker.start()
     yield
+    await quest_worker.stop()
+    for task in background:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    if slow_query_log:
+        slow_query_log.uninstall()
+    if tracer:
+        tracer.uninstall()
 
 
 app = FastAPI(title="ClockQuest API", version="1.0.0", lifespan=lifespan)
 
+# Retried score submissions replay the original response instead of re-scoring.
+app.add_middleware(
+    IdempotencyMiddleware,
+    paths={"/api/sessions", "/api/trials", "/api/challenges/quest-run"},
+)
+# Wraps idempotency and the routes: overloaded clients are turned away before any work.
+app.add_middleware(AdmissionMiddleware)
+# Outside idempotency, so replayed responses are compressed per request.
+app.add_middleware(GZipMiddleware, minimum_size=settings.gzip_minimum_size)
+# Lets code below the routers (SQL hooks) see which route it runs for.
+app.add_middleware(RequestContextMiddleware)
+# The request span includes admission waits and compression.
+app.add_middleware(TracingMiddleware)
+# Outermost, so every response (429s from admission included) carries CORS
+# headers and the browser can read Retry-After.
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After"],
 )
 
 app.include_router(worlds.router)
@@ -61,6 +112,14 @@ def health_check():
     return {"status": "ok", "app": "ClockQuest"}
 
 
+@app.get("/api/health/ready")
+async def readiness_check():
+    """Whether this worker can serve traffic: 503 when the DB is slow or locked,
+    the reader pool is exhausted or background work is backed up."""
+    ready, report = await readiness()
+    return JSONResponse(report, status_code=200 if ready else 503)
+
+
 @app.get("/api/tiers")
 def get_tiers():
     """Return all tier definitions. Used by frontend to avoid hardcoded tier data."""
@@ -1,10 +1,15 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, Boolean, Date, DateTime, ForeignKey, Text, UniqueConstraint, Index, text
 from sqlalchemy.orm import relationship
 
 from .database import Base
 
 
+# Loader policy: every relationship raises instead of lazy-loading, so
+# related rows are only ever fetched by an explicit selectinload()/joinedload()
+# on the query that needs them.
+
+
 class World(Base):
     __tablename__ = "worlds"
 
@@ -12,33 +17,65 @@ class World(Base):
     name = Column(String(100), nullable=False)
     join_code = Column(String(20), unique=True, nullable=False, index=True)
     pin_hash = Column(String(128), nullable=True)
+    # IANA zone for the world's calendar; NULL means settings.default_time_zone
+    time_zone = Column(String(64), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
-    players = relationship("Player", back_populates="world", cascade="all, delete-orphan")
+    players = relationship(
+        "Player", back_populates="world", lazy="raise_on_sql", cascade="all, delete-orphan", passive_deletes=True
+    )
 
 
 class Player(Base):
     __tablename__ = "players"
+    __table_args__ = (
+        # Keyset pagination / ranking of a world's players by power
+        Index("ix_players_world_power", "world_id", "clock_power", "id"),
+        # Streak leaderboards: top-K straight off the index, per world and global
+        Index("ix_players_world_streak", "world_id", "streak_days", "id"),
+        Index("ix_players_streak", "streak_days", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     nickname = Column(String(50), nullable=False)
-    world_id = Column(Integer, ForeignKey("worlds.id"), nullable=False)
+    world_id = Column(Integer, ForeignKey("worlds.id", ondelete="CASCADE"), nullable=False, index=True)
     clock_power = Column(Float, default=0.0)
     current_tier = Column(Integer, default=0)
+    # Current play streak, maintained on quest-run insert and reset by the
+    # midnight decay job (see streaks.py). streak_through is the last local
+    # day the streak counts through; None when there is no streak.
+    streak_days = Column(Integer, nullable=False, default=0, server_default="0")
+    streak_through = Column(Date, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
-    world = relationship("World", back_populates="players")
-    sessions = relationship("Session", back_populates="player", cascade="all, delete-orphan")
-    tier_trials = relationship("TierTrial", back_populates="player", cascade="all, delete-orphan")
-    quests = relationship("Quest", back_populates="player", cascade="all, delete-orphan")
-    quest_runs = relationship("QuestRun", back_populates="player", cascade="all, delete-orphan")
+    world = relationship("World", back_populates="players", lazy="raise_on_sql")
+    sessions = relationship(
+        "Session", back_populates="player", lazy="raise_on_sql", cascade="all, delete-orphan", passive_deletes=True
+    )
+    tier_trials = relationship(
+        "TierTrial", back_populates="player", lazy="raise_on_sql", cascade="all, delete-orphan", passive_deletes=True
+    )
+    quests = relationship(
+        "Quest", back_populates="player", lazy="raise_on_sql", cascade="all, delete-orphan", passive_deletes=True
+    )
+    quest_runs = relationship(
+        "QuestRun", back_populates="player", lazy="raise_on_sql", cascade="all, delete-orphan", passive_deletes=True
+    )
+    session_summaries = relationship(
+        "SessionDailySummary", back_populates="player", lazy="raise_on_sql",
+        cascade="all, delete-orphan", passive_deletes=True,
+    )
+    point_buckets = relationship(
+        "PlayerPointBucket", back_populates="player", lazy="raise_on_sql",
+        cascade="all, delete-orphan", passive_deletes=True,
+    )
 
 
 class Session(Base):
     __tablename__ = "sessions"
 
     id = Column(Integer, primary_key=True, index=True)
-    player_id = Column(Integer, ForeignKey("players.id"), nullable=False)
+    player_id = Column(Integer, ForeignKey("players.id", ondelete="CASCADE"), nullable=False, index=True)
     mode = Column(String(20), nullable=False)  # read, set, speedrun
     difficulty = Column(String(20), nullable=False)  # hour, half, quarter, five_min, one_min, interval
     questions = Column(Integer, nullable=False)
@@ -50,14 +87,71 @@ class Session(Base):
     points_earned = Column(Float, default=0.0)
     created_at = Column(DateTime, default=datetime.utcnow)
 
-    player = relationship("Player", back_populates="sessions")
+    player = relationship("Player", back_populates="sessions", lazy="raise_on_sql")
+
+
+class SessionDailySummary(Base):
+    """Compacted totals of sessions older than the retention horizon.
+
+    One row per player, UTC day, mode and difficulty. Written by
+    retention.compact_sessions; readers that aggregate sessions union these in.
+    """
+    __tablename__ = "session_daily_summaries"
+    __table_args__ = (
+        UniqueConstraint("player_id", "day", "mode", "difficulty", name="uq_session_summary_bucket"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    player_id = Column(Integer, ForeignKey("players.id", ondelete="CASCADE"), nullable=False)
+    day = Column(Date, nullable=False)
+    mode = Column(String(20), nullable=False)
+    difficulty = Column(String(20), nullable=False)
+    sessions = Column(Integer, nullable=False, default=0)
+    questions = Column(Integer, nullable=False, default=0)
+    correct = Column(Integer, nullable=False, default=0)
+    hints_used = Column(Integer, nullable=False, default=0)
+    points_earned = Column(Float, nullable=False, default=0.0)
+    # Sessions that reported avg_response_ms, their question count and
+    # sum(avg_response_ms * questions), so weighted means can be rebuilt.
+    timed_sessions = Column(Integer, nullable=False, default=0)
+    timed_questions = Column(Integer, nullable=False, default=0)
+    response_ms_total = Column(Float, nullable=False, default=0.0)
+
+    player = relationship("Player", back_populates="session_summaries", lazy="raise_on_sql")
+
+
+class PlayerPointBucket(Base):
+    """Points earned by a player in one local calendar day, week or month.
+
+    Maintained incrementally by submit_session; see leaderboard_buckets.
+    world_id is denormalised so a world's top-K is one index range scan.
+    """
+    __tablename__ = "player_point_buckets"
+    __table_args__ = (
+        UniqueConstraint("player_id", "period", "bucket_start", name="uq_point_bucket"),
+        Index("ix_point_buckets_world_rank", "period", "bucket_start", "world_id", "points", "player_id"),
+        Index("ix_point_buckets_rank", "period", "bucket_start", "points", "player_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    player_id = Column(Integer, ForeignKey("players.id", ondelete="CASCADE"), nullable=False)
+    world_id = Column(Integer, ForeignKey("worlds.id", ondelete="CASCADE"), nullable=False)
+    period = Column(String(10), nullable=False)  # day, week, month
+    bucket_start = Column(Date, nullable=False)  # first local date of the bucket
+    points = Column(Float, nullable=False, default=0.0)
+
+    player = relationship("Player", back_populates="point_buckets", lazy="raise_on_sql")
 
 
 class TierTrial(Base):
     __tablename__ = "tier_trials"
+    __table_args__ = (
+        # Per-player, per-tier attempt aggregates (and "tried/passed before?") off the index
+        Index("ix_tier_trials_player_tier", "player_id", "tier", "passed"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    player_id = Column(Integer, ForeignKey("players.id"), nullable=False)
+    player_id = Column(Integer, ForeignKey("players.id", ondelete="CASCADE"), nullable=False, index=True)
     tier = Column(Integer, nullable=False)  # tier being unlocked (1-10)
     passed = Column(Boolean, nullable=False)
     questions = Column(Integer, nullable=False)
@@ -66,14 +160,52 @@ class TierTrial(Base):
     time_ms = Column(Integer, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
-    player = relationship("Player", back_populates="tier_trials")
+    player = relationship("Player", back_populates="tier_trials", lazy="raise_on_sql")
+
+
+class WorldTierTrialStats(Base):
+    """Trial attempt counters for one world and tier.
+
+    Maintained incrementally by submit_trial, so a world's per-tier summary
+    is one short index read however many trials it holds; see trial_stats.
+    """
+    __tablename__ = "world_tier_trial_stats"
+    __table_args__ = (
+        UniqueConstraint("world_id", "tier", name="uq_world_tier_trial_stats"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    world_id = Column(Integer, ForeignKey("worlds.id", ondelete="CASCADE"), nullable=False)
+    tier = Column(Integer, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    passes = Column(Integer, nullable=False, default=0)
+    # Distinct players who attempted / passed this tier
+    players_attempted = Column(Integer, nullable=False, default=0)
+    players_passed = Column(Integer, nullable=False, default=0)
+    questions = Column(Integer, nullable=False, default=0)
+    correct = Column(Integer, nullable=False, default=0)
+
+
+# Partial-index predicate for "active" quest cards; conflict targets must match it.
+ACTIVE_QUEST_WHERE = text("completed = 0")
 
 
 class Quest(Base):
     __tablename__ = "quests"
+    __table_args__ = (
+        # At most one active card per player per track; racing inserts conflict
+        # instead of creating duplicates.
+        Index(
+            "uq_quests_active_player_type",
+            "player_id",
+            "quest_type",
+            unique=True,
+            sqlite_where=ACTIVE_QUEST_WHERE,
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    player_id = Column(Integer, ForeignKey("players.id"), nullable=False)
+    player_id = Column(Integer, ForeignKey("players.id", ondelete="CASCADE"), nullable=False, index=True)
     quest_type = Column(String(30), nullable=False)  # accuracy, streak, speed, hint_free, trial_ready
     description = Column(Text, nullable=False)
     target = Column(Float, nullable=False)
@@ -82,19 +214,27 @@ class Quest(Base):
     mode = Column(String(20), nullable=True)
     difficulty = Column(String(20), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Local calendar day the card was issued in the player's world calendar
+    local_date = Column(Date, nullable=False)
 
-    player = relationship("Player", back_populates="quests")
+    player = relationship("Player", back_populates="quests", lazy="raise_on_sql")
 
 
 class QuestRun(Base):
     __tablename__ = "quest_runs"
+    __table_args__ = (
+        # Per-player daily minutes and streaks aggregate straight off this index
+        Index("ix_quest_runs_player_day", "player_id", "local_date", "duration_seconds"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    player_id = Column(Integer, ForeignKey("players.id"), nullable=False)
+    player_id = Column(Integer, ForeignKey("players.id", ondelete="CASCADE"), nullable=False, index=True)
     started_at = Column(DateTime, nullable=False)
     ended_at = Column(DateTime, nullable=False)
     duration_seconds = Column(Integer, nullable=False)
+    # Local day of started_at in the world calendar, fixed at insert (quests.quest_run_local_date)
+    local_date = Column(Date, nullable=False)
     completed = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
-    player = relationship("Player", back_populates="quest_runs")
+    player = relationship("Player", back_populates="quest_runs", lazy="raise_on_sql")
@@ -0,0 +1,124 @@
+"""Background recomputation of challenge cards after a session submit.
+
+``submit_session`` commits the session and returns straight away with the
+player's current cards; the rescan of quest runs and the card updates
+(``generate_quests``) happen here, off the response path.
+
+The worker is an ``asyncio.Queue`` of player ids drained by a fixed number
+of tasks, each running the DB work in a thread. Work is serialized per
+player and coalesced:
+
+* a player already waiting in the queue is not queued twice;
+* a player whose recompute is running is marked dirty and requeued once it
+  finishes, so the last submit is always reflected and two recomputes for
+  the same player never overlap.
+
+Queue state is only touched on the event loop; request threads hand ids over
+with ``call_soon_threadsafe``. When the worker is not running (CLI, tests
+without lifespan) ``submit`` returns False and the caller recomputes inline.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from .config import settings
+from .database import SessionLocal
+from .models import Player
+from .quests import generate_quests
+
+logger = logging.getLogger(__name__)
+
+
+def recompute_player_quests(session_factory, player_id: int) -> None:
+    db = session_factory()
+    try:
+        player = db.get(Player, player_id)
+        if player is not None:
+            generate_quests(db, player)
+    finally:
+        db.close()
+
+
+class QuestWorker:
+    """Per-player serialized, coalescing background queue."""
+
+    def __init__(self, session_factory=SessionLocal, concurrency: int = settings.quest_worker_concurrency):
+        self.session_factory = session_factory
+        self.concurrency = concurrency
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue[int] | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._pending: set[int] = set()
+        self._running: set[int] = set()
+        self._dirty: set[int] = set()
+
+    @property
+    def started(self) -> bool:
+        return bool(self._tasks)
+
+    @property
+    def depth(self) -> int:
+        """Players waiting or being recomputed."""
+        return len(self._pending) + len(self._running)
+
+    def start(self) -> None:
+        if self.started or self.concurrency <= 0:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.concurrency)]
+
+    async def stop(self, drain_timeout: float = 5.0) -> None:
+        """Finish queued work (up to ``drain_timeout``), then cancel the tasks."""
+        if not self.started:
+            return
+        try:
+            await asyncio.wait_for(self.join(), drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Quest worker stopped with %d players still queued", self.depth)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._pending.clear()
+        self._running.clear()
+        self._dirty.clear()
+
+    async def join(self) -> None:
+        """Wait until every queued recompute (including requeues) has finished."""
+        await self._queue.join()
+
+    def submit(self, player_id: int) -> bool:
+        """Queue a recompute from any thread. False if the worker is not running."""
+        if not self.started:
+            return False
+        self._loop.call_soon_threadsafe(self._enqueue, player_id)
+        return True
+
+    def _enqueue(self, player_id: int) -> None:
+        if player_id in self._running:
+            self._dirty.add(player_id)
+        elif player_id not in self._pending:
+            self._pending.add(player_id)
+            self._queue.put_nowait(player_id)
+
+    async def _run(self) -> None:
+        while True:
+            player_id = await self._queue.get()
+            self._pending.discard(player_id)
+            self._running.add(player_id)
+            try:
+                await asyncio.to_thread(recompute_player_quests, self.session_factory, player_id)
+            except Exception:
+                logger.exception("Quest recompute failed for player %d", player_id)
+            finally:
+                self._running.discard(player_id)
+                if player_id in self._dirty:
+                    self._dirty.discard(player_id)
+                    self._enqueue(player_id)
+                self._queue.task_done()
+
+
+quest_worker = QuestWorker()
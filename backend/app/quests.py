@@ -3,80 +3,129 @@
 Hub challenge tracks:
 1) Daily play challenge: Play X minutes today (10 -> 20 -> 30)
 2) Streak challenge: Play 10 minutes Y days in a row (3 -> 7 -> 14 -> 21 -> 30)
+
+Play time is bucketed by ``quest_runs.local_date`` and cards by
+``quests.local_date``. Both are stored once at insert in the player's world
+calendar (see timezones.py) and aggregated in SQL. Streaks use a
+gaps-and-islands window query: consecutive qualifying days share
+``julianday(day) - row_number()``, so each run of consecutive days becomes one
+group. The same statement serves one player, a world or every player.
 """
 
 from __future__ import annotations
 
-from collections import defaultdict
-from datetime import datetime, timezone
+from datetime import date, datetime, timedelta
 from zoneinfo import ZoneInfo
 
+from sqlalchemy import Date, func, select
+from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.orm import Session as DbSession
 
-from .models import Player, Quest, Session, QuestRun
+from .models import ACTIVE_QUEST_WHERE, Player, Quest, Session, QuestRun
+from .timezones import DEFAULT_TZ, local_date, world_zone
+from .tracing import traced
 
-BRISBANE_TZ = ZoneInfo("Australia/Brisbane")
 DAILY_MINUTES_GOALS = [10, 20, 30]
 STREAK_DAY_GOALS = [3, 7, 14, 21, 30]
 STREAK_REQUIRED_MINUTES_PER_DAY = 10
 
 
-def _quest_run_minutes(run: QuestRun) -> float:
-    return run.duration_seconds / 60.0
+def quest_run_local_date(started_at: datetime, tz: ZoneInfo = DEFAULT_TZ) -> date:
+    """Local calendar day a quest run counts towards (naive values are UTC)."""
+    return local_date(started_at, tz)
+
+
+def _today(tz: ZoneInfo = DEFAULT_TZ) -> date:
+    return local_date(tz=tz)
+
 
+def _scoped(stmt, player_id: int | None, world_id: int | None):
+    if player_id is not None:
+        stmt = stmt.where(QuestRun.player_id == player_id)
+    if world_id is not None:
+        stmt = stmt.join(Player, Player.id == QuestRun.player_id).where(Player.world_id == world_id)
+    return stmt
 
-def _quest_run_local_date(run: QuestRun):
-    created = run.started_at
-    if created.tzinfo is None:
-        created = created.replace(tzinfo=timezone.utc)
-    return created.astimezone(BRISBANE_TZ).date()
 
+def daily_minutes_query(player_id: int | None = None, world_id: int | None = None, since: date | None = None):
+    """SELECT (player_id, local_date, minutes) per player and local day."""
+    stmt = select(
+        QuestRun.player_id,
+        QuestRun.local_date,
+        (func.sum(QuestRun.duration_seconds) / 60.0).label("minutes"),
+    ).group_by(QuestRun.player_id, QuestRun.local_date)
+    if since is not None:
+        stmt = stmt.where(QuestRun.local_date >= since)
+    return _scoped(stmt, player_id, world_id)
 
-def _minutes_by_day(db: DbSession, player_id: int) -> dict:
-    quest_runs = db.query(QuestRun).filter(QuestRun.player_id == player_id).all()
-    by_day = defaultdict(float)
-    for run in quest_runs:
-        by_day[_quest_run_local_date(run)] += _quest_run_minutes(run)
-    return dict(by_day)
 
+def minutes_on(db: DbSession, player_id: int, day: date) -> float:
+    """Minutes of quest play by ``player_id`` on local ``day``."""
+    total = db.execute(
+        select(func.sum(QuestRun.duration_seconds))
+        .where(QuestRun.player_id == player_id, QuestRun.local_date == day)
+    ).scalar()
+    return (total or 0) / 60.0
 
-def _current_streak_days(minutes_by_day: dict) -> int:
-    """Return current streak length with 'today pending' behavior.
 
-    If today's 10-minute target is not yet met, keep yesterday's streak showing
-    (so progress can read 1/3 this morning after hitting yesterday).
+def current_streaks_query(today: date, player_id: int | None = None, world_id: int | None = None):
+    """SELECT (player_id, streak, through) for every current streak in scope.
+
+    A streak is current if it runs through today or yesterday ('today
+    pending'), matching the challenge card. Players without one are absent.
     """
-    today = datetime.now(BRISBANE_TZ).date()
+    qualifying = _scoped(
+        select(QuestRun.player_id, QuestRun.local_date.label("day"))
+        .where(QuestRun.local_date <= today)
+        .group_by(QuestRun.player_id, QuestRun.local_date)
+        .having(func.sum(QuestRun.duration_seconds) >= STREAK_REQUIRED_MINUTES_PER_DAY * 60),
+        player_id,
+        world_id,
+    ).subquery("qualifying_days")
+    islands = select(
+        qualifying.c.player_id,
+        qualifying.c.day,
+        (
+            func.julianday(qualifying.c.day)
+            - func.row_number().over(partition_by=qualifying.c.player_id, order_by=qualifying.c.day)
+        ).label("island"),
+    ).subquery("islands")
+    last_day = func.max(islands.c.day, type_=Date)
+    return (
+        select(islands.c.player_id, func.count().label("streak"), last_day.label("through"))
+        .group_by(islands.c.player_id, islands.c.island)
+        .having(last_day >= today - timedelta(days=1))
+    )
 
-    if minutes_by_day.get(today, 0.0) >= STREAK_REQUIRED_MINUTES_PER_DAY:
-        day = today
-    elif minutes_by_day.get(today.fromordinal(today.toordinal() - 1), 0.0) >= STREAK_REQUIRED_MINUTES_PER_DAY:
-        day = today.fromordinal(today.toordinal() - 1)
-    else:
-        return 0
 
-    streak = 0
-    while minutes_by_day.get(day, 0.0) >= STREAK_REQUIRED_MINUTES_PER_DAY:
-        streak += 1
-        day = day.fromordinal(day.toordinal() - 1)
-    return streak
+def current_streaks(
+    db: DbSession, today: date | None = None, player_id: int | None = None, world_id: int | None = None,
+) -> dict[int, tuple[int, date]]:
+    """{player_id: (streak days, last day counted)} for players with a current streak.
 
+    ``today`` defaults to today in ``world_id``'s calendar, or in the default
+    calendar when no world is given.
+    """
+    if today is None:
+        today = _today(world_zone(db, world_id) if world_id is not None else DEFAULT_TZ)
+    rows = db.execute(current_streaks_query(today, player_id, world_id))
+    return {pid: (streak, through) for pid, streak, through in rows}
 
-def _goal_from_completed(completed_count: int, goals: list[int]) -> int:
-    return goals[min(completed_count, len(goals) - 1)]
 
+def current_streak(db: DbSession, player_id: int, today: date | None = None) -> tuple[int, date | None]:
+    """(streak days, last day counted) for one player; (0, None) without a streak."""
+    return current_streaks(db, today, player_id=player_id).get(player_id, (0, None))
 
-def _quest_local_created_date(quest: Quest):
-    created = quest.created_at
-    if created.tzinfo is None:
-        created = created.replace(tzinfo=timezone.utc)
-    return created.astimezone(BRISBANE_TZ).date()
+
+def _goal_from_completed(completed_count: int, goals: list[int]) -> int:
+    return goals[min(completed_count, len(goals) - 1)]
 
 
 def _ensure_track(
     db: DbSession,
     player: Player,
     *,
+    today: date,
     quest_type: str,
     description_builder,
     goals: list[int],
@@ -108,19 +157,24 @@ def _ensure_track(
     while True:
         target = _goal_from_completed(completed_count, goals)
         completed = metric_value >= target
-        q = Quest(
-            player_id=player.id,
-            quest_type=quest_type,
-            description=description_builder(target),
-            target=target,
-            progress=min(metric_value, target),
-            completed=completed,
-            mode="quest",
-            difficulty=None,
+        # A concurrent request may already have inserted the active card; the
+        # partial unique index turns that into a no-op instead of a duplicate.
+        db.execute(
+            insert(Quest)
+            .values(
+                player_id=player.id,
+                quest_type=quest_type,
+                local_date=today,
+                description=description_builder(target),
+                target=target,
+                progress=min(metric_value, target),
+                completed=completed,
+                mode="quest",
+                difficulty=None,
+            )
+            .on_conflict_do_nothing(index_elements=["player_id", "quest_type"], index_where=ACTIVE_QUEST_WHERE)
         )
-        db.add(q)
         db.commit()
-        db.refresh(q)
 
         # stop when we produced an active card, or when max tier reached
         at_max_goal = completed_count >= len(goals) - 1
@@ -130,6 +184,7 @@ def _ensure_track(
         completed_count += 1
 
 
+@traced()
 def generate_quests(db: DbSession, player: Player) -> list[Quest]:
     """Ensure exactly two active challenge cards (daily + streak)."""
     # Retire legacy active quest types from older versions.
@@ -147,25 +202,9 @@ def generate_quests(db: DbSession, player: Player) -> list[Quest]:
             q.completed = True
         db.commit()
 
-    # Deduplicate active cards by type (can happen if multiple requests race).
-    deduped_any = False
-    for t in ["daily_play", "daily_streak"]:
-        active = (
-            db.query(Quest)
-            .filter(Quest.player_id == player.id, Quest.quest_type == t, Quest.completed == False)
-            .order_by(Quest.id.asc())
-            .all()
-        )
-        for dup in active[1:]:
-            dup.completed = True
-            deduped_any = True
-    if deduped_any:
-        db.commit()
-
-    minutes_by_day = _minutes_by_day(db, player.id)
-    today = datetime.now(BRISBANE_TZ).date()
-    today_minutes = minutes_by_day.get(today, 0.0)
-    streak_days = _current_streak_days(minutes_by_day)
+    today = _today(world_zone(db, player.world_id))
+    today_minutes = minutes_on(db, player.id, today)
+    streak_days, _ = current_streak(db, player.id, today)
 
     # Daily challenge resets each local day: retire any active daily card from prior days.
     stale_daily = (
@@ -175,21 +214,22 @@ def generate_quests(db: DbSession, player: Player) -> list[Quest]:
     )
     stale_changed = False
     for q in stale_daily:
-        if _quest_local_created_date(q) < today:
+        if q.local_date < today:
             q.completed = True
             stale_changed = True
     if stale_changed:
         db.commit()
 
-    daily_completed_today = 0
-    completed_daily = (
+    daily_completed_today = (
         db.query(Quest)
-        .filter(Quest.player_id == player.id, Quest.quest_type == "daily_play", Quest.completed == True)
-        .all()
+        .filter(
+            Quest.player_id == player.id,
+            Quest.quest_type == "daily_play",
+            Quest.completed == True,
+            Quest.local_date == today,
+        )
+        .count()
     )
-    for q in completed_daily:
-        if _quest_local_created_date(q) == today:
-            daily_completed_today += 1
 
     # Refresh existing active cards from current local-day metrics.
     # This prevents stale carry-over such as showing yesterday's 30/30 today.
@@ -222,6 +262,7 @@ def generate_quests(db: DbSession, player: Player) -> list[Quest]:
     _ensure_track(
         db,
         player,
+        today=today,
         quest_type="daily_play",
         description_builder=lambda target: f"Play {target} minutes today",
         goals=DAILY_MINUTES_GOALS,
@@ -231,6 +272,7 @@ def generate_quests(db: DbSession, player: Player) -> list[Quest]:
     _ensure_track(
         db,
         player,
+        today=today,
         quest_type="daily_streak",
         description_builder=lambda target: f"Play 10 minutes {target} days in a row",
         goals=STREAK_DAY_GOALS,
@@ -241,10 +283,12 @@ def generate_quests(db: DbSession, player: Player) -> list[Quest]:
         db.query(Quest)
         .filter(Quest.player_id == player.id, Quest.completed == False)
         .order_by(Quest.id.asc())
+        .populate_existing()
         .all()
     )
 
 
+@traced()
 def update_quest_progress(db: DbSession, player: Player, session: Session) -> list[Quest]:
     """Update active daily/streak cards after a session is completed."""
     active_quests = (
@@ -253,10 +297,9 @@ def update_quest_progress(db: DbSession, player: Player, session: Session) -> li
         .all()
     )
 
-    minutes_by_day = _minutes_by_day(db, player.id)
-    today = datetime.now(BRISBANE_TZ).date()
-    today_minutes = minutes_by_day.get(today, 0.0)
-    streak_days = _current_streak_days(minutes_by_day)
+    today = _today(world_zone(db, player.world_id))
+    today_minutes = minutes_on(db, player.id, today)
+    streak_days, _ = current_streak(db, player.id, today)
 
     updated = []
     for quest in active_quests:
@@ -271,7 +314,15 @@ def update_quest_progress(db: DbSession, player: Player, session: Session) -> li
 
     if updated:
         db.commit()
-        for q in updated:
-            db.refresh(q)
 
     return active_quests
+
+
+def active_quests(db: DbSession, player_id: int) -> list[Quest]:
+    """Current active cards as last written, without recomputing progress."""
+    return (
+        db.query(Quest)
+        .filter(Quest.player_id == player_id, Quest.completed == False)
+        .order_by(Quest.id.asc())
+        .all()
+    )
@@ -0,0 +1,38 @@
+"""The HTTP request being served, for code far below the routers.
+
+``RequestContextMiddleware`` puts the ASGI scope in a context variable for the
+duration of each request. Context variables follow the request into the
+threadpool where sync endpoints run, so SQL event hooks and helpers can say
+which route they were called from without the request being passed down.
+"""
+
+from __future__ import annotations
+
+from contextvars import ContextVar
+
+current_scope: ContextVar[dict | None] = ContextVar("current_scope", default=None)
+
+
+def route_label(scope: dict | None = None) -> str | None:
+    """``"POST /api/sessions"``-style label, using the route template once routing has matched."""
+    scope = scope if scope is not None else current_scope.get()
+    if scope is None:
+        return None
+    route = scope.get("route")
+    path = getattr(route, "path", None) or scope.get("path", "")
+    return f"{scope.get('method', '')} {path}".strip()
+
+
+class RequestContextMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = current_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_scope.reset(token)
@@ -0,0 +1,249 @@
+"""Offline re-scoring: rebuild clock power from session and trial history.
+
+After tuning ``scoring.raw_session_points`` (or tier ceilings), run this to
+replay every player's history with the current rules and write back
+``sessions.points_earned``, ``players.clock_power`` and
+``players.current_tier``. Optionally ``player_point_buckets`` is rebuilt from the
+re-scored sessions too.
+
+Players are processed in id-ordered chunks. For each chunk, one UNION ALL query
+returns the sessions, compacted summaries and trials of those players in
+(player, time) order. A tight loop then replays them, and only rows whose
+values changed are written back with executemany, one transaction per chunk.
+Memory is bounded by the chunk size, not by the history size.
+
+Replay rules match the live endpoints:
+
+* a session adds ``raw_session_points`` capped at the current tier's ceiling
+  (as ``award_session_points`` does);
+* a compacted daily summary has lost per-session detail, so its stored
+  ``points_earned`` is replayed as a fixed amount, still capped, and lands in
+  the buckets of its stored ``day`` (it has no time of day to convert);
+* a passed trial unlocks its tier only if it is the next tier and the
+  replayed power has reached the tier's ``min_power`` (as ``submit_trial``
+  requires).
+
+Run it while the app is stopped (or quiet); live submits during a rescore are
+not replayed. Run from backend/:
+    python -m app.rescore [--dry-run] [--rebuild-buckets] [--chunk-size N]
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from sqlalchemy import bindparam, delete, insert, literal, null, select, update
+from sqlalchemy.orm import Session as DbSession
+
+from .leaderboard_buckets import PERIODS, bucket_start
+from .models import Player, PlayerPointBucket, Session, SessionDailySummary, TierTrial, World
+from .scoring import raw_session_points
+from .tiers import get_tier, get_tier_ceiling
+from .timezones import local_date, zone
+
+DEFAULT_CHUNK_SIZE = 500
+KIND_SUMMARY, KIND_SESSION, KIND_TRIAL = 0, 1, 2
+
+
+@dataclass
+class PlayerChange:
+    player_id: int
+    nickname: str
+    old_power: float
+    new_power: float
+    old_tier: int
+    new_tier: int
+
+
+@dataclass
+class RescoreReport:
+    players: int = 0
+    sessions: int = 0
+    sessions_changed: int = 0
+    changes: list[PlayerChange] = field(default_factory=list)
+
+    @property
+    def players_changed(self) -> int:
+        return len(self.changes)
+
+    @property
+    def power_delta(self) -> float:
+        return round(sum(c.new_power - c.old_power for c in self.changes), 1)
+
+
+def _history_query(first_id: int, last_id: int):
+    """Sessions, summaries and trials of players in [first_id, last_id], replay order."""
+    sessions = select(
+        literal(KIND_SESSION).label("kind"), Session.id, Session.player_id, Session.created_at.label("ts"),
+        Session.questions, Session.correct, Session.hints_used, Session.max_streak, Session.points_earned,
+        null().label("tier"), null().label("passed"),
+    ).where(Session.player_id.between(first_id, last_id))
+    summaries = select(
+        literal(KIND_SUMMARY), SessionDailySummary.id, SessionDailySummary.player_id, SessionDailySummary.day,
+        null(), null(), null(), null(), SessionDailySummary.points_earned, null(), null(),
+    ).where(SessionDailySummary.player_id.between(first_id, last_id))
+    trials = select(
+        literal(KIND_TRIAL), TierTrial.id, TierTrial.player_id, TierTrial.created_at,
+        null(), null(), null(), null(), null(), TierTrial.tier, TierTrial.passed,
+    ).where(TierTrial.player_id.between(first_id, last_id))
+    union = sessions.union_all(summaries, trials).subquery()
+    return select(union).order_by(union.c.player_id, union.c.ts, union.c.kind, union.c.id)
+
+
+def _replay(events, report: RescoreReport, buckets: dict | None, world_of: dict[int, tuple]):
+    """Replay one chunk's events.
+
+    Returns ``({player_id: (power, tier)}, changed session rows)`` and adds
+    re-scored points to ``buckets`` when given. ``world_of`` maps each player
+    to their (world id, world time zone).
+    """
+    changed_sessions: list[dict] = []
+    results: dict[int, tuple[float, int]] = {}
+    player_id = None
+    power, tier = 0.0, 0
+    ceiling = get_tier_ceiling(0)
+
+    for kind, row_id, pid, ts, questions, correct, hints, max_streak, stored, trial_tier, passed in events:
+        if pid != player_id:
+            if player_id is not None:
+                results[player_id] = (power, tier)
+            player_id, power, tier, ceiling = pid, 0.0, 0, get_tier_ceiling(0)
+
+        if kind == KIND_TRIAL:
+            if passed and trial_tier == tier + 1 and power >= get_tier(trial_tier).min_power:
+                tier = trial_tier
+                ceiling = get_tier_ceiling(tier)
+            continue
+
+        if kind == KIND_SESSION:
+            report.sessions += 1
+            raw = raw_session_points(questions, correct, hints or 0, max_streak or 0)
+        else:
+            raw = stored or 0.0
+        new_power = round(max(power, min(power + raw, ceiling)), 1)
+        points = round(max(0.0, new_power - power), 1)
+        power = new_power
+
+        if kind == KIND_SESSION and points != stored:
+            changed_sessions.append({"b_id": row_id, "b_points": points})
+        if buckets is not None and points > 0:
+            world_id, tz = world_of[pid]
+            # Summaries come back as midnight of their day; converting that
+            # to a zone west of UTC would move them to the day before
+            day = ts.date() if kind == KIND_SUMMARY else local_date(ts, tz)
+            for period in PERIODS:
+                buckets[(pid, world_id, period, bucket_start(period, day))] += points
+
+    if player_id is not None:
+        results[player_id] = (power, tier)
+    return results, changed_sessions
+
+
+def rescore_players(
+    db: DbSession,
+    *,
+    dry_run: bool = False,
+    rebuild_buckets: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> RescoreReport:
+    """Replay all history and (unless ``dry_run``) write the results back."""
+    report = RescoreReport()
+    sessions_table = Session.__table__
+    players_table = Player.__table__
+    set_points = (
+        update(sessions_table)
+        .where(sessions_table.c.id == bindparam("b_id"))
+        .values(points_earned=bindparam("b_points"))
+    )
+    set_player = (
+        update(players_table)
+        .where(players_table.c.id == bindparam("b_id"))
+        .values(clock_power=bindparam("b_power"), current_tier=bindparam("b_tier"))
+    )
+
+    after = 0
+    while True:
+        players = db.execute(
+            select(
+                Player.id, Player.nickname, Player.world_id, Player.clock_power, Player.current_tier,
+                World.time_zone,
+            )
+            .join(World, World.id == Player.world_id)
+            .where(Player.id > after)
+            .order_by(Player.id)
+            .limit(chunk_size)
+        ).all()
+        if not players:
+            break
+        first_id, after = players[0].id, players[-1].id
+        report.players += len(players)
+
+        buckets = defaultdict(float) if rebuild_buckets else None
+        world_of = {p.id: (p.world_id, zone(p.time_zone)) for p in players}
+        # Core execution: skips ORM row processing on the hot path.
+        events = db.connection().execute(_history_query(first_id, after))
+        results, changed_sessions = _replay(events, report, buckets, world_of)
+        report.sessions_changed += len(changed_sessions)
+
+        changed_players = []
+        for p in players:
+            power, tier = results.get(p.id, (0.0, 0))
+            if power != (p.clock_power or 0.0) or tier != (p.current_tier or 0):
+                report.changes.append(PlayerChange(
+                    p.id, p.nickname, p.clock_power or 0.0, power, p.current_tier or 0, tier,
+                ))
+                changed_players.append({"b_id": p.id, "b_power": power, "b_tier": tier})
+
+        if dry_run:
+            continue
+        if changed_sessions:
+            db.execute(set_points, changed_sessions)
+        if changed_players:
+            db.execute(set_player, changed_players)
+        if buckets is not None:
+            db.execute(delete(PlayerPointBucket).where(PlayerPointBucket.player_id.between(first_id, after)))
+            if buckets:
+                db.execute(insert(PlayerPointBucket), [
+                    {"player_id": pid, "world_id": wid, "period": period, "bucket_start": start,
+                     "points": round(points, 1)}
+                    for (pid, wid, period, start), points in buckets.items()
+                ])
+        db.commit()
+
+    return report
+
+
+def main() -> None:
+    from .database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Recompute clock power from session and trial history.")
+    parser.add_argument("--dry-run", action="store_true", help="report the differences without writing")
+    parser.add_argument("--rebuild-buckets", action="store_true", help="also rebuild calendar leaderboard buckets")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="players per transaction")
+    parser.add_argument("--show", type=int, default=20, help="largest changes to list")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        report = rescore_players(
+            db, dry_run=args.dry_run, rebuild_buckets=args.rebuild_buckets, chunk_size=args.chunk_size,
+        )
+    finally:
+        db.close()
+
+    verb = "would change" if args.dry_run else "changed"
+    print(
+        f"Replayed {report.sessions} sessions for {report.players} players: {verb} "
+        f"{report.sessions_changed} sessions and {report.players_changed} players "
+        f"(net power {report.power_delta:+.1f})"
+    )
+    largest = sorted(report.changes, key=lambda c: abs(c.new_power - c.old_power), reverse=True)
+    for c in largest[:args.show]:
+        tier = f", tier {c.old_tier} -> {c.new_tier}" if c.old_tier != c.new_tier else ""
+        print(f"  #{c.player_id} {c.nickname}: {c.old_power:.1f} -> {c.new_power:.1f}{tier}")
+
+
+if __name__ == "__main__":
+    main()
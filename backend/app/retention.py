@@ -0,0 +1,181 @@
+"""Session history compaction.
+
+Sessions older than ``settings.session_retention_days`` are folded into
+``session_daily_summaries`` (one row per player, UTC day, mode, difficulty)
+and the originals deleted, a bounded batch per transaction so the writer lock
+is never held for long. Totals for sessions, points, questions, correct and
+hints are preserved exactly; readers that aggregate sessions union the
+summaries in (see ``analytics`` and ``rescore``).
+
+Deleting sessions does not shrink the database file unless it uses
+``auto_vacuum=INCREMENTAL``, which is off by default; switch it on once with
+``--enable-incremental-vacuum``.
+
+Run from backend/:
+    python -m app.retention [--days N] [--batch-size N] [--dry-run] [--enable-incremental-vacuum]
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, func, select, delete, text
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session as DbSession
+
+from .config import settings
+from .models import Session, SessionDailySummary
+
+logger = logging.getLogger(__name__)
+
+_SUMMED_COLUMNS = [
+    "sessions",
+    "questions",
+    "correct",
+    "hints_used",
+    "points_earned",
+    "timed_sessions",
+    "timed_questions",
+    "response_ms_total",
+]
+
+
+def _summary_select(session_ids: list[int]):
+    """Aggregate a batch of sessions into summary-shaped rows."""
+    timed = Session.avg_response_ms.isnot(None)
+    return (
+        select(
+            Session.player_id,
+            func.date(Session.created_at),
+            Session.mode,
+            Session.difficulty,
+            func.count(),
+            func.sum(Session.questions),
+            func.sum(Session.correct),
+            func.sum(func.coalesce(Session.hints_used, 0)),
+            func.sum(func.coalesce(Session.points_earned, 0.0)),
+            func.sum(case((timed, 1), else_=0)),
+            func.sum(case((timed, Session.questions), else_=0)),
+            func.sum(case((timed, Session.avg_response_ms * Session.questions), else_=0.0)),
+        )
+        .where(Session.id.in_(session_ids))
+        .group_by(Session.player_id, func.date(Session.created_at), Session.mode, Session.difficulty)
+    )
+
+
+def _upsert_summaries(session_ids: list[int]):
+    stmt = insert(SessionDailySummary).from_select(
+        ["player_id", "day", "mode", "difficulty", *_SUMMED_COLUMNS],
+        _summary_select(session_ids),
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=["player_id", "day", "mode", "difficulty"],
+        set_={col: getattr(SessionDailySummary, col) + getattr(stmt.excluded, col) for col in _SUMMED_COLUMNS},
+    )
+
+
+def compact_sessions(
+    db: DbSession,
+    *,
+    retention_days: int | None = None,
+    batch_size: int | None = None,
+    now: datetime | None = None,
+    vacuum: bool = True,
+) -> dict:
+    """Fold sessions older than the horizon into daily summaries.
+
+    Each batch is summarised, upserted and deleted in one transaction, so a
+    crash mid-run never double-counts or loses a session. Returns counts of
+    sessions compacted and batches committed, and whether freed pages were
+    handed back to the filesystem.
+
+    Deleting rows only frees pages inside the file. With ``vacuum`` they are
+    released with ``PRAGMA incremental_vacuum``, which only works once the
+    database has ``auto_vacuum=INCREMENTAL`` (see
+    ``enable_incremental_vacuum``). Otherwise the file keeps its size, SQLite
+    reuses the free pages for new rows, and ``vacuumed`` is False.
+    """
+    retention_days = settings.session_retention_days if retention_days is None else retention_days
+    batch_size = settings.session_compaction_batch_size if batch_size is None else batch_size
+    cutoff = (now or datetime.utcnow()) - timedelta(days=retention_days)
+
+    compacted = 0
+    batches = 0
+    while True:
+        ids = db.scalars(
+            select(Session.id).where(Session.created_at < cutoff).order_by(Session.id).limit(batch_size)
+        ).all()
+        if not ids:
+            break
+        db.execute(_upsert_summaries(ids))
+        db.execute(delete(Session).where(Session.id.in_(ids)))
+        db.commit()
+        compacted += len(ids)
+        batches += 1
+
+    vacuumed = False
+    if vacuum and compacted:
+        if incremental_vacuum_enabled(db):
+            db.execute(text("PRAGMA incremental_vacuum"))
+            db.commit()
+            vacuumed = True
+        else:
+            logger.info("auto_vacuum is not INCREMENTAL; freed pages stay in the file for reuse")
+
+    return {"cutoff": cutoff, "compacted": compacted, "batches": batches, "vacuumed": vacuumed}
+
+
+def count_compactable(db: DbSession, *, retention_days: int | None = None, now: datetime | None = None) -> int:
+    retention_days = settings.session_retention_days if retention_days is None else retention_days
+    cutoff = (now or datetime.utcnow()) - timedelta(days=retention_days)
+    return db.scalar(select(func.count()).select_from(Session).where(Session.created_at < cutoff))
+
+
+def incremental_vacuum_enabled(db: DbSession) -> bool:
+    # PRAGMA auto_vacuum: 0 = NONE, 1 = FULL, 2 = INCREMENTAL
+    return db.execute(text("PRAGMA auto_vacuum")).scalar() == 2
+
+
+def enable_incremental_vacuum(db: DbSession) -> None:
+    """Switch the database to auto_vacuum=INCREMENTAL (rewrites the file once)."""
+    db.execute(text("PRAGMA auto_vacuum=INCREMENTAL"))
+    db.commit()
+    db.connection().exec_driver_sql("VACUUM")
+
+
+def main() -> None:
+    from .database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Compact old sessions into daily summaries.")
+    parser.add_argument("--days", type=int, default=None, help="retention horizon in days")
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--dry-run", action="store_true", help="only report how many sessions would be compacted")
+    parser.add_argument(
+        "--enable-incremental-vacuum", action="store_true",
+        help="switch the database to auto_vacuum=INCREMENTAL first (one full VACUUM); "
+             "without it, compaction frees space inside the file but never shrinks it",
+    )
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.dry_run:
+            print(f"{count_compactable(db, retention_days=args.days)} sessions would be compacted")
+            return
+        if args.enable_incremental_vacuum:
+            enable_incremental_vacuum(db)
+        result = compact_sessions(db, retention_days=args.days, batch_size=args.batch_size)
+        print(
+            f"Compacted {result['compacted']} sessions older than {result['cutoff']:%Y-%m-%d} "
+            f"in {result['batches']} batches"
+        )
+        if result["compacted"] and not result["vacuumed"]:
+            print("File size unchanged: run once with --enable-incremental-vacuum to let compaction shrink it")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
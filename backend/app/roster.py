@@ -0,0 +1,72 @@
+"""Bulk roster import: parse a class list and create all players at once."""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session as DbSession
+
+from .models import Player
+
+NICKNAME_MAX_LENGTH = 50
+
+
+class RosterError(ValueError):
+    """Raised when a roster body cannot be parsed or contains bad nicknames."""
+
+
+def _from_csv(text: str) -> list[str]:
+    rows = [row for row in csv.reader(io.StringIO(text)) if row and any(cell.strip() for cell in row)]
+    if rows and rows[0][0].strip().lower() == "nickname":
+        rows = rows[1:]
+    return [row[0] for row in rows]
+
+
+def _from_json(text: str) -> list[str]:
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as exc:
+        raise RosterError(f"invalid JSON ({exc.msg})") from exc
+    if isinstance(data, dict):
+        data = data.get("nicknames")
+    if not isinstance(data, list) or not all(isinstance(n, str) for n in data):
+        raise RosterError('expected a JSON list of nicknames or {"nicknames": [...]}')
+    return data
+
+
+def parse_roster(body: bytes, content_type: str, max_players: int) -> list[str]:
+    """Return cleaned nicknames in submission order.
+
+    JSON bodies may be a list of strings or ``{"nicknames": [...]}``; anything
+    else is read as CSV with the nickname in the first column and an optional
+    ``nickname`` header row.
+    """
+    try:
+        text = body.decode("utf-8-sig")
+    except UnicodeDecodeError as exc:
+        raise RosterError("roster must be UTF-8") from exc
+
+    raw = _from_json(text) if "json" in (content_type or "") else _from_csv(text)
+    nicknames = [n.strip() for n in raw]
+
+    if not nicknames:
+        raise RosterError("roster is empty")
+    if len(nicknames) > max_players:
+        raise RosterError(f"roster has {len(nicknames)} players; the limit is {max_players}")
+    bad = [i + 1 for i, n in enumerate(nicknames) if not 1 <= len(n) <= NICKNAME_MAX_LENGTH]
+    if bad:
+        shown = ", ".join(str(i) for i in bad[:10])
+        raise RosterError(f"nicknames must be 1-{NICKNAME_MAX_LENGTH} characters (entries {shown})")
+    return nicknames
+
+
+def bulk_create_players(db: DbSession, world_id: int, nicknames: list[str]):
+    """Insert all players with one executemany and return the new rows in order."""
+    table = Player.__table__
+    return db.execute(
+        insert(table).returning(*table.c, sort_by_parameter_order=True),
+        [{"nickname": n, "world_id": world_id} for n in nicknames],
+    ).all()
@@ -1,11 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session as DbSession
 
-from ..database import get_db
+from ..database import get_db, SessionRoute
 from ..models import Player, QuestRun
 from ..schemas import QuestRunCreate, QuestRunResponse
+from ..quests import quest_run_local_date
+from ..streaks import refresh_player_streak
+from ..timezones import local_date, world_zone
 
-router = APIRouter(prefix="/api/challenges", tags=["challenges"])
+router = APIRouter(prefix="/api/challenges", tags=["challenges"], route_class=SessionRoute)
 
 
 @router.post("/quest-run", response_model=QuestRunResponse)
@@ -17,14 +20,19 @@ def record_quest_run(data: QuestRunCreate, db: DbSession = Depends(get_db)):
     if data.ended_at < data.started_at:
         raise HTTPException(status_code=400, detail="ended_at must be >= started_at")
 
+    tz = world_zone(db, player.world_id)
     run = QuestRun(
         player_id=data.player_id,
         started_at=data.started_at,
         ended_at=data.ended_at,
         duration_seconds=data.duration_seconds,
+        local_date=quest_run_local_date(data.started_at, tz),
         completed=data.completed,
     )
     db.add(run)
+    db.flush()
+    # Keep the stored streak (streak leaderboard) in step with quest history
+    refresh_player_streak(db, player, local_date(tz=tz))
     db.commit()
     db.refresh(run)
     return run
@@ -1,54 +1,88 @@
-from datetime import datetime, timedelta
-
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session as DbSession
-from sqlalchemy import func
 
-from ..database import get_db
-from ..models import Player, Session as SessionModel
-from ..schemas import LeaderboardEntry, LeaderboardResponse
+from ..database import get_db, SessionRoute
+from ..models import Player
+from ..schemas import LeaderboardEntry, LeaderboardResponse, StreakLeaderboardEntry, StreakLeaderboardResponse
 from ..tiers import get_tier_name
+from ..leaderboard_buckets import points_in_bucket, top_players
+from ..streaks import top_streaks
+from ..timezones import local_date, world_zone
+
+router = APIRouter(prefix="/api/leaderboard", tags=["leaderboard"], route_class=SessionRoute)
+
+# API period name -> player_point_buckets.period
+CALENDAR_PERIODS = {"today": "day", "week": "week", "month": "month"}
+
 
-router = APIRouter(prefix="/api/leaderboard", tags=["leaderboard"])
+def _entry(rank: int, player: Player, weekly_gain: float, period_points: float | None = None) -> LeaderboardEntry:
+    return LeaderboardEntry(
+        rank=rank,
+        player_id=player.id,
+        nickname=player.nickname,
+        clock_power=player.clock_power,
+        current_tier=player.current_tier,
+        tier_name=get_tier_name(player.current_tier),
+        weekly_gain=round(float(weekly_gain), 1),
+        period_points=round(float(period_points), 1) if period_points is not None else None,
+    )
 
 
 @router.get("", response_model=LeaderboardResponse)
 def get_leaderboard(
     scope: str = Query("global", pattern="^(global|world)$"),
     world_id: int | None = None,
+    period: str = Query("all", pattern="^(all|today|week|month)$"),
     db: DbSession = Depends(get_db),
 ):
-    query = db.query(Player)
+    """Rank players by clock power (period=all) or by points earned in the
+    current local calendar day, week or month. Each world's period follows its
+    own calendar, also for scope=global."""
+    world_filter = world_id if scope == "world" else None
+    # None means "each world's own today" (see leaderboard_buckets)
+    today = local_date(tz=world_zone(db, world_filter)) if world_filter is not None else None
+
+    if period != "all":
+        rows = top_players(db, CALENDAR_PERIODS[period], today, world_id=world_filter)
+        weekly = (
+            {p.id: pts for p, pts in rows} if period == "week"
+            else points_in_bucket(db, [p.id for p, _ in rows], "week", today)
+        )
+        entries = [
+            _entry(rank, player, weekly.get(player.id, 0.0), points)
+            for rank, (player, points) in enumerate(rows, 1)
+        ]
+        return LeaderboardResponse(scope=scope, period=period, entries=entries)
 
-    if scope == "world" and world_id is not None:
-        query = query.filter(Player.world_id == world_id)
+    query = db.query(Player)
+    if world_filter is not None:
+        query = query.filter(Player.world_id == world_filter)
+    players = query.order_by(Player.clock_power.desc(), Player.id.desc()).limit(100).all()
 
-    players = query.order_by(Player.clock_power.desc()).limit(100).all()
+    # Weekly gain comes from the current calendar week's points bucket
+    weekly = points_in_bucket(db, [p.id for p in players], "week", today)
+    entries = [_entry(rank, player, weekly.get(player.id, 0.0)) for rank, player in enumerate(players, 1)]
 
-    # Calculate weekly gains
-    week_ago = datetime.utcnow() - timedelta(days=7)
-    entries = []
+    return LeaderboardResponse(scope=scope, period=period, entries=entries)
 
-    for rank, player in enumerate(players, 1):
-        weekly_points = (
-            db.query(func.coalesce(func.sum(SessionModel.points_earned), 0))
-            .filter(
-                SessionModel.player_id == player.id,
-                SessionModel.created_at >= week_ago,
-            )
-            .scalar()
-        )
 
-        entries.append(
-            LeaderboardEntry(
-                rank=rank,
-                player_id=player.id,
-                nickname=player.nickname,
-                clock_power=player.clock_power,
-                current_tier=player.current_tier,
-                tier_name=get_tier_name(player.current_tier),
-                weekly_gain=round(float(weekly_points), 1),
-            )
+@router.get("/streaks", response_model=StreakLeaderboardResponse)
+def get_streak_leaderboard(
+    scope: str = Query("global", pattern="^(global|world)$"),
+    world_id: int | None = None,
+    db: DbSession = Depends(get_db),
+):
+    """Rank players by their current daily play streak."""
+    players = top_streaks(db, world_id=world_id if scope == "world" else None)
+    entries = [
+        StreakLeaderboardEntry(
+            rank=rank,
+            player_id=player.id,
+            nickname=player.nickname,
+            current_tier=player.current_tier,
+            tier_name=get_tier_name(player.current_tier),
+            streak_days=player.streak_days,
         )
-
-    return LeaderboardResponse(scope=scope, entries=entries)
+        for rank, player in enumerate(players, 1)
+    ]
+    return StreakLeaderboardResponse(scope=scope, entries=entries)
@@ -1,13 +1,52 @@
-from fastapi import APIRouter, Depends, HTTPException
+import base64
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select, tuple_
 from sqlalchemy.orm import Session
 
-from ..database import get_db
+from ..database import get_db, get_write_db, SessionRoute
 from ..models import Player, World
-from ..schemas import PlayerCreate, PlayerResponse, PlayerBriefing, ChallengeResponse
-from ..tiers import get_tier_name, get_tier_color, get_mastered_skills, get_tier
+from ..schemas import (
+    PlayerCreate,
+    PlayerResponse,
+    PlayerBriefing,
+    ChallengeResponse,
+    PlayerTierTrialSummary,
+    PlayerTrialHistory,
+    TierTrialResponse,
+)
+from ..tiers import get_tier_name, current_table
 from ..quests import generate_quests
+from ..trial_stats import forget_player_trials, player_tier_summary, player_trials
+
+router = APIRouter(prefix="/api/players", tags=["players"], route_class=SessionRoute)
+
+# Columns a caller may request with ?fields=, mirroring PlayerResponse.
+PLAYER_FIELDS = {name: getattr(Player, name) for name in PlayerResponse.model_fields}
+PLAYER_PAGE_MAX = 1000
+TRIAL_PAGE_MAX = 500
+
+
+def _encode_cursor(values: list) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, order: str) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        values = None
+    expected = 2 if order == "clock_power" else 1
+    if not isinstance(values, list) or len(values) != expected or not all(
+        isinstance(v, (int, float)) and not isinstance(v, bool) for v in values
+    ):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
 
-router = APIRouter(prefix="/api/players", tags=["players"])
+
+def _json_default(value):
+    return value.isoformat()
 
 
 @router.post("", response_model=PlayerResponse)
@@ -32,24 +71,87 @@ def get_player(player_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/world/{world_id}", response_model=list[PlayerResponse])
-def get_players_in_world(world_id: int, db: Session = Depends(get_db)):
-    players = db.query(Player).filter(Player.world_id == world_id).all()
-    return players
-
-
+def get_players_in_world(
+    world_id: int,
+    request: Request,
+    response: Response,
+    limit: int | None = Query(None, ge=1, le=PLAYER_PAGE_MAX),
+    after: str | None = Query(None, description="Cursor from the previous page's X-Next-Cursor header"),
+    order: str = Query("id", pattern="^(id|clock_power)$"),
+    fields: str | None = Query(None, description="Comma-separated subset of player fields"),
+    db: Session = Depends(get_db),
+):
+    """List a world's players, optionally a page at a time using keyset pagination.
+
+    Without ``limit`` or ``after`` every player is returned. Otherwise pages
+    hold ``limit`` players (default ``PLAYER_PAGE_MAX``). ``order=id`` walks
+    players by id; ``order=clock_power`` by power, highest first (ties by id,
+    descending), served by ix_players_world_power. When more rows remain the
+    response carries ``X-Next-Cursor`` and a ``Link`` header. ``fields``
+    limits both the SELECT and the JSON to the named columns; only then is
+    the JSON built by hand instead of through ``PlayerResponse``.
+    """
+    if fields:
+        requested = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in requested if f not in PLAYER_FIELDS]
+        if unknown or not requested:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown) or '(none)'}")
+    else:
+        requested = list(PLAYER_FIELDS)
+
+    if order == "clock_power":
+        key_columns = [Player.clock_power, Player.id]
+        ordering = [Player.clock_power.desc(), Player.id.desc()]
+    else:
+        key_columns = [Player.id]
+        ordering = [Player.id.asc()]
+
+    # Keyset columns are always selected so the next cursor can be built.
+    selected = [PLAYER_FIELDS[f] for f in requested]
+    selected += [c for c in key_columns if c.key not in requested]
+    stmt = select(*selected).where(Player.world_id == world_id).order_by(*ordering)
+    if limit is None and after is not None:
+        limit = PLAYER_PAGE_MAX
+    if limit is not None:
+        stmt = stmt.limit(limit + 1)
+    if after is not None:
+        values = _decode_cursor(after, order)
+        if order == "clock_power":
+            stmt = stmt.where(tuple_(Player.clock_power, Player.id) < tuple_(*values))
+        else:
+            stmt = stmt.where(Player.id > values[0])
+
+    rows = db.execute(stmt).mappings().all()
+    headers = {}
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        cursor = _encode_cursor([rows[-1][c.key] for c in key_columns])
+        next_url = request.url.include_query_params(after=cursor)
+        headers = {"X-Next-Cursor": cursor, "Link": f'<{next_url}>; rel="next"'}
+
+    if not fields:
+        response.headers.update(headers)
+        return [dict(row) for row in rows]
+    body = json.dumps([{f: row[f] for f in requested} for row in rows], default=_json_default)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+# Briefing refreshes the player's challenge cards, so it needs the writer.
 @router.get("/{player_id}/briefing", response_model=PlayerBriefing)
-def get_briefing(player_id: int, db: Session = Depends(get_db)):
+def get_briefing(player_id: int, db: Session = Depends(get_write_db)):
     player = db.query(Player).filter(Player.id == player_id).first()
     if not player:
         raise HTTPException(status_code=404, detail="Player not found")
 
-    current_tier = player.current_tier
-    current_def = get_tier(current_tier)
-    next_tier = current_tier + 1 if current_tier < 10 else None
+    # One snapshot so every tier lookup agrees across a config reload
+    table = current_table()
+    current_tier = max(0, min(player.current_tier, table.max_tier))
+    current_def = table.tiers[current_tier]
+    next_def = table.tiers[current_tier + 1] if current_tier < table.max_tier else None
 
     # Tier progress within current band
     tier_floor = current_def.min_power
-    tier_ceiling = current_def.max_power + 1 if current_tier < 10 else 1000
+    tier_ceiling = current_def.max_power + 1 if next_def is not None else table.tiers[-1].max_power
     progress_in_tier = player.clock_power - tier_floor
     tier_range = tier_ceiling - tier_floor
     tier_progress_pct = (progress_in_tier / tier_range * 100) if tier_range > 0 else 100.0
@@ -73,21 +175,43 @@ def get_briefing(player_id: int, db: Session = Depends(get_db)):
 
     return PlayerBriefing(
         player=PlayerResponse.model_validate(player),
-        tier_name=get_tier_name(current_tier),
-        tier_color=get_tier_color(current_tier),
-        next_tier_name=get_tier_name(next_tier) if next_tier is not None else None,
-        next_tier_threshold=get_tier(next_tier).min_power if next_tier is not None else None,
+        tier_name=current_def.name,
+        tier_color=current_def.color,
+        next_tier_name=next_def.name if next_def is not None else None,
+        next_tier_threshold=next_def.min_power if next_def is not None else None,
         tier_progress_pct=round(tier_progress_pct, 1),
-        mastered_skills=get_mastered_skills(current_tier),
+        mastered_skills=[t.skill for t in table.tiers if t.skill is not None and t.index <= current_tier],
         challenges=challenge_responses,
     )
 
 
+@router.get("/{player_id}/trials", response_model=PlayerTrialHistory)
+def get_player_trials(
+    player_id: int,
+    tier: int | None = Query(None, description="Only trials for this tier"),
+    limit: int = Query(100, ge=1, le=TRIAL_PAGE_MAX),
+    db: Session = Depends(get_db),
+):
+    """Per-tier attempt summary plus the player's most recent trials, newest first."""
+    if not db.query(Player.id).filter(Player.id == player_id).first():
+        raise HTTPException(status_code=404, detail="Player not found")
+    return PlayerTrialHistory(
+        player_id=player_id,
+        tiers=[
+            PlayerTierTrialSummary(tier_name=get_tier_name(row["tier"]), **row)
+            for row in player_tier_summary(db, player_id)
+        ],
+        trials=[TierTrialResponse.model_validate(t) for t in player_trials(db, player_id, tier, limit)],
+    )
+
+
 @router.delete("/{player_id}")
 def delete_player(player_id: int, db: Session = Depends(get_db)):
     player = db.query(Player).filter(Player.id == player_id).first()
     if not player:
         raise HTTPException(status_code=404, detail="Player not found")
+    # The trials go with the player (ON DELETE CASCADE); take them out of the world counters first
+    forget_player_trials(db, player.id, player.world_id)
     db.delete(player)
     db.commit()
     return {"ok": True}
@@ -1,17 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session as DbSession
+from sqlalchemy.orm.attributes import set_committed_value
 
-from ..database import get_db
+from ..database import get_db, SessionRoute
 from ..models import Player, Session
 from ..schemas import SessionCreate, SessionResponse, SessionResult, PlayerResponse, ChallengeResponse
-from ..scoring import calculate_session_points
-from ..quests import update_quest_progress, generate_quests
+from ..scoring import raw_session_points, award_session_points, AwardContentionError, AWARD_RETRY_AFTER_SECONDS
+from ..quests import update_quest_progress, generate_quests, active_quests
+from ..quest_worker import quest_worker
+from ..leaderboard_buckets import record_points
+from ..timezones import local_date, world_zone
+from ..tracing import span
 
-router = APIRouter(prefix="/api/sessions", tags=["sessions"])
+router = APIRouter(prefix="/api/sessions", tags=["sessions"], route_class=SessionRoute)
 
 
 @router.post("", response_model=SessionResult)
-def submit_session(data: SessionCreate, db: DbSession = Depends(get_db)):
+def submit_session(
+    data: SessionCreate,
+    sync: bool = Query(False, description="Recompute challenges before responding"),
+    db: DbSession = Depends(get_db),
+):
     player = db.query(Player).filter(Player.id == data.player_id).first()
     if not player:
         raise HTTPException(status_code=404, detail="Player not found")
@@ -19,15 +28,27 @@ def submit_session(data: SessionCreate, db: DbSession = Depends(get_db)):
     if data.correct > data.questions:
         raise HTTPException(status_code=400, detail="correct cannot exceed questions")
 
-    # Calculate points
-    points = calculate_session_points(
-        questions=data.questions,
-        correct=data.correct,
-        hints_used=data.hints_used,
-        max_streak=data.max_streak,
-        player_clock_power=player.clock_power,
-        player_current_tier=player.current_tier,
-    )
+    # Calculate points and apply them atomically (tier ceiling enforced in SQL)
+    old_tier = player.current_tier
+    # Pure scoring only; the award's UPDATE loop is traced as its own span
+    with span("raw_session_points"):
+        raw_points = raw_session_points(
+            questions=data.questions,
+            correct=data.correct,
+            hints_used=data.hints_used,
+            max_streak=data.max_streak,
+        )
+    try:
+        points, new_power = award_session_points(db, player.id, raw_points, player.clock_power)
+    except AwardContentionError as exc:
+        # Nothing was written; the client can resubmit the same session
+        db.rollback()
+        raise HTTPException(
+            status_code=503, detail=str(exc), headers={"Retry-After": str(AWARD_RETRY_AFTER_SECONDS)},
+        )
+    # The award bypassed the ORM; record the returned value instead of re-reading the row
+    set_committed_value(player, "clock_power", new_power)
+    record_points(db, player.id, player.world_id, points, local_date(tz=world_zone(db, player.world_id)))
 
     # Create session record
     session = Session(
@@ -43,18 +64,17 @@ def submit_session(data: SessionCreate, db: DbSession = Depends(get_db)):
         points_earned=points,
     )
     db.add(session)
-
-    # Update player clock power
-    old_tier = player.current_tier
-    player.clock_power = round(player.clock_power + points, 1)
+    # The commit's flush assigns session.id; objects are not expired on commit, so no refresh
     db.commit()
-    db.refresh(session)
-    db.refresh(player)
 
-    # Update challenge progress
-    challenges = update_quest_progress(db, player, session)
-    # Regenerate if any completed
-    challenges = generate_quests(db, player)
+    if sync or not quest_worker.submit(player.id):
+        # Update challenge progress
+        challenges = update_quest_progress(db, player, session)
+        # Regenerate if any completed
+        challenges = generate_quests(db, player)
+    else:
+        # Recomputed in the background; respond with the last known cards
+        challenges = active_quests(db, player.id)
 
     challenge_responses = [
         ChallengeResponse(
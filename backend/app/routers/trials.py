@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session as DbSession
 
-from ..database import get_db
+from ..database import get_db, SessionRoute
 from ..models import Player, TierTrial
 from ..schemas import (
     TierTrialConfig,
@@ -11,8 +11,9 @@ from ..schemas import (
     PlayerResponse,
 )
 from ..tiers import get_trial_config, validate_trial, get_tier_name, get_tier
+from ..trial_stats import prior_attempts, record_trial
 
-router = APIRouter(prefix="/api/trials", tags=["trials"])
+router = APIRouter(prefix="/api/trials", tags=["trials"], route_class=SessionRoute)
 
 
 @router.get("/config/{tier}", response_model=TierTrialConfig)
@@ -59,6 +60,9 @@ def submit_trial(data: TierTrialSubmit, db: DbSession = Depends(get_db)):
         time_ms=data.time_ms,
     )
     db.add(trial)
+    # World counters for GET /api/worlds/{id}/trials, in the same transaction
+    attempted_before, passed_before = prior_attempts(db, player.id, data.tier)
+    record_trial(db, player.world_id, trial, first_attempt=not attempted_before, first_pass=not passed_before)
 
     # If passed, unlock tier
     if passed:
@@ -69,8 +73,6 @@ def submit_trial(data: TierTrialSubmit, db: DbSession = Depends(get_db)):
         message = f"Not quite! You needed {config['min_correct']}/{config['questions']} correct. Keep practising!"
 
     db.commit()
-    db.refresh(trial)
-    db.refresh(player)
 
     return TierTrialResult(
         trial=TierTrialResponse.model_validate(trial),
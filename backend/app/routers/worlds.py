@@ -1,15 +1,35 @@
 import hashlib
+import tempfile
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from ..database import get_db
+from ..database import get_db, SessionRoute
 from ..models import World, Player
-from ..schemas import WorldCreate, WorldResponse
+from ..config import settings
+from ..schemas import (
+    WorldCreate,
+    WorldResponse,
+    WorldAnalytics,
+    WorldImportResult,
+    PlayerResponse,
+    WorldTierTrialSummary,
+)
 from ..join_codes import generate_join_code, normalize_join_code
+from ..analytics import world_analytics
+from ..world_transfer import export_world, WorldImporter, WorldImportError
+from ..roster import parse_roster, bulk_create_players, RosterError
+from ..timezones import zone, TimeZoneError
+from ..tiers import get_tier_name
+from ..trial_stats import world_tier_summary
 
-router = APIRouter(prefix="/api/worlds", tags=["worlds"])
+router = APIRouter(prefix="/api/worlds", tags=["worlds"], route_class=SessionRoute)
+
+# Import bodies up to this size are spooled in memory, larger ones to disk
+IMPORT_SPOOL_MEMORY_BYTES = 8 * 1024 * 1024
 
 
 @router.post("", response_model=WorldResponse)
@@ -23,7 +43,14 @@ def create_world(data: WorldCreate, db: Session = Depends(get_db)):
     if data.pin:
         pin_hash = hashlib.sha256(data.pin.encode()).hexdigest()
 
-    world = World(name=data.name, join_code=join_code, pin_hash=pin_hash)
+    time_zone = data.time_zone or None
+    if time_zone:
+        try:
+            zone(time_zone)
+        except TimeZoneError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+
+    world = World(name=data.name, join_code=join_code, pin_hash=pin_hash, time_zone=time_zone)
     db.add(world)
     db.commit()
     db.refresh(world)
@@ -32,11 +59,56 @@ def create_world(data: WorldCreate, db: Session = Depends(get_db)):
         id=world.id,
         name=world.name,
         join_code=world.join_code,
+        time_zone=world.time_zone,
         created_at=world.created_at,
         player_count=0,
     )
 
 
+@router.post("/import", response_model=WorldImportResult)
+async def import_world(request: Request, db: Session = Depends(get_db)):
+    """Import an NDJSON world export as a new world.
+
+    The body is spooled to a temporary file before the database is touched,
+    so a slow upload never holds the single writer connection. The import
+    then runs in one threadpool call and commits or rolls back as a whole.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_MEMORY_BYTES) as body:
+        async for chunk in request.stream():
+            body.write(chunk)
+        body.seek(0)
+
+        def run_import():
+            importer = WorldImporter(db)
+            try:
+                for line in body:
+                    importer.feed_line(line)
+                counts = importer.finish()
+                db.commit()
+            except WorldImportError:
+                db.rollback()
+                raise
+            return importer.world_id, counts
+
+        try:
+            world_id, counts = await run_in_threadpool(run_import)
+        except WorldImportError as exc:
+            raise HTTPException(status_code=400, detail=f"Invalid world export: {exc}")
+
+    world = await run_in_threadpool(db.get, World, world_id)
+    return WorldImportResult(
+        world=WorldResponse(
+            id=world.id,
+            name=world.name,
+            join_code=world.join_code,
+            time_zone=world.time_zone,
+            created_at=world.created_at,
+            player_count=counts.get("players", 0),
+        ),
+        counts=counts,
+    )
+
+
 @router.get("/join/{join_code}", response_model=WorldResponse)
 def join_world(join_code: str, db: Session = Depends(get_db)):
     normalized = normalize_join_code(join_code)
@@ -53,6 +125,7 @@ def join_world(join_code: str, db: Session = Depends(get_db)):
         id=world.id,
         name=world.name,
         join_code=world.join_code,
+        time_zone=world.time_zone,
         created_at=world.created_at,
         player_count=player_count,
     )
@@ -70,11 +143,88 @@ def get_world(world_id: int, db: Session = Depends(get_db)):
         id=world.id,
         name=world.name,
         join_code=world.join_code,
+        time_zone=world.time_zone,
         created_at=world.created_at,
         player_count=player_count,
     )
 
 
+@router.post("/{world_id}/players/bulk", response_model=list[PlayerResponse])
+async def bulk_create_world_players(world_id: int, request: Request, db: Session = Depends(get_db)):
+    """Create a whole class roster in one transaction.
+
+    Body is CSV (nickname in the first column, optional header) or, with a
+    JSON content type, a list of nicknames. Players are returned in order.
+    """
+    try:
+        nicknames = parse_roster(
+            await request.body(), request.headers.get("content-type", ""), settings.bulk_roster_max_players
+        )
+    except RosterError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid roster: {exc}")
+
+    def create():
+        if not db.query(World.id).filter(World.id == world_id).first():
+            return None
+        rows = bulk_create_players(db, world_id, nicknames)
+        db.commit()
+        return rows
+
+    rows = await run_in_threadpool(create)
+    if rows is None:
+        raise HTTPException(status_code=404, detail="World not found")
+    return [PlayerResponse.model_validate(row) for row in rows]
+
+
+@router.get("/{world_id}/analytics", response_model=WorldAnalytics)
+def get_world_analytics(world_id: int, db: Session = Depends(get_db)):
+    world = db.query(World).filter(World.id == world_id).first()
+    if not world:
+        raise HTTPException(status_code=404, detail="World not found")
+    return world_analytics(db, world.id)
+
+
+@router.get("/{world_id}/trials", response_model=list[WorldTierTrialSummary])
+def get_world_trial_summary(world_id: int, db: Session = Depends(get_db)):
+    """Attempts and pass rates per tier, read from the world's trial counters."""
+    if not db.query(World.id).filter(World.id == world_id).first():
+        raise HTTPException(status_code=404, detail="World not found")
+    return [
+        WorldTierTrialSummary(
+            tier=row.tier,
+            tier_name=get_tier_name(row.tier),
+            attempts=row.attempts,
+            passes=row.passes,
+            pass_rate_pct=round(row.passes / row.attempts * 100, 1),
+            players_attempted=row.players_attempted,
+            players_passed=row.players_passed,
+            accuracy_pct=round(row.correct / row.questions * 100, 1) if row.questions else 0.0,
+        )
+        for row in world_tier_summary(db, world_id)
+    ]
+
+
+@router.get("/{world_id}/export")
+def export_world_ndjson(world_id: int, db: Session = Depends(get_db)):
+    world = db.query(World).filter(World.id == world_id).first()
+    if not world:
+        raise HTTPException(status_code=404, detail="World not found")
+
+    def stream():
+        # Own session: the request-scoped one is closed once the handler returns.
+        export_db = Session(bind=db.get_bind())
+        try:
+            yield from export_world(export_db, world_id)
+        finally:
+            export_db.close()
+
+    return StreamingResponse(
+        stream(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="world-{world_id}.ndjson"'},
+    )
+
+
 @router.delete("/{world_id}")
 def delete_world(world_id: int, db: Session = Depends(get_db)):
     world = db.query(World).filter(World.id == world_id).first()
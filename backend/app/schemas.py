@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import date, datetime
 from pydantic import BaseModel, Field
 
 
@@ -7,12 +7,15 @@ from pydantic import BaseModel, Field
 class WorldCreate(BaseModel):
     name: str = Field(..., min_length=1, max_length=100)
     pin: str | None = None
+    # IANA zone name, e.g. "Australia/Perth"; defaults to the server's calendar
+    time_zone: str | None = Field(None, max_length=64)
 
 
 class WorldResponse(BaseModel):
     id: int
     name: str
     join_code: str
+    time_zone: str | None = None
     created_at: datetime
     player_count: int = 0
 
@@ -20,6 +23,11 @@ class WorldResponse(BaseModel):
         from_attributes = True
 
 
+class WorldImportResult(BaseModel):
+    world: WorldResponse
+    counts: dict[str, int]
+
+
 # --- Player ---
 
 class PlayerCreate(BaseModel):
@@ -136,6 +144,33 @@ class TierTrialResult(BaseModel):
     message: str
 
 
+class PlayerTierTrialSummary(BaseModel):
+    tier: int
+    tier_name: str
+    attempts: int
+    passes: int
+    best_correct: int
+    first_attempt_at: datetime
+    last_attempt_at: datetime
+
+
+class PlayerTrialHistory(BaseModel):
+    player_id: int
+    tiers: list[PlayerTierTrialSummary]
+    trials: list[TierTrialResponse]
+
+
+class WorldTierTrialSummary(BaseModel):
+    tier: int
+    tier_name: str
+    attempts: int
+    passes: int
+    pass_rate_pct: float
+    players_attempted: int
+    players_passed: int
+    accuracy_pct: float
+
+
 # --- Quest ---
 
 class ChallengeResponse(BaseModel):
@@ -186,8 +221,62 @@ class LeaderboardEntry(BaseModel):
     current_tier: int
     tier_name: str
     weekly_gain: float = 0.0
+    period_points: float | None = None  # points in the requested calendar period
 
 
 class LeaderboardResponse(BaseModel):
     scope: str
+    period: str = "all"
     entries: list[LeaderboardEntry]
+
+
+class StreakLeaderboardEntry(BaseModel):
+    rank: int
+    player_id: int
+    nickname: str
+    current_tier: int
+    tier_name: str
+    streak_days: int
+
+
+class StreakLeaderboardResponse(BaseModel):
+    scope: str
+    entries: list[StreakLeaderboardEntry]
+
+
+# --- Analytics ---
+
+class AccuracyBucket(BaseModel):
+    mode: str
+    difficulty: str
+    sessions: int
+    questions: int
+    correct: int
+    accuracy_pct: float
+    hints_per_question: float
+
+
+class ResponseTimePoint(BaseModel):
+    day: date
+    sessions: int
+    avg_response_ms: float
+
+
+class PlayerAnalytics(BaseModel):
+    player_id: int
+    nickname: str
+    sessions: int
+    questions: int
+    correct: int
+    accuracy_pct: float
+    hints_used: int
+    hints_per_question: float
+    avg_response_ms: float | None
+
+
+class WorldAnalytics(BaseModel):
+    world_id: int
+    total_sessions: int
+    accuracy_by_mode_difficulty: list[AccuracyBucket]
+    response_time_trend: list[ResponseTimePoint]
+    players: list[PlayerAnalytics]
@@ -6,23 +6,32 @@ Simple point system:
   - +5 bonus for getting 5+ in a row (streak bonus)
   - +5 bonus for a perfect run (all correct, no hints)
   - Tier ceiling still enforced
+
+``raw_session_points`` is the pure part. The tier ceiling is applied once, in
+SQL, by ``award_session_points``: it reads the player's own ``current_tier``
+in the same UPDATE, so concurrent submits for the same player can never lose
+an update or overshoot. An award that keeps losing the race raises
+``AwardContentionError``, which the API turns into a retryable 503.
 """
 
-from .tiers import get_tier_ceiling
+from sqlalchemy import case, func, select, update
+from sqlalchemy.orm import Session as DbSession
 
+from .models import Player
+from .tiers import current_table
+from .tracing import traced
 
-def calculate_session_points(
-    questions: int,
-    correct: int,
-    hints_used: int,
-    max_streak: int,
-    player_clock_power: float,
-    player_current_tier: int,
-) -> float:
-    """Calculate Clock Power points earned from a session.
+AWARD_MAX_ATTEMPTS = 20
+# Seconds a client should wait before resubmitting after AwardContentionError
+AWARD_RETRY_AFTER_SECONDS = 1
 
-    Returns the points to add to the player's clock_power (0 or positive).
-    """
+
+class AwardContentionError(RuntimeError):
+    """Raised when other writers kept changing a player's clock power; safe to retry."""
+
+
+def raw_session_points(questions: int, correct: int, hints_used: int, max_streak: int) -> float:
+    """Points a session is worth before the tier ceiling is applied."""
     if questions == 0:
         return 0.0
 
@@ -37,9 +46,51 @@ def calculate_session_points(
     if correct == questions and hints_used == 0:
         raw += 5.0
 
-    # Tier ceiling: cannot exceed the tier's max power threshold
-    max_power = get_tier_ceiling(player_current_tier)
-    new_power = min(player_clock_power + raw, max_power)
-    points = max(0.0, new_power - player_clock_power)
+    return raw
+
+
+def tier_ceiling_sql(tier_column):
+    """SQL expression equivalent to ``get_tier_ceiling(tier_column)``.
 
-    return round(points, 1)
+    Built from one snapshot of the active tier table, so a reload between
+    calls is picked up and never mixed within one expression.
+    """
+    table = current_table()
+    return case(
+        {t.index: table.ceilings[t.index] for t in table.tiers},
+        value=tier_column,
+        else_=case((tier_column > table.max_tier, table.ceilings[-1]), else_=table.ceilings[0]),
+    )
+
+
+@traced()
+def award_session_points(db: DbSession, player_id: int, raw_points: float, seen_power: float) -> tuple[float, float]:
+    """Atomically add ``raw_points`` to a player's clock power, capped by tier.
+
+    Issues ``UPDATE ... WHERE clock_power = :seen RETURNING clock_power`` with
+    the ceiling computed in SQL from the row's own ``current_tier``. If
+    another writer changed the row since ``seen_power`` was read, nothing is
+    updated and we re-read and retry, so the awarded points are always exactly
+    ``new - old`` and no increment is lost. Runs inside the caller's
+    transaction; returns ``(points_awarded, new_clock_power)``. Raises
+    ``AwardContentionError`` after ``AWARD_MAX_ATTEMPTS`` lost races.
+
+    A NULL ``clock_power`` (rows written outside the ORM) counts as 0.0, both
+    in the comparison and in ``seen_power``.
+    """
+    power = func.coalesce(Player.clock_power, 0.0)
+    if seen_power is None:
+        seen_power = 0.0
+    for _ in range(AWARD_MAX_ATTEMPTS):
+        capped = func.min(power + raw_points, tier_ceiling_sql(Player.current_tier))
+        new_power = db.execute(
+            update(Player)
+            .where(Player.id == player_id, power == seen_power)
+            .values(clock_power=func.round(func.max(power, capped), 1))
+            .returning(Player.clock_power)
+            .execution_options(synchronize_session=False)
+        ).scalar_one_or_none()
+        if new_power is not None:
+            return round(max(0.0, new_power - seen_power), 1), new_power
+        seen_power = db.execute(select(power).where(Player.id == player_id)).scalar_one()
+    raise AwardContentionError(f"Could not update clock power for player {player_id}: too much contention")
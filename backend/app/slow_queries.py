@@ -0,0 +1,218 @@
+"""Slow-query log.
+
+``SlowQueryLog.install`` hooks ``before_cursor_execute`` and
+``after_cursor_execute`` on the app's engines. A statement that takes at least
+``slow_query_threshold_ms`` is logged as one JSON line with:
+- its duration;
+- its parameters (truncated);
+- the route that ran it (see request_context.py);
+- a fingerprint of the normalized statement;
+- the ``EXPLAIN QUERY PLAN`` output, captured on the same connection right
+  after the slow statement.
+
+Fast statements cost two ``perf_counter`` calls. Records go through a
+``QueueHandler``, and a ``QueueListener`` thread writes them to a
+``RotatingFileHandler``, so request threads never wait on file I/O.
+
+Run from backend/:
+    python -m app.slow_queries [LOG] [--top N] [--sort total|count|max]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import logging.handlers
+import queue
+import re
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import event
+
+from .config import settings
+from .request_context import route_label
+
+logger = logging.getLogger("clockquest.slow_sql")
+
+MAX_PARAM_CHARS = 500
+# Statements EXPLAIN QUERY PLAN can describe
+_EXPLAINABLE = ("select", "insert", "update", "delete", "with", "replace")
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"\?|:\w+|__\[POSTCOMPILE_\w+\]")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+def normalize(statement: str) -> str:
+    """Statement with literals and placeholders replaced and value lists collapsed."""
+    text = _STRING.sub("?", statement)
+    text = _NUMBER.sub("?", text)
+    text = _PLACEHOLDER.sub("?", text)
+    text = _VALUE_LIST.sub("(?...)", text)
+    return _SPACE.sub(" ", text).strip()
+
+
+def fingerprint(statement: str) -> str:
+    return hashlib.sha1(normalize(statement).encode()).hexdigest()[:12]
+
+
+def _explain(cursor, statement: str, parameters) -> list[str]:
+    if not statement.lstrip().lower().startswith(_EXPLAINABLE):
+        return []
+    if isinstance(parameters, list):  # executemany: plan the first row
+        parameters = parameters[0] if parameters else ()
+    plan_cursor = cursor.connection.cursor()
+    try:
+        rows = plan_cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ()).fetchall()
+    except Exception as exc:
+        return [f"(no plan: {exc})"]
+    finally:
+        plan_cursor.close()
+    depth = {0: -1}
+    lines = []
+    for node, parent, _unused, detail in rows:
+        depth[node] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node] + detail)
+    return lines
+
+
+class SlowQueryLog:
+    """Logs statements slower than ``threshold_ms`` to a rotating JSON-lines file."""
+
+    def __init__(self, path: str, threshold_ms: float, max_bytes: int, backup_count: int):
+        self.path = path
+        self.threshold = threshold_ms / 1000
+        self.engines = []
+        file_handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True,
+        )
+        file_handler.setFormatter(logging.Formatter("%(message)s"))
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._handler = logging.handlers.QueueHandler(self._queue)
+        self._listener = logging.handlers.QueueListener(self._queue, file_handler)
+
+    def install(self, *engines) -> "SlowQueryLog":
+        for target in dict.fromkeys(engines):  # the same engine may be passed twice
+            event.listen(target, "before_cursor_execute", self._before)
+            event.listen(target, "after_cursor_execute", self._after)
+            self.engines.append(target)
+        logger.addHandler(self._handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        self._listener.start()
+        return self
+
+    def uninstall(self) -> None:
+        for target in self.engines:
+            event.remove(target, "before_cursor_execute", self._before)
+            event.remove(target, "after_cursor_execute", self._after)
+        self.engines = []
+        logger.removeHandler(self._handler)
+        self._listener.stop()  # flushes queued records
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info["slow_query_started"] = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info.pop("slow_query_started", time.perf_counter())
+        if elapsed < self.threshold:
+            return
+        logger.info(json.dumps({
+            "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "ms": round(elapsed * 1000, 2),
+            "route": route_label(),
+            "fingerprint": fingerprint(statement),
+            "statement": statement,
+            "params": repr(parameters)[:MAX_PARAM_CHARS],
+            "executemany": executemany,
+            "plan": _explain(cursor, statement, parameters),
+        }))
+
+
+def install_from_settings(*engines) -> SlowQueryLog | None:
+    if not settings.slow_query_log_path:
+        return None
+    return SlowQueryLog(
+        settings.slow_query_log_path,
+        settings.slow_query_threshold_ms,
+        settings.slow_query_log_max_bytes,
+        settings.slow_query_log_backups,
+    ).install(*engines)
+
+
+def read_entries(path: Path):
+    """Entries from ``path`` and its rotated files (``path.1``, ``path.2``, ...)."""
+    rotated = [p for p in path.parent.glob(path.name + ".*") if p.suffix[1:].isdigit()]
+    # Oldest first: path.N ... path.1, then the live file
+    for file in [*sorted(rotated, key=lambda p: -int(p.suffix[1:])), path]:
+        if not file.exists():
+            continue
+        with open(file, encoding="utf-8") as lines:
+            for line in lines:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def summarize(entries) -> list[dict]:
+    """Group entries by fingerprint: count, total/max/p50 ms, routes and the slowest example."""
+    groups: dict[str, dict] = {}
+    for entry in entries:
+        group = groups.get(entry["fingerprint"])
+        if group is None:
+            group = groups[entry["fingerprint"]] = {
+                "fingerprint": entry["fingerprint"], "statement": normalize(entry["statement"]),
+                "durations": [], "routes": defaultdict(int), "slowest": entry,
+            }
+        group["durations"].append(entry["ms"])
+        group["routes"][entry.get("route") or "(no request)"] += 1
+        if entry["ms"] > group["slowest"]["ms"]:
+            group["slowest"] = entry
+    summary = []
+    for group in groups.values():
+        durations = sorted(group.pop("durations"))
+        summary.append({
+            **group,
+            "count": len(durations),
+            "total_ms": round(sum(durations), 2),
+            "max_ms": durations[-1],
+            "p50_ms": durations[(len(durations) - 1) // 2],
+            "routes": dict(group["routes"]),
+        })
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Summarize the slow-query log by statement fingerprint.")
+    parser.add_argument("log", nargs="?", default=settings.slow_query_log_path, help="log file (rotations included)")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--sort", choices=["total", "count", "max"], default="total")
+    args = parser.parse_args()
+    if not args.log:
+        raise SystemExit("No log file given and CLOCKQUEST_SLOW_QUERY_LOG_PATH is not set")
+
+    key = {"total": "total_ms", "count": "count", "max": "max_ms"}[args.sort]
+    summary = sorted(summarize(read_entries(Path(args.log))), key=lambda g: g[key], reverse=True)
+    for group in summary[:args.top]:
+        print(
+            f"{group['fingerprint']}  {group['count']:>6}x  total {group['total_ms']:>10.1f}ms  "
+            f"p50 {group['p50_ms']:>8.1f}ms  max {group['max_ms']:>8.1f}ms"
+        )
+        print(f"    {group['statement'][:300]}")
+        routes = ", ".join(f"{route} ({n})" for route, n in sorted(group["routes"].items(), key=lambda r: -r[1]))
+        print(f"    routes: {routes}")
+        for line in group["slowest"]["plan"]:
+            print(f"    | {line}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
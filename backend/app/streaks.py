@@ -0,0 +1,179 @@
+"""Persisted current-streak values for the streak leaderboard.
+
+``players.streak_days`` / ``players.streak_through`` hold each player's
+current streak and the last local day it counts through. They are refreshed
+whenever a quest run is recorded and reset by ``decay_streaks`` once a day
+has passed without the streak being extended, so a streak leaderboard is a
+top-K read off ``ix_players_world_streak`` / ``ix_players_streak`` however
+many players there are.
+
+A streak through yesterday is still live ('today pending', as on the
+challenge card); one through the day before is lapsed. "Yesterday" is in the
+player's world calendar, so decay runs after each midnight of every calendar
+in use and resets one calendar's worlds at a time. Readers also filter on
+``streak_through`` so rankings stay right even if the decay job is late.
+
+Run from backend/:
+    python -m app.streaks [--decay] [--rebuild]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session as DbSession
+
+from .models import Player, World
+from .quests import current_streak, current_streaks
+from .timezones import DEFAULT_TZ, local_date, world_zone, zone, zone_groups
+
+logger = logging.getLogger(__name__)
+
+# Run just after midnight so the new local day has definitely begun.
+DECAY_DELAY_SECONDS = 5
+
+
+def refresh_player_streak(db: DbSession, player: Player, today: date | None = None) -> int:
+    """Recompute ``player``'s streak from their quest runs (flushed rows only)."""
+    if today is None:
+        today = local_date(tz=world_zone(db, player.world_id))
+    player.streak_days, player.streak_through = current_streak(db, player.id, today)
+    return player.streak_days
+
+
+def decay_streaks(db: DbSession, today: date | None = None) -> int:
+    """Zero every streak not extended through yesterday. Returns rows reset.
+
+    Without ``today``, each calendar's worlds are decayed against their own
+    local yesterday.
+    """
+    if today is not None:
+        cutoffs = [(today - timedelta(days=1), None)]
+    else:
+        cutoffs = [(local_date(tz=tz) - timedelta(days=1), worlds) for tz, worlds in zone_groups(db)]
+    reset = 0
+    for yesterday, worlds in cutoffs:
+        stmt = (
+            update(Player)
+            .where(Player.streak_days > 0, Player.streak_through < yesterday)
+            .values(streak_days=0, streak_through=None)
+            .execution_options(synchronize_session=False)
+        )
+        if worlds is not None:
+            stmt = stmt.where(Player.world_id.in_(worlds))
+        reset += db.execute(stmt).rowcount
+    db.commit()
+    return reset
+
+
+def rebuild_streaks(db: DbSession, today: date | None = None, world_id: int | None = None) -> int:
+    """Recompute stored streaks (for one world, or everyone) from quest-run history.
+
+    One gaps-and-islands query per world finds every current streak; everyone
+    else is reset to zero. Returns the number of players with a streak.
+    """
+    worlds = select(World.id, World.time_zone)
+    if world_id is not None:
+        worlds = worlds.where(World.id == world_id)
+    streaks = {}
+    for wid, tz_name in db.execute(worlds).all():
+        streaks.update(current_streaks(db, today or local_date(tz=zone(tz_name)), world_id=wid))
+    reset = update(Player).values(streak_days=0, streak_through=None).execution_options(synchronize_session=False)
+    if world_id is not None:
+        reset = reset.where(Player.world_id == world_id)
+    db.execute(reset)
+    if streaks:
+        players = Player.__table__
+        db.execute(
+            update(players)
+            .where(players.c.id == bindparam("b_id"))
+            .values(streak_days=bindparam("b_days"), streak_through=bindparam("b_through")),
+            [{"b_id": pid, "b_days": days, "b_through": through} for pid, (days, through) in streaks.items()],
+        )
+    db.commit()
+    return len(streaks)
+
+
+def top_streaks(db: DbSession, world_id: int | None = None, limit: int = 100, today: date | None = None):
+    """Players with the longest live streaks, longest first.
+
+    Across worlds, 'live' is judged against the calendar that is furthest
+    behind; the decay job trims the rest.
+    """
+    if today is None:
+        if world_id is not None:
+            today = local_date(tz=world_zone(db, world_id))
+        else:
+            today = min(local_date(tz=tz) for tz, _ in zone_groups(db))
+    yesterday = today - timedelta(days=1)
+    stmt = (
+        select(Player)
+        .where(Player.streak_days > 0, Player.streak_through >= yesterday)
+        .order_by(Player.streak_days.desc(), Player.id.desc())
+        .limit(limit)
+    )
+    if world_id is not None:
+        stmt = stmt.where(Player.world_id == world_id)
+    return db.execute(stmt).scalars().all()
+
+
+def seconds_until_next_decay(now: datetime | None = None, zones: list[ZoneInfo] | None = None) -> float:
+    """Seconds until just after the next local midnight in any of ``zones``."""
+    now = now or datetime.now(timezone.utc)
+    waits = []
+    for tz in zones or [DEFAULT_TZ]:
+        local_now = now.astimezone(tz)
+        midnight = datetime.combine(local_now.date() + timedelta(days=1), datetime.min.time(), tzinfo=tz)
+        waits.append((midnight - local_now).total_seconds())
+    return min(waits) + DECAY_DELAY_SECONDS
+
+
+async def run_decay_forever(session_factory) -> None:
+    """Background task: decay streaks after every local midnight of every world calendar."""
+    def in_session(fn):
+        db = session_factory()
+        try:
+            return fn(db)
+        finally:
+            db.close()
+
+    def decay() -> int:
+        return in_session(decay_streaks)
+
+    def zones() -> list[ZoneInfo]:
+        return in_session(lambda db: [tz for tz, _ in zone_groups(db)])
+
+    while True:
+        await asyncio.sleep(seconds_until_next_decay(zones=await asyncio.to_thread(zones)))
+        try:
+            reset = await asyncio.to_thread(decay)
+            logger.info("Reset %d lapsed streaks", reset)
+        except Exception:
+            logger.exception("Streak decay failed")
+
+
+def main() -> None:
+    from .database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Maintain stored player streaks.")
+    parser.add_argument("--decay", action="store_true", help="reset streaks that lapsed before yesterday")
+    parser.add_argument("--rebuild", action="store_true", help="recompute every streak from quest runs")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.rebuild:
+            print(f"Rebuilt streaks: {rebuild_streaks(db)} players have a current streak")
+        if args.decay or not args.rebuild:
+            print(f"Reset {decay_streaks(db)} lapsed streaks")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
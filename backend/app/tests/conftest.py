@@ -3,44 +3,146 @@ Shared test fixtures.
 
 All API tests use an isolated in-memory SQLite database so the real
 clockquest.db is never touched during testing.
+
+The schema is built once per test process into an in-memory template. Before
+each test the template is copied over the test database with SQLite's backup
+API, which takes well under a millisecond for an empty schema, instead of
+running drop_all/create_all every time. ``load_seed`` does the same for a
+seeded database: the seed function runs once per process and its result is
+cloned for every test that asks for it.
+
+Each pytest-xdist worker is its own process, so it gets its own template and
+test database. ``CLOCKQUEST_DATABASE_URL`` also points at a per-worker scratch
+file before the app is imported, so code that reaches the app's own engines
+never shares a file with another worker (``pytest -n auto``).
 """
-import pytest
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
-from fastapi.testclient import TestClient
+import atexit
+import os
+import shutil
+import sqlite3
+import tempfile
 
-from app.database import Base, get_db
-from app.main import app
+_scratch = tempfile.mkdtemp(prefix=f"clockquest-{os.environ.get('PYTEST_XDIST_WORKER', 'main')}-")
+atexit.register(shutil.rmtree, _scratch, ignore_errors=True)
+os.environ["CLOCKQUEST_DATABASE_URL"] = f"sqlite:///{os.path.join(_scratch, 'clockquest.db')}"
 
-# In-memory SQLite for tests — totally separate from production DB.
-# StaticPool ensures every connection shares the same in-memory database,
-# so tables created via create_all are visible to all sessions.
-_test_engine = create_engine(
-    "sqlite:///:memory:",
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
+import pytest  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app import database  # noqa: E402
+from app.database import (  # noqa: E402
+    Base, SESSION_OPTIONS, create_engines, get_db, get_read_db, get_write_db, enable_sqlite_foreign_keys,
+    raise_on_lazy_load,
 )
+from app.main import app  # noqa: E402
+from app.idempotency import idempotency_store  # noqa: E402
+from app.admission import admission_controller  # noqa: E402
+from app.quest_worker import quest_worker  # noqa: E402
+
+
+def _memory_connection() -> sqlite3.Connection:
+    return sqlite3.connect(":memory:", check_same_thread=False)
+
+
+# In-memory SQLite for tests — totally separate from production DB.
+# StaticPool ensures every session shares the one connection (and so the one
+# in-memory database) that templates are restored into.
+_test_connection = _memory_connection()
+_test_engine = create_engine("sqlite://", creator=lambda: _test_connection, poolclass=StaticPool)
+enable_sqlite_foreign_keys(_test_engine)
 _TestSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=_test_engine)
+# Route sessions behave like the app's (no expire on commit) and run in
+# strict-loading mode, so any lazy load in a router fails the test.
+_RouteSessionLocal = sessionmaker(bind=_test_engine, **SESSION_OPTIONS)
+raise_on_lazy_load(_RouteSessionLocal)
+
+# Empty schema, built once per process
+_template = _memory_connection()
+_template_engine = create_engine("sqlite://", creator=lambda: _template, poolclass=StaticPool)
+Base.metadata.create_all(bind=_template_engine)
+_seeded: dict = {}
+
+
+def _restore(template: sqlite3.Connection) -> None:
+    """Replace the test database's contents with ``template``'s."""
+    _test_connection.rollback()
+    template.backup(_test_connection)
+
+
+def load_seed(seed):
+    """Load the database ``seed()`` builds and return ``seed()``'s result.
+
+    The seed runs once per process, through the normal client/sessions,
+    starting from the empty schema. Later calls restore a copy of the seeded
+    database, so tests can change it freely.
+    """
+    if seed not in _seeded:
+        _restore(_template)
+        result = seed()
+        snapshot = _memory_connection()
+        _test_connection.backup(snapshot)
+        _seeded[seed] = (snapshot, result)
+    snapshot, result = _seeded[seed]
+    _restore(snapshot)
+    return result
 
 
 @pytest.fixture(autouse=True)
 def test_db():
-    """Create fresh tables before each test, drop after."""
-    Base.metadata.create_all(bind=_test_engine)
+    """Start every test from a fresh copy of the empty schema."""
+    _restore(_template)
     yield
-    Base.metadata.drop_all(bind=_test_engine)
+    idempotency_store.clear()
+    admission_controller.reset()
 
 
 def _override_get_db():
-    db = _TestSessionLocal()
+    db = _RouteSessionLocal()
     try:
         yield db
     finally:
         db.close()
 
 
-# Override the get_db dependency so all routes use the test DB
-app.dependency_overrides[get_db] = _override_get_db
+# Override the session dependencies so all routes use the test DB
+for _dependency in (get_db, get_read_db, get_write_db):
+    app.dependency_overrides[_dependency] = _override_get_db
+admission_controller.session_factory = _TestSessionLocal
+admission_controller.configure()
 
 client = TestClient(app)
+
+
+@pytest.fixture
+def file_app(tmp_path, monkeypatch):
+    """Serve ``client`` from a temp-file database through the real engines.
+
+    Routes get ``create_engines``' WAL writer and query_only reader pool, and
+    the app's own ``get_db`` picks between them, instead of every dependency
+    sharing the in-memory test engine. Yields the (writer, reader) session
+    factories.
+    """
+    writer, reader = create_engines(f"sqlite:///{tmp_path / 'clockquest.db'}", writer_timeout=30)
+    Base.metadata.create_all(bind=writer)
+    write_sessions = sessionmaker(bind=writer, **SESSION_OPTIONS)
+    read_sessions = sessionmaker(bind=reader, **SESSION_OPTIONS)
+    raise_on_lazy_load(write_sessions)
+    raise_on_lazy_load(read_sessions)
+
+    monkeypatch.setattr(database, "SessionLocal", write_sessions)
+    monkeypatch.setattr(database, "ReadSessionLocal", read_sessions)
+    monkeypatch.setattr(quest_worker, "session_factory", write_sessions)
+    for dependency in (get_db, get_read_db, get_write_db):
+        monkeypatch.delitem(app.dependency_overrides, dependency)
+    admission_controller.session_factory = read_sessions
+    admission_controller.configure()
+    try:
+        yield write_sessions, read_sessions
+    finally:
+        admission_controller.session_factory = _TestSessionLocal
+        admission_controller.configure()
+        writer.dispose()
+        reader.dispose()
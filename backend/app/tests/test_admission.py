@@ -0,0 +1,109 @@
+import pytest
+
+from app.admission import RateLimiter, admission_controller
+from app.config import settings
+from .conftest import client
+
+
+@pytest.fixture
+def tight_limits():
+    admission_controller.configure(player_rate=0.01, player_burst=2, world_rate=0.01, world_burst=3)
+    yield
+    admission_controller.configure()
+
+
+def _session(player_id):
+    return client.post("/api/sessions", json={
+        "player_id": player_id, "mode": "read", "difficulty": "hour", "questions": 5, "correct": 5,
+    })
+
+
+def test_token_bucket_refills_over_time():
+    now = [0.0]
+    limiter = RateLimiter(rate_per_second=1.0, burst=2, clock=lambda: now[0])
+    assert limiter.acquire("k") == 0
+    assert limiter.acquire("k") == 0
+    assert limiter.acquire("k") == pytest.approx(1.0)
+    now[0] = 1.0
+    assert limiter.acquire("k") == 0
+
+
+def test_idle_buckets_are_evicted():
+    now = [0.0]
+    limiter = RateLimiter(rate_per_second=1.0, burst=2, clock=lambda: now[0])
+    limiter.acquire("a")
+    limiter.acquire("b")
+    now[0] = 10.0
+    limiter.acquire("c")
+    assert len(limiter) == 1
+
+
+def test_player_limit_returns_429_with_retry_after(tight_limits):
+    w = client.post("/api/worlds", json={"name": "W"}).json()
+    p = client.post("/api/players", json={"nickname": "Spam", "world_id": w["id"]}).json()
+    admission_controller.reset()
+
+    assert _session(p["id"]).status_code == 200
+    assert _session(p["id"]).status_code == 200
+    r = _session(p["id"])
+    assert r.status_code == 429
+    assert int(r.headers["retry-after"]) >= 1
+
+
+def test_429_carries_cors_headers_for_the_browser(tight_limits):
+    w = client.post("/api/worlds", json={"name": "W"}).json()
+    p = client.post("/api/players", json={"nickname": "Spam", "world_id": w["id"]}).json()
+    admission_controller.reset()
+    origin = settings.cors_origins[0]
+
+    for _ in range(2):
+        _session(p["id"])
+    r = client.post("/api/sessions", headers={"Origin": origin}, json={
+        "player_id": p["id"], "mode": "read", "difficulty": "hour", "questions": 5, "correct": 5,
+    })
+    assert r.status_code == 429
+    assert r.headers["access-control-allow-origin"] == origin
+    assert "retry-after" in r.headers["access-control-expose-headers"].lower()
+
+
+def test_world_limit_covers_all_players_in_world(tight_limits):
+    w = client.post("/api/worlds", json={"name": "W"}).json()
+    players = [
+        client.post("/api/players", json={"nickname": f"K{i}", "world_id": w["id"]}).json() for i in range(2)
+    ]
+    admission_controller.reset()
+
+    assert _session(players[0]["id"]).status_code == 200
+    assert _session(players[1]["id"]).status_code == 200
+    assert _session(players[0]["id"]).status_code == 200
+    assert _session(players[1]["id"]).status_code == 429
+
+
+def test_reads_are_not_limited(tight_limits):
+    w = client.post("/api/worlds", json={"name": "W"}).json()
+    for _ in range(10):
+        assert client.get(f"/api/worlds/{w['id']}").status_code == 200
+
+
+def test_body_world_id_cannot_move_a_player_to_another_world_bucket(tight_limits):
+    home = client.post("/api/worlds", json={"name": "Home"}).json()
+    other = client.post("/api/worlds", json={"name": "Other"}).json()
+    players = [
+        client.post("/api/players", json={"nickname": f"K{i}", "world_id": home["id"]}).json() for i in range(2)
+    ]
+    victim = client.post("/api/players", json={"nickname": "V", "world_id": other["id"]}).json()
+    admission_controller.reset()
+
+    def spoofed(player_id):
+        return client.post("/api/sessions", json={
+            "player_id": player_id, "world_id": other["id"],
+            "mode": "read", "difficulty": "hour", "questions": 5, "correct": 5,
+        })
+
+    # Charged to Home (burst 3) whatever world the body names
+    assert spoofed(players[0]["id"]).status_code == 200
+    assert spoofed(players[1]["id"]).status_code == 200
+    assert spoofed(players[0]["id"]).status_code == 200
+    assert spoofed(players[1]["id"]).status_code == 429
+    # Other's bucket was never touched
+    assert all(_session(victim["id"]).status_code == 200 for _ in range(2))
@@ -0,0 +1,87 @@
+from app.models import Session
+from .conftest import client, _TestSessionLocal
+
+
+def _session(player_id, **overrides):
+    body = {
+        "player_id": player_id,
+        "mode": "read",
+        "difficulty": "hour",
+        "questions": 10,
+        "correct": 8,
+        "hints_used": 1,
+        "avg_response_ms": 2000,
+    }
+    body.update(overrides)
+    return client.post("/api/sessions", json=body)
+
+
+def test_analytics_world_not_found():
+    r = client.get("/api/worlds/999/analytics")
+    assert r.status_code == 404
+
+
+def test_analytics_empty_world():
+    w = client.post("/api/worlds", json={"name": "W"}).json()
+    client.post("/api/players", json={"nickname": "Idle", "world_id": w["id"]})
+
+    data = client.get(f"/api/worlds/{w['id']}/analytics").json()
+    assert data["total_sessions"] == 0
+    assert data["accuracy_by_mode_difficulty"] == []
+    assert data["response_time_trend"] == []
+    assert data["players"][0]["sessions"] == 0
+    assert data["players"][0]["avg_response_ms"] is None
+
+
+def test_analytics_groups_by_mode_difficulty_and_player():
+    w = client.post("/api/worlds", json={"name": "W"}).json()
+    other = client.post("/api/worlds", json={"name": "Other"}).json()
+    a = client.post("/api/players", json={"nickname": "A", "world_id": w["id"]}).json()
+    b = client.post("/api/players", json={"nickname": "B", "world_id": w["id"]}).json()
+    c = client.post("/api/players", json={"nickname": "C", "world_id": other["id"]}).json()
+
+    _session(a["id"], correct=10, hints_used=0, avg_response_ms=1000)
+    _session(a["id"], correct=6, hints_used=2, avg_response_ms=3000)
+    _session(b["id"], mode="set", difficulty="half", questions=5, correct=5, hints_used=0, avg_response_ms=None)
+    _session(c["id"])  # different world, must be excluded
+
+    data = client.get(f"/api/worlds/{w['id']}/analytics").json()
+    assert data["total_sessions"] == 3
+
+    buckets = {(x["mode"], x["difficulty"]): x for x in data["accuracy_by_mode_difficulty"]}
+    assert set(buckets) == {("read", "hour"), ("set", "half")}
+    assert buckets[("read", "hour")]["sessions"] == 2
+    assert buckets[("read", "hour")]["accuracy_pct"] == 80.0
+    assert buckets[("read", "hour")]["hints_per_question"] == 0.1
+    assert buckets[("set", "half")]["accuracy_pct"] == 100.0
+
+    players = {p["nickname"]: p for p in data["players"]}
+    assert players["A"]["sessions"] == 2
+    assert players["A"]["hints_used"] == 2
+    assert players["A"]["avg_response_ms"] == 2000.0
+    assert players["B"]["avg_response_ms"] is None
+
+    trend = data["response_time_trend"]
+    assert len(trend) == 1
+    assert trend[0]["sessions"] == 2
+
+
+def test_sessions_without_a_timestamp_are_left_out_of_the_trend():
+    w = client.post("/api/worlds", json={"name": "W"}).json()
+    a = client.post("/api/players", json={"nickname": "A", "world_id": w["id"]}).json()
+    _session(a["id"], avg_response_ms=1000)
+    _session(a["id"], avg_response_ms=3000)
+    db = _TestSessionLocal()
+    try:
+        first = db.query(Session).filter(Session.player_id == a["id"]).order_by(Session.id).first()
+        first.created_at = None
+        db.commit()
+    finally:
+        db.close()
+
+    r = client.get(f"/api/worlds/{w['id']}/analytics")
+    assert r.status_code == 200
+    data = r.json()
+    assert data["total_sessions"] == 2
+    assert [(p["sessions"], p["avg_response_ms"]) for p in data["response_time_trend"]] == [(1, 3000.0)]
+    assert data["players"][0]["avg_response_ms"] == 2000.0
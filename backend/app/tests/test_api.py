@@ -1,7 +1,22 @@
-from datetime import datetime, timedelta, timezone
-
-from app.models import Quest
-from .conftest import client, _TestSessionLocal
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import lazyload
+
+from app.leaderboard_buckets import record_points
+from app.models import Player, Session, Quest, QuestRun, TierTrial
+from app.quests import current_streaks, daily_minutes_query
+from app.streaks import decay_streaks
+from app.timezones import DEFAULT_TZ, local_date
+from app.config import settings
+from app.database import LazyLoadError, engine
+from .conftest import client, _TestSessionLocal, _RouteSessionLocal, _test_engine
 
 
 def test_health():
@@ -147,6 +162,42 @@ def test_delete_world_cascades():
     assert len(r2.json()) == 0
 
 
+def test_delete_world_cascades_in_database():
+    w = client.post("/api/worlds", json={"name": "W"}).json()
+    p = client.post("/api/players", json={"nickname": "A", "world_id": w["id"]}).json()
+    client.post("/api/sessions", json={
+        "player_id": p["id"], "mode": "read", "difficulty": "hour", "questions": 5, "correct": 5,
+    })
+    client.get(f"/api/players/{p['id']}/briefing")  # creates quest cards
+
+    assert client.delete(f"/api/worlds/{w['id']}").status_code == 200
+
+    db = _TestSessionLocal()
+    try:
+        for model in (Player, Session, Quest, QuestRun, TierTrial):
+            assert db.query(model).count() == 0
+    finally:
+        db.close()
+
+
+def test_delete_player_cascades_in_database():
+    w = client.post("/api/worlds", json={"name": "W"}).json()
+    keep = client.post("/api/players", json={"nickname": "Keep", "world_id": w["id"]}).json()
+    gone = client.post("/api/players", json={"nickname": "Gone", "world_id": w["id"]}).json()
+    for p in (keep, gone):
+        client.post("/api/sessions", json={
+            "player_id": p["id"], "mode": "read", "difficulty": "hour", "questions": 5, "correct": 5,
+        })
+
+    assert client.delete(f"/api/players/{gone['id']}").status_code == 200
+
+    db = _TestSessionLocal()
+    try:
+        assert [s.player_id for s in db.query(Session).all()] == [keep["id"]]
+    finally:
+        db.close()
+
+
 def test_submit_quest_session():
     w = client.post("/api/worlds", json={"name": "W"}).json()
     p = client.post("/api/players", json={"nickname": "Alex", "world_id": w["id"]}).json()
@@ -261,6 +312,7 @@ def test_daily_challenge_resets_to_10_on_new_local_day():
             mode="quest",
             difficulty=None,
             created_at=datetime.now(timezone.utc) - timedelta(days=1),
+            local_date=local_date(tz=DEFAULT_TZ) - timedelta(days=1),
         )
         db.add(stale)
         db.commit()
@@ -294,3 +346,416 @@ def test_streak_shows_yesterday_progress_before_today_play():
     streak = next(c for c in data["challenges"] if c["challenge_type"] == "daily_streak")
     assert streak["target"] == 3
     assert streak["progress"] == 1
+
+
+def test_bulk_roster_json_preserves_order():
+    w = client.post("/api/worlds", json={"name": "W"}).json()
+    names = [f"Kid {i}" for i in range(40)]
+
+    r = client.post(f"/api/worlds/{w['id']}/players/bulk", json={"nicknames": names})
+    assert r.status_code == 200
+    created = r.json()
+    assert [p["nickname"] for p in created] == names
+    assert all(p["world_id"] == w["id"] and p["clock_power"] == 0 for p in created)
+    assert len(client.get(f"/api/players/world/{w['id']}").json()) == 40
+
+
+def test_bulk_roster_csv_with_header():
+    w = client.post("/api/worlds", json={"name": "W"}).json()
+    body = "nickname,class\nAlex,3B\n\n Sam ,3B\n"
+    r = client.post(
+        f"/api/worlds/{w['id']}/players/bulk", content=body, headers={"Content-Type": "text/csv"}
+    )
+    assert r.status_code == 200
+    assert [p["nickname"] for p in r.json()] == ["Alex", "Sam"]
+
+
+def test_bulk_roster_rejects_bad_input():
+    w = client.post("/api/worlds", json={"name": "W"}).json()
+    r = client.post(f"/api/worlds/{w['id']}/players/bulk", json=["ok", "x" * 51])
+    assert r.status_code == 400
+    assert client.get(f"/api/players/world/{w['id']}").json() == []
+
+    r = client.post("/api/worlds/999/players/bulk", json=["A"])
+    assert r.status_code == 404
+
+
+def test_players_in_world_keyset_pages():
+    w = client.post("/api/worlds", json={"name": "W"}).json()
+    names = [f"P{i}" for i in range(7)]
+    client.post(f"/api/worlds/{w['id']}/players/bulk", json=names)
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3}
+        if cursor:
+            params["after"] = cursor
+        r = client.get(f"/api/players/world/{w['id']}", params=params)
+        assert r.status_code == 200
+        page = r.json()
+        assert len(page) <= 3
+        seen += [p["nickname"] for p in page]
+        cursor = r.headers.get("x-next-cursor")
+        if not cursor:
+            break
+        assert 'rel="next"' in r.headers["link"]
+    assert seen == names
+
+
+def test_players_in_world_by_power_with_sparse_fields():
+    w = client.post("/api/worlds", json={"name": "W"}).json()
+    players = client.post(f"/api/worlds/{w['id']}/players/bulk", json=["Low", "High", "Mid"]).json()
+    for player, correct in zip(players, [0, 10, 5]):
+        client.post("/api/sessions", json={
+            "player_id": player["id"], "mode": "read", "difficulty": "hour", "questions": 10, "correct": correct,
+        })
+
+    first = client.get(f"/api/players/world/{w['id']}?order=clock_power&limit=2&fields=nickname")
+    assert first.json() == [{"nickname": "High"}, {"nickname": "Mid"}]
+    rest = client.get(
+        f"/api/players/world/{w['id']}",
+        params={"order": "clock_power", "fields": "nickname,clock_power", "after": first.headers["x-next-cursor"]},
+    )
+    assert [p["nickname"] for p in rest.json()] == ["Low"]
+    assert "x-next-cursor" not in rest.headers
+
+
+def test_players_in_world_without_paging_returns_everyone():
+    w = client.post("/api/worlds", json={"name": "W"}).json()
+    names = [f"P{i}" for i in range(5)]
+    client.post(f"/api/worlds/{w['id']}/players/bulk", json=names)
+
+    r = client.get(f"/api/players/world/{w['id']}")
+    assert [p["nickname"] for p in r.json()] == names
+    assert "x-next-cursor" not in r.headers
+
+    paged = client.get(f"/api/players/world/{w['id']}", params={"limit": 2})
+    assert len(paged.json()) == 2 and paged.headers["x-next-cursor"]
+
+
+def test_players_in_world_default_projection_is_in_openapi():
+    schema = client.get("/openapi.json").json()
+    ok = schema["paths"]["/api/players/world/{world_id}"]["get"]["responses"]["200"]
+    assert ok["content"]["application/json"]["schema"]["items"]["$ref"].endswith("/PlayerResponse")
+
+
+def test_players_in_world_rejects_bad_fields_and_cursor():
+    w = client.post("/api/worlds", json={"name": "W"}).json()
+    assert client.get(f"/api/players/world/{w['id']}?fields=pin_hash").status_code == 400
+    assert client.get(f"/api/players/world/{w['id']}?after=garbage").status_code == 400
+
+
+def test_large_player_pages_are_gzipped():
+    w = client.post("/api/worlds", json={"name": "W"}).json()
+    client.post(f"/api/worlds/{w['id']}/players/bulk", json=[f"Kid {i}" for i in range(100)])
+    r = client.get(f"/api/players/world/{w['id']}", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert len(r.json()) == 100
+
+
+def test_calendar_leaderboards_rank_by_period_points():
+    w = client.post("/api/worlds", json={"name": "W"}).json()
+    other = client.post("/api/worlds", json={"name": "Other"}).json()
+    a, b = client.post(f"/api/worlds/{w['id']}/players/bulk", json=["A", "B"]).json()
+    c = client.post("/api/players", json={"nickname": "C", "world_id": other["id"]}).json()
+
+    def play(player, correct):
+        client.post("/api/sessions", json={
+            "player_id": player["id"], "mode": "read", "difficulty": "hour", "questions": 10, "correct": correct,
+        })
+
+    play(a, 5)   # 10 points
+    play(b, 8)   # 13 points
+    play(a, 5)   # a now 20 today
+    play(c, 10)  # 20 points, other world
+
+    for period in ["today", "week", "month"]:
+        r = client.get(f"/api/leaderboard?scope=world&world_id={w['id']}&period={period}")
+        assert r.status_code == 200
+        data = r.json()
+        assert data["period"] == period
+        assert [(e["nickname"], e["period_points"]) for e in data["entries"]] == [("A", 20.0), ("B", 13.0)]
+
+    glob = client.get("/api/leaderboard?period=today").json()
+    assert len(glob["entries"]) == 3
+
+    all_time = client.get(f"/api/leaderboard?scope=world&world_id={w['id']}").json()
+    assert all_time["period"] == "all"
+    assert {e["nickname"]: e["weekly_gain"] for e in all_time["entries"]} == {"A": 20.0, "B": 13.0}
+
+
+def _bucket_points(player, points, day):
+    db = _TestSessionLocal()
+    try:
+        record_points(db, player["id"], player["world_id"], points, day)
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_calendar_leaderboard_ties_break_on_player_id():
+    w = client.post("/api/worlds", json={"name": "W"}).json()
+    players = client.post(f"/api/worlds/{w['id']}/players/bulk", json=["A", "B", "C"]).json()
+    today = local_date(tz=DEFAULT_TZ)
+    for player in players:
+        _bucket_points(player, 10.0, today)
+
+    expected = [p["id"] for p in reversed(players)]
+    for url in [f"/api/leaderboard?scope=world&world_id={w['id']}&period=today", "/api/leaderboard?period=today"]:
+        assert [e["player_id"] for e in client.get(url).json()["entries"]] == expected
+
+    db = _TestSessionLocal()
+    try:
+        plan = " ".join(row[-1] for row in db.execute(text(
+            "EXPLAIN QUERY PLAN SELECT player_id FROM player_point_buckets "
+            "WHERE period = 'day' AND bucket_start = :start AND world_id = :w "
+            "ORDER BY points DESC, player_id DESC LIMIT 100"
+        ), {"start": today, "w": w["id"]}))
+    finally:
+        db.close()
+    assert "ix_point_buckets_world_rank" in plan and "TEMP B-TREE" not in plan
+
+
+def test_global_calendar_leaderboard_uses_each_world_calendar():
+    home = client.post("/api/worlds", json={"name": "Home"}).json()
+    west = client.post("/api/worlds", json={"name": "West", "time_zone": "Pacific/Pago_Pago"}).json()
+    a = client.post("/api/players", json={"nickname": "A", "world_id": home["id"]}).json()
+    b = client.post("/api/players", json={"nickname": "B", "world_id": west["id"]}).json()
+
+    home_today = local_date(tz=DEFAULT_TZ)
+    west_today = local_date(tz=ZoneInfo("Pacific/Pago_Pago"))
+    _bucket_points(a, 7.0, home_today)
+    _bucket_points(b, 5.0, west_today)
+    if west_today != home_today:
+        # B's bucket for the Brisbane date is not B's "today"
+        _bucket_points(b, 100.0, home_today)
+
+    data = client.get("/api/leaderboard?period=today").json()
+    assert [(e["nickname"], e["period_points"]) for e in data["entries"]] == [("A", 7.0), ("B", 5.0)]
+
+
+def test_streak_leaderboard_uses_stored_streaks_and_decays():
+    w = client.post("/api/worlds", json={"name": "W"}).json()
+    other = client.post("/api/worlds", json={"name": "Other"}).json()
+    a, b = client.post(f"/api/worlds/{w['id']}/players/bulk", json=["A", "B"]).json()
+    c = client.post("/api/players", json={"nickname": "C", "world_id": other["id"]}).json()
+
+    now = datetime.now(timezone.utc)
+
+    def run(player, days_ago):
+        end = now - timedelta(days=days_ago)
+        r = client.post("/api/challenges/quest-run", json={
+            "player_id": player["id"],
+            "started_at": (end - timedelta(minutes=10)).isoformat(),
+            "ended_at": end.isoformat(),
+            "duration_seconds": 600,
+            "completed": True,
+        })
+        assert r.status_code == 200
+
+    for d in [2, 1, 0]:
+        run(a, d)
+    run(b, 1)
+    run(c, 0)
+
+    data = client.get(f"/api/leaderboard/streaks?scope=world&world_id={w['id']}").json()
+    assert [(e["nickname"], e["streak_days"]) for e in data["entries"]] == [("A", 3), ("B", 1)]
+    assert len(client.get("/api/leaderboard/streaks").json()["entries"]) == 3
+
+    # Two local days later B's streak (through yesterday) has lapsed; A's (through today) has too.
+    db = _TestSessionLocal()
+    try:
+        today = local_date(tz=DEFAULT_TZ)
+        assert decay_streaks(db, today + timedelta(days=1)) == 1
+        assert decay_streaks(db, today + timedelta(days=2)) == 2
+        assert db.get(Player, a["id"]).streak_days == 0
+    finally:
+        db.close()
+    assert client.get("/api/leaderboard/streaks").json()["entries"] == []
+
+
+@contextmanager
+def _captured_sql():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(" ".join(statement.split()))
+
+    event.listen(_test_engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(_test_engine, "before_cursor_execute", record)
+
+
+def test_relationships_never_lazy_load():
+    w = client.post("/api/worlds", json={"name": "W"}).json()
+    p = client.post("/api/players", json={"nickname": "Lazy", "world_id": w["id"]}).json()
+    db = _RouteSessionLocal()
+    try:
+        player = db.get(Player, p["id"])
+        with pytest.raises(InvalidRequestError):
+            player.sessions  # raise_on_sql by default
+        forced = db.query(Player).options(lazyload(Player.quests)).filter(Player.id == p["id"]).populate_existing().one()
+        with pytest.raises(LazyLoadError):
+            forced.quests  # strict-loading test mode catches opt-in lazy loads too
+    finally:
+        db.close()
+
+
+def test_submit_and_briefing_read_the_player_once():
+    w = client.post("/api/worlds", json={"name": "W"}).json()
+    p = client.post("/api/players", json={"nickname": "Lean", "world_id": w["id"]}).json()
+    client.get(f"/api/players/{p['id']}/briefing")
+
+    with _captured_sql() as statements:
+        r = client.post("/api/sessions", json={
+            "player_id": p["id"], "mode": "read", "difficulty": "hour", "questions": 10, "correct": 9,
+        })
+    assert r.status_code == 200
+    assert r.json()["player"]["clock_power"] == r.json()["new_clock_power"] == 14.0
+    # One full-row load of the player (admission's world_id lookup aside), no refreshes
+    player_loads = [s for s in statements if s.startswith("SELECT players.id AS players_id")]
+    assert len(player_loads) == 1
+    assert not any(s.startswith("SELECT") and "WHERE sessions.id =" in s for s in statements)
+
+    with _captured_sql() as statements:
+        r = client.get(f"/api/players/{p['id']}/briefing")
+    assert r.json()["player"]["clock_power"] == 14.0
+    assert len([s for s in statements if s.startswith("SELECT players.id AS players_id")]) == 1
+
+
+def test_set_based_streaks_for_a_whole_world():
+    w = client.post("/api/worlds", json={"name": "W"}).json()
+    other = client.post("/api/worlds", json={"name": "Other"}).json()
+    a, b, c = client.post(f"/api/worlds/{w['id']}/players/bulk", json=["A", "B", "C"]).json()
+    d = client.post("/api/players", json={"nickname": "D", "world_id": other["id"]}).json()
+
+    now = datetime.now(timezone.utc)
+
+    def run(player, days_ago, minutes=10):
+        end = now - timedelta(days=days_ago)
+        client.post("/api/challenges/quest-run", json={
+            "player_id": player["id"],
+            "started_at": (end - timedelta(minutes=minutes)).isoformat(),
+            "ended_at": end.isoformat(),
+            "duration_seconds": minutes * 60,
+            "completed": True,
+        })
+
+    for days_ago in [5, 4, 3, 1, 0]:
+        run(a, days_ago)
+    run(a, 2, minutes=5)  # too short: breaks the island
+    for days_ago in [3, 2, 1]:
+        run(b, days_ago)
+    run(b, 0, minutes=4)  # today still pending
+    run(c, 2)             # lapsed
+    run(d, 0)             # other world
+
+    db = _TestSessionLocal()
+    try:
+        today = local_date(tz=DEFAULT_TZ)
+        streaks = current_streaks(db, today, world_id=w["id"])
+        assert streaks == {a["id"]: (2, today), b["id"]: (3, today - timedelta(days=1))}
+        assert current_streaks(db, today, player_id=d["id"]) == {d["id"]: (1, today)}
+
+        minutes = {(pid, day): m for pid, day, m in db.execute(daily_minutes_query(world_id=w["id"], since=today))}
+        assert minutes == {(a["id"], today): 10.0, (b["id"], today): 4.0}
+    finally:
+        db.close()
+
+
+def test_world_time_zone_sets_the_local_day():
+    assert client.post("/api/worlds", json={"name": "Bad", "time_zone": "Mars/Olympus"}).status_code == 400
+    w = client.post("/api/worlds", json={"name": "LA", "time_zone": "America/Los_Angeles"}).json()
+    assert w["time_zone"] == "America/Los_Angeles"
+    p = client.post("/api/players", json={"nickname": "LA", "world_id": w["id"]}).json()
+
+    # 02:00 UTC on 2 Jan is still 1 Jan in Los Angeles (and already 2 Jan in Brisbane)
+    client.post("/api/challenges/quest-run", json={
+        "player_id": p["id"],
+        "started_at": "2026-01-02T02:00:00+00:00",
+        "ended_at": "2026-01-02T02:10:00+00:00",
+        "duration_seconds": 600,
+        "completed": True,
+    })
+    client.get(f"/api/players/{p['id']}/briefing")
+
+    la = ZoneInfo("America/Los_Angeles")
+    db = _TestSessionLocal()
+    try:
+        run = db.query(QuestRun).filter(QuestRun.player_id == p["id"]).one()
+        assert run.local_date == date(2026, 1, 1)
+        cards = db.query(Quest).filter(Quest.player_id == p["id"]).all()
+        assert cards and {q.local_date for q in cards} == {local_date(tz=la)}
+    finally:
+        db.close()
+
+
+def test_streak_decay_follows_each_world_calendar():
+    home = client.post("/api/worlds", json={"name": "Home"}).json()
+    west = client.post("/api/worlds", json={"name": "West", "time_zone": "Pacific/Pago_Pago"}).json()
+    a = client.post("/api/players", json={"nickname": "A", "world_id": home["id"]}).json()
+    b = client.post("/api/players", json={"nickname": "B", "world_id": west["id"]}).json()
+
+    db = _TestSessionLocal()
+    try:
+        # A lapsed in the default calendar; B is live through its own yesterday,
+        # which for most of the day is already two days ago in Brisbane.
+        lapsed = local_date(tz=DEFAULT_TZ) - timedelta(days=2)
+        live = local_date(tz=ZoneInfo("Pacific/Pago_Pago")) - timedelta(days=1)
+        for pid, through in ((a["id"], lapsed), (b["id"], live)):
+            player = db.get(Player, pid)
+            player.streak_days, player.streak_through = 3, through
+        db.commit()
+
+        assert decay_streaks(db) == 1
+        assert db.get(Player, a["id"]).streak_days == 0
+        assert db.get(Player, b["id"]).streak_days == 3
+    finally:
+        db.close()
+
+
+def test_readiness_reports_db_pools_and_queues(monkeypatch):
+    r = client.get("/api/health/ready")
+    assert r.status_code == 200, r.json()
+    data = r.json()
+    assert data["status"] == "ready" and data["reasons"] == []
+    assert data["db"]["latency_ms"] >= 0 and data["db"]["writer_held_ms"] == 0
+    assert data["pools"]["writer"]["size"] == 1
+    assert data["pools"]["reader"]["checkedout"] == 0
+    assert data["queues"] == {"quest_worker": 0}
+
+    monkeypatch.setattr(settings, "ready_max_db_latency_ms", -1)
+    r = client.get("/api/health/ready")
+    assert r.status_code == 503
+    assert r.json()["reasons"][0].startswith("database round trip")
+
+
+def test_readiness_fails_while_the_writer_connection_is_held(monkeypatch):
+    monkeypatch.setattr(settings, "ready_max_writer_held_ms", 20)
+    with engine.connect():
+        time.sleep(0.05)
+        r = client.get("/api/health/ready")
+    assert r.status_code == 503
+    assert r.json()["reasons"][0].startswith("writer connection held")
+    assert client.get("/api/health/ready").status_code == 200
+
+
+def test_readiness_probe_never_touches_the_writer():
+    checkouts = []
+
+    def record(*args):
+        checkouts.append(args)
+
+    event.listen(engine, "checkout", record)
+    holder = sqlite3.connect(engine.url.database, isolation_level=None)
+    try:
+        # Another process holding the write lock does not stall the probe
+        holder.execute("BEGIN IMMEDIATE")
+        assert client.get("/api/health/ready").status_code == 200
+    finally:
+        holder.execute("ROLLBACK")
+        holder.close()
+        event.remove(engine, "checkout", record)
+    assert checkouts == []
@@ -0,0 +1,100 @@
+"""Online backups, rotation, verification and restore against real SQLite files."""
+import gzip
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.backup import BackupError, create_backup, list_snapshots, restore_backup, verify_backup
+from app.database import Base, enable_sqlite_foreign_keys
+from app.models import World, Player
+
+
+@pytest.fixture
+def live_db(tmp_path):
+    path = tmp_path / "live.db"
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False, "timeout": 30})
+    enable_sqlite_foreign_keys(engine)
+    with engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(bind=engine)
+    db = SessionLocal()
+    world = World(name="Backup", join_code="BackupWorld")
+    db.add(world)
+    db.flush()
+    db.add_all(Player(nickname=f"P{i}", world_id=world.id) for i in range(500))
+    db.commit()
+    db.close()
+    yield path, SessionLocal
+    engine.dispose()
+
+
+def test_backup_while_writing_is_complete_and_consistent(live_db, tmp_path):
+    path, SessionLocal = live_db
+    stop = threading.Event()
+    written = []
+
+    def writer():
+        db = SessionLocal()
+        world_id = db.query(World.id).scalar()
+        while not stop.is_set():
+            db.add(Player(nickname="Late", world_id=world_id))
+            db.commit()
+            written.append(1)
+        db.close()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        result = create_backup(tmp_path / "snaps", source=path, pages_per_step=4, pause=0.001)
+    finally:
+        stop.set()
+        thread.join()
+
+    assert written, "writer was stalled for the whole backup"
+    assert result.steps > 1
+    assert result.path.name.endswith(".db.gz")
+    report = verify_backup(result.path)
+    assert report.ok, report.integrity
+    assert report.tables["players"] >= 500
+
+    raw = tmp_path / "expanded.db"
+    raw.write_bytes(gzip.decompress(result.path.read_bytes()))
+    conn = sqlite3.connect(raw)
+    try:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    finally:
+        conn.close()
+
+
+def test_rotation_keeps_newest_snapshots(live_db, tmp_path):
+    path, _ = live_db
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    results = [
+        create_backup(tmp_path / "snaps", source=path, keep=3, compress=False, now=start + timedelta(hours=i))
+        for i in range(5)
+    ]
+    assert list_snapshots(tmp_path / "snaps") == [r.path for r in results[2:]]
+    assert [p.name for p in results[-1].removed] == [results[1].path.name]
+
+
+def test_verify_rejects_damaged_snapshot_and_restore_refuses_it(live_db, tmp_path):
+    path, _ = live_db
+    good = create_backup(tmp_path / "snaps", source=path).path
+    damaged = tmp_path / "snaps" / "clockquest-damaged.db.gz"
+    damaged.write_bytes(good.read_bytes()[: good.stat().st_size // 2])
+
+    assert not verify_backup(damaged).ok
+    with pytest.raises(BackupError):
+        restore_backup(damaged, tmp_path / "restored.db")
+
+    target = tmp_path / "restored.db"
+    report = restore_backup(good, target)
+    assert report.ok and target.exists()
+    with pytest.raises(BackupError):
+        restore_backup(good, target)
+    assert restore_backup(good, target, force=True).tables["players"] == 500
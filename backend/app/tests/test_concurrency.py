@@ -0,0 +1,194 @@
+"""Concurrent-writer stress tests.
+
+These use a real SQLite file (not the shared in-memory test engine) so each
+thread gets its own connection and SQLite's locking behaves as in production.
+The route tests go through ``file_app``, which serves the API from such a file
+with the app's own writer and reader engines.
+"""
+import threading
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from app import scoring
+from app.admission import admission_controller
+from app.database import Base, enable_sqlite_foreign_keys
+from app.models import World, Player, Quest, Session
+from app.quests import generate_quests
+from app.scoring import award_session_points
+from .conftest import client, file_app, _TestSessionLocal  # noqa: F401 (fixture)
+
+THREADS = 8
+SUBMITS_PER_THREAD = 15
+API_SUBMITS_PER_THREAD = 5  # 13 points each stays under tier 10's ceiling
+
+
+@pytest.fixture
+def file_db(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'stress.db'}",
+        connect_args={"check_same_thread": False, "timeout": 30},
+    )
+    enable_sqlite_foreign_keys(engine)
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    yield SessionLocal
+    engine.dispose()
+
+
+def _make_player(SessionLocal, tier: int) -> int:
+    db = SessionLocal()
+    try:
+        world = World(name="Stress", join_code="StressWorld")
+        db.add(world)
+        db.flush()
+        player = Player(nickname="Racer", world_id=world.id, clock_power=0.0, current_tier=tier)
+        db.add(player)
+        db.commit()
+        return player.id
+    finally:
+        db.close()
+
+
+def _run_threads(target):
+    barrier = threading.Barrier(THREADS)
+    errors = []
+
+    def worker():
+        try:
+            barrier.wait()
+            target()
+        except Exception as exc:  # surfaced in the main thread below
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker) for _ in range(THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+
+
+def _submit_loop(SessionLocal, player_id, raw_points, awarded, lock):
+    for _ in range(SUBMITS_PER_THREAD):
+        db = SessionLocal()
+        try:
+            # Read like submit_session does, then award against that snapshot.
+            seen = db.get(Player, player_id).clock_power
+            points, _ = award_session_points(db, player_id, raw_points, seen)
+            db.commit()
+            with lock:
+                awarded.append(points)
+        finally:
+            db.close()
+
+
+def test_concurrent_awards_lose_no_updates(file_db):
+    player_id = _make_player(file_db, tier=10)  # ceiling 1000, not reached below
+    awarded, lock = [], threading.Lock()
+
+    _run_threads(lambda: _submit_loop(file_db, player_id, 5.0, awarded, lock))
+
+    db = file_db()
+    try:
+        final = db.get(Player, player_id).clock_power
+    finally:
+        db.close()
+    assert len(awarded) == THREADS * SUBMITS_PER_THREAD
+    assert final == THREADS * SUBMITS_PER_THREAD * 5.0
+    assert sum(awarded) == final
+
+
+def test_concurrent_awards_respect_tier_ceiling(file_db):
+    player_id = _make_player(file_db, tier=0)  # ceiling 100
+    awarded, lock = [], threading.Lock()
+
+    _run_threads(lambda: _submit_loop(file_db, player_id, 7.0, awarded, lock))
+
+    db = file_db()
+    try:
+        final = db.get(Player, player_id).clock_power
+    finally:
+        db.close()
+    assert final == 100.0
+    assert round(sum(awarded), 1) == 100.0
+
+
+def test_concurrent_briefings_create_one_active_card_per_type(file_db):
+    player_id = _make_player(file_db, tier=0)
+
+    def brief():
+        for _ in range(3):
+            db = file_db()
+            try:
+                generate_quests(db, db.get(Player, player_id))
+            finally:
+                db.close()
+
+    _run_threads(brief)
+
+    db = file_db()
+    try:
+        active = db.query(Quest).filter(Quest.player_id == player_id, Quest.completed == False).all()
+        assert sorted(q.quest_type for q in active) == ["daily_play", "daily_streak"]
+
+        db.add(Quest(player_id=player_id, quest_type="daily_play", description="dup", target=10, local_date=date.today()))
+        with pytest.raises(IntegrityError):
+            db.commit()
+    finally:
+        db.close()
+
+
+def _session_body(player_id):
+    return {
+        "player_id": player_id, "mode": "read", "difficulty": "hour",
+        "questions": 10, "correct": 8, "hints_used": 1, "max_streak": 3, "avg_response_ms": 2500,
+    }
+
+
+def test_concurrent_submits_through_the_api_lose_no_points(file_app):
+    write_sessions, _ = file_app
+    player_id = _make_player(write_sessions, tier=10)  # ceiling 1000, not reached below
+    admission_controller.configure(enabled=False)
+    awarded, lock = [], threading.Lock()
+
+    def submit():
+        for _ in range(API_SUBMITS_PER_THREAD):
+            r = client.post("/api/sessions?sync=true", json=_session_body(player_id))
+            assert r.status_code == 200, r.text
+            with lock:
+                awarded.append(r.json()["points_earned"])
+
+    _run_threads(submit)
+
+    db = write_sessions()
+    try:
+        final = db.get(Player, player_id).clock_power
+        recorded = [s.points_earned for s in db.query(Session).filter(Session.player_id == player_id)]
+    finally:
+        db.close()
+    assert len(awarded) == THREADS * API_SUBMITS_PER_THREAD
+    assert final == THREADS * API_SUBMITS_PER_THREAD * 13.0
+    assert sorted(recorded) == sorted(awarded)
+    assert client.get(f"/api/players/{player_id}").json()["clock_power"] == final
+
+
+def test_award_contention_is_a_retryable_503(monkeypatch):
+    world = client.post("/api/worlds", json={"name": "Busy"}).json()
+    player = client.post("/api/players", json={"nickname": "Racer", "world_id": world["id"]}).json()
+    monkeypatch.setattr(scoring, "AWARD_MAX_ATTEMPTS", 0)
+
+    r = client.post("/api/sessions", json=_session_body(player["id"]))
+    assert r.status_code == 503
+    assert r.headers["retry-after"] == str(scoring.AWARD_RETRY_AFTER_SECONDS)
+    db = _TestSessionLocal()
+    try:
+        assert db.query(Session).filter(Session.player_id == player["id"]).count() == 0
+    finally:
+        db.close()
+
+    monkeypatch.undo()
+    assert client.post("/api/sessions", json=_session_body(player["id"])).status_code == 200
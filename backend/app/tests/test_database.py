@@ -0,0 +1,135 @@
+import threading
+
+import pytest
+from fastapi import Depends
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session as DbSession, sessionmaker
+from starlette.requests import Request
+
+from app import database
+from app.database import SESSION_OPTIONS, Base, SessionRoute, create_engines, get_db, is_memory_database
+from app.models import World
+from .conftest import client, file_app  # noqa: F401 (fixture)
+
+
+def _request(method: str) -> Request:
+    return Request({"type": "http", "method": method, "path": "/", "headers": []})
+
+
+@pytest.fixture
+def engines(tmp_path):
+    writer, reader = create_engines(f"sqlite:///{tmp_path / 'split.db'}", read_pool_size=2, writer_timeout=5)
+    Base.metadata.create_all(bind=writer)
+    yield writer, reader
+    writer.dispose()
+    reader.dispose()
+
+
+def test_get_db_routes_by_method():
+    for method, expected in [("GET", database.read_engine), ("HEAD", database.read_engine),
+                             ("POST", database.engine), ("DELETE", database.engine)]:
+        dependency = get_db(_request(method))
+        db = next(dependency)
+        assert db.get_bind() is expected
+        dependency.close()
+
+
+def test_memory_database_shares_one_engine():
+    assert is_memory_database("sqlite:///:memory:")
+    assert not is_memory_database("sqlite:////tmp/clockquest.db")
+    writer, reader = create_engines("sqlite://")
+    assert writer is reader
+
+
+def test_readers_are_read_only_and_see_committed_writes(engines):
+    writer, reader = engines
+    with writer.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        conn.execute(text("INSERT INTO worlds (name, join_code) VALUES ('W', 'code')"))
+        conn.commit()
+
+    with reader.connect() as conn:
+        assert conn.execute(text("SELECT name FROM worlds")).scalar() == "W"
+        with pytest.raises(OperationalError, match="readonly"):
+            conn.execute(text("INSERT INTO worlds (name, join_code) VALUES ('X', 'other')"))
+
+
+def test_writes_queue_on_single_connection_while_reads_continue(engines):
+    writer, reader = engines
+    Writer, Reader = sessionmaker(bind=writer), sessionmaker(bind=reader)
+    errors, reads = [], []
+
+    def write(i):
+        try:
+            with Writer() as db:
+                db.add(World(name=f"W{i}", join_code=f"code{i}"))
+                db.commit()
+        except Exception as exc:
+            errors.append(exc)
+
+    def read():
+        try:
+            with Reader() as db:
+                for _ in range(20):
+                    reads.append(db.execute(text("SELECT COUNT(*) FROM worlds")).scalar())
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(20)]
+    threads += [threading.Thread(target=read) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert writer.pool.size() == 1
+    with Reader() as db:
+        assert db.execute(text("SELECT COUNT(*) FROM worlds")).scalar() == 20
+    assert len(reads) == 80
+
+
+def test_session_route_returns_the_connection_before_serialization(engines):
+    writer, _ = engines
+    Writer = sessionmaker(bind=writer, **SESSION_OPTIONS)
+
+    def create(db: DbSession = Depends(get_db)):
+        world = World(name="W", join_code="code")
+        db.add(world)
+        db.commit()
+        db.refresh(world)  # starts a new transaction on the only writer connection
+        return world
+
+    route = SessionRoute("/worlds", create, methods=["POST"])
+    world = route.dependant.call(db=Writer())
+    assert writer.pool.checkedout() == 0
+    assert world.name == "W" and world.id is not None
+
+
+def test_routes_use_the_read_only_pool_for_reads(file_app):
+    write_sessions, read_sessions = file_app
+    reader = read_sessions.kw["bind"]
+    read_statements = []
+    event.listen(reader, "before_cursor_execute", lambda *args: read_statements.append(args[2]))
+
+    world = client.post("/api/worlds", json={"name": "Split"}).json()
+    player = client.post("/api/players", json={"nickname": "Rae", "world_id": world["id"]}).json()
+    assert read_statements == []
+
+    # Plain GETs are served by the query_only readers and see committed writes
+    assert client.get(f"/api/worlds/{world['id']}").json()["name"] == "Split"
+    assert client.get(f"/api/players/{player['id']}").json()["nickname"] == "Rae"
+    assert any("FROM worlds" in s for s in read_statements)
+    assert any("FROM players" in s for s in read_statements)
+
+    # The briefing writes quest cards on a GET, so it must still get the writer
+    read_statements.clear()
+    r = client.get(f"/api/players/{player['id']}/briefing")
+    assert r.status_code == 200
+    assert not any("FROM quests" in s for s in read_statements)
+    db = write_sessions()
+    try:
+        assert db.execute(text("SELECT count(*) FROM quests")).scalar() > 0
+    finally:
+        db.close()
@@ -0,0 +1,65 @@
+from app.idempotency import IdempotencyStore
+from .conftest import client
+
+
+def _player():
+    w = client.post("/api/worlds", json={"name": "W"}).json()
+    return client.post("/api/players", json={"nickname": "Retry", "world_id": w["id"]}).json()
+
+
+def _session_body(player_id):
+    return {"player_id": player_id, "mode": "read", "difficulty": "hour", "questions": 10, "correct": 8}
+
+
+def test_replayed_session_is_not_scored_twice():
+    p = _player()
+    headers = {"Idempotency-Key": "abc-123"}
+
+    first = client.post("/api/sessions", json=_session_body(p["id"]), headers=headers)
+    second = client.post("/api/sessions", json=_session_body(p["id"]), headers=headers)
+
+    assert first.status_code == second.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers["idempotent-replayed"] == "true"
+    assert client.get(f"/api/players/{p['id']}").json()["clock_power"] == first.json()["new_clock_power"]
+
+
+def test_different_keys_and_no_key_are_scored():
+    p = _player()
+    body = _session_body(p["id"])
+    client.post("/api/sessions", json=body, headers={"Idempotency-Key": "one"})
+    client.post("/api/sessions", json=body, headers={"Idempotency-Key": "two"})
+    client.post("/api/sessions", json=body)
+    assert client.get(f"/api/players/{p['id']}").json()["clock_power"] == 3 * 13.0
+
+
+def test_key_reuse_with_different_body_is_rejected():
+    p = _player()
+    headers = {"Idempotency-Key": "same"}
+    client.post("/api/sessions", json=_session_body(p["id"]), headers=headers)
+    r = client.post("/api/sessions", json={**_session_body(p["id"]), "correct": 9}, headers=headers)
+    assert r.status_code == 422
+
+
+def test_failed_request_is_not_stored():
+    p = _player()
+    headers = {"Idempotency-Key": "retry-after-error"}
+    bad = client.post("/api/sessions", json={**_session_body(p["id"]), "correct": 99}, headers=headers)
+    assert bad.status_code == 400
+    bad_again = client.post("/api/sessions", json={**_session_body(p["id"]), "correct": 99}, headers=headers)
+    assert "idempotent-replayed" not in bad_again.headers
+
+
+def test_store_expires_and_bounds_entries():
+    now = [0.0]
+    store = IdempotencyStore(ttl_seconds=10, max_entries=2, clock=lambda: now[0])
+    store.reserve(("p", b"a"), b"f")
+    store.complete(("p", b"a"), 200, [], b"{}")
+    now[0] = 5
+    store.reserve(("p", b"b"), b"f")
+    store.reserve(("p", b"c"), b"f")  # over capacity: oldest evicted
+    assert store.get(("p", b"a")) is None
+    assert store.get(("p", b"b")) is not None
+    now[0] = 16
+    assert store.get(("p", b"b")) is None
+    assert len(store) == 0
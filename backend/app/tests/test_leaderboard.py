@@ -0,0 +1,10 @@
+from datetime import date
+
+from app.leaderboard_buckets import bucket_start
+
+
+def test_leaderboard_bucket_starts():
+    wednesday = date(2026, 10, 21)
+    assert bucket_start("day", wednesday) == wednesday
+    assert bucket_start("week", wednesday) == date(2026, 10, 19)
+    assert bucket_start("month", wednesday) == date(2026, 10, 1)
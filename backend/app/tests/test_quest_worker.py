@@ -0,0 +1,112 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app import quest_worker as quest_worker_module
+from app.models import Quest
+from app.quest_worker import QuestWorker
+from app.routers import sessions as sessions_router
+from .conftest import client, _TestSessionLocal
+
+
+def _new_player():
+    w = client.post("/api/worlds", json={"name": "W"}).json()
+    return client.post("/api/players", json={"nickname": "Bg", "world_id": w["id"]}).json()
+
+
+def _submit(player_id, **params):
+    return client.post("/api/sessions", params=params, json={
+        "player_id": player_id, "mode": "read", "difficulty": "hour", "questions": 10, "correct": 8,
+    })
+
+
+@pytest.fixture
+def running_worker(monkeypatch):
+    """A QuestWorker on its own event loop thread, wired into the sessions router."""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    worker = QuestWorker(_TestSessionLocal, concurrency=2)
+
+    async def start():
+        worker.start()
+
+    asyncio.run_coroutine_threadsafe(start(), loop).result()
+    monkeypatch.setattr(sessions_router, "quest_worker", worker)
+    yield worker, loop
+    asyncio.run_coroutine_threadsafe(worker.stop(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def _active_cards(player_id):
+    db = _TestSessionLocal()
+    try:
+        return db.query(Quest).filter(Quest.player_id == player_id, Quest.completed == False).count()
+    finally:
+        db.close()
+
+
+def test_submit_returns_last_known_cards_and_recomputes_in_background(running_worker):
+    worker, loop = running_worker
+    p = _new_player()
+
+    r = _submit(p["id"])
+    assert r.status_code == 200
+    assert r.json()["challenge_updates"] == []  # no cards existed yet
+
+    asyncio.run_coroutine_threadsafe(worker.join(), loop).result(timeout=5)
+    assert _active_cards(p["id"]) == 2
+    assert worker.depth == 0
+
+
+def test_sync_flag_recomputes_before_responding(running_worker):
+    p = _new_player()
+    r = _submit(p["id"], sync="true")
+    types = sorted(c["challenge_type"] for c in r.json()["challenge_updates"])
+    assert types == ["daily_play", "daily_streak"]
+
+
+def test_inline_when_worker_not_running():
+    p = _new_player()
+    assert len(_submit(p["id"]).json()["challenge_updates"]) == 2
+
+
+def test_worker_serializes_and_coalesces_per_player(monkeypatch):
+    calls, active, overlaps = [], set(), []
+    # Player 1's first recompute signals it has started, then holds until released
+    started, release = threading.Event(), threading.Event()
+
+    def fake_recompute(_factory, player_id):
+        if player_id in active:
+            overlaps.append(player_id)
+        active.add(player_id)
+        if player_id == 1 and not started.is_set():
+            started.set()
+            release.wait(5)
+        time.sleep(0.01)
+        active.discard(player_id)
+        calls.append(player_id)
+
+    monkeypatch.setattr(quest_worker_module, "recompute_player_quests", fake_recompute)
+
+    async def scenario():
+        worker = QuestWorker(_TestSessionLocal, concurrency=4)
+        worker.start()
+        for _ in range(5):
+            worker.submit(1)
+        worker.submit(2)
+        assert await asyncio.to_thread(started.wait, 5)  # player 1 is now running
+        for _ in range(5):
+            worker.submit(1)  # marks it dirty once
+        release.set()
+        await worker.join()
+        await worker.stop()
+
+    asyncio.run(scenario())
+    assert overlaps == []
+    assert calls.count(1) == 2
+    assert calls.count(2) == 1
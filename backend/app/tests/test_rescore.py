@@ -0,0 +1,112 @@
+from datetime import date, datetime
+
+from sqlalchemy import update
+
+from app import rescore
+from app.models import Player, PlayerPointBucket, Session
+from app.rescore import rescore_players
+from app.retention import compact_sessions
+from .conftest import client, _TestSessionLocal, load_seed
+
+
+def _play(player_id, sessions):
+    for _ in range(sessions):
+        r = client.post("/api/sessions", json={
+            "player_id": player_id, "mode": "read", "difficulty": "hour",
+            "questions": 10, "correct": 10, "max_streak": 10,
+        })
+        assert r.status_code == 200
+
+
+def _player_with_history():
+    w = client.post("/api/worlds", json={"name": "W"}).json()
+    p = client.post("/api/players", json={"nickname": "Replay", "world_id": w["id"]}).json()
+    _play(p["id"], 5)  # 25 points each, capped at the Wood ceiling of 100
+    r = client.post("/api/trials", json={
+        "player_id": p["id"], "tier": 1, "questions": 10, "correct": 10, "hints_used": 0,
+    })
+    assert r.json()["passed"]
+    _play(p["id"], 2)
+    return p
+
+
+def test_replay_matches_live_scoring():
+    p = load_seed(_player_with_history)
+    db = _TestSessionLocal()
+    try:
+        report = rescore_players(db, dry_run=True)
+        assert report.players == 1
+        assert report.sessions == 7
+        assert report.sessions_changed == 0
+        assert report.changes == []
+        assert db.get(Player, p["id"]).clock_power == 150.0
+    finally:
+        db.close()
+
+
+def test_rescore_repairs_power_tier_and_buckets():
+    p = load_seed(_player_with_history)
+    db = _TestSessionLocal()
+    try:
+        db.execute(update(Player).where(Player.id == p["id"]).values(clock_power=0.0, current_tier=0))
+        db.execute(update(Session).where(Session.player_id == p["id"]).values(points_earned=0.0))
+        db.query(PlayerPointBucket).delete()
+        db.commit()
+
+        dry = rescore_players(db, dry_run=True)
+        assert dry.sessions_changed == 6  # the capped 5th session really earned 0
+        assert db.get(Player, p["id"]).clock_power == 0.0
+
+        report = rescore_players(db, rebuild_buckets=True, chunk_size=1)
+        assert report.power_delta == 150.0
+        db.expire_all()
+        player = db.get(Player, p["id"])
+        assert (player.clock_power, player.current_tier) == (150.0, 1)
+        points = [s.points_earned for s in db.query(Session).filter(Session.player_id == p["id"]).order_by(Session.id)]
+        assert points == [25.0, 25.0, 25.0, 25.0, 0.0, 25.0, 25.0]
+        buckets = {b.period: b.points for b in db.query(PlayerPointBucket).filter(PlayerPointBucket.player_id == p["id"])}
+        assert buckets == {"day": 150.0, "week": 150.0, "month": 150.0}
+    finally:
+        db.close()
+
+
+def test_rescore_applies_new_scoring_rules(monkeypatch):
+    p = load_seed(_player_with_history)
+    # A harsher scorer leaves the player short of the Stone trial's min_power,
+    # so the trial no longer unlocks the tier on replay.
+    monkeypatch.setattr(rescore, "raw_session_points", lambda questions, correct, hints, streak: 10.0)
+    db = _TestSessionLocal()
+    try:
+        report = rescore_players(db)
+        [change] = report.changes
+        assert (change.old_power, change.new_power) == (150.0, 70.0)
+        assert (change.old_tier, change.new_tier) == (1, 0)
+        db.expire_all()
+        assert db.get(Player, p["id"]).current_tier == 0
+    finally:
+        db.close()
+
+
+def test_rescore_buckets_compacted_days_on_their_own_date():
+    w = client.post("/api/worlds", json={"name": "LA", "time_zone": "America/Los_Angeles"}).json()
+    p = client.post("/api/players", json={"nickname": "West", "world_id": w["id"]}).json()
+    db = _TestSessionLocal()
+    try:
+        # Midday in Los Angeles on Sunday 1 March (20:00 UTC the same day)
+        db.add(Session(player_id=p["id"], mode="read", difficulty="hour", questions=10, correct=10,
+                       hints_used=0, max_streak=10, points_earned=25.0, created_at=datetime(2026, 3, 1, 20, 0)))
+        db.commit()
+        compact_sessions(db, retention_days=30, now=datetime(2026, 6, 1))
+
+        rescore_players(db, rebuild_buckets=True)
+        buckets = {
+            (b.period, b.bucket_start): b.points
+            for b in db.query(PlayerPointBucket).filter(PlayerPointBucket.player_id == p["id"])
+        }
+        assert buckets == {
+            ("day", date(2026, 3, 1)): 25.0,
+            ("week", date(2026, 2, 23)): 25.0,
+            ("month", date(2026, 3, 1)): 25.0,
+        }
+    finally:
+        db.close()
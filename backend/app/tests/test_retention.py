@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Player, Session, SessionDailySummary, World
+from app.retention import compact_sessions, enable_incremental_vacuum
+from .conftest import client, _TestSessionLocal
+
+
+def _seed_sessions(player_id, created_ats, **fields):
+    db = _TestSessionLocal()
+    try:
+        for created_at in created_ats:
+            db.add(Session(
+                player_id=player_id,
+                mode=fields.get("mode", "read"),
+                difficulty=fields.get("difficulty", "hour"),
+                questions=10,
+                correct=fields.get("correct", 8),
+                hints_used=fields.get("hints_used", 1),
+                avg_response_ms=fields.get("avg_response_ms", 2000),
+                points_earned=fields.get("points_earned", 13.0),
+                created_at=created_at,
+            ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _new_player():
+    w = client.post("/api/worlds", json={"name": "W"}).json()
+    p = client.post("/api/players", json={"nickname": "Old", "world_id": w["id"]}).json()
+    return w, p
+
+
+def test_compaction_preserves_totals_and_deletes_originals():
+    w, p = _new_player()
+    now = datetime(2026, 6, 1, 12, 0)
+    old_day = now - timedelta(days=200)
+    _seed_sessions(p["id"], [old_day, old_day + timedelta(hours=1), old_day + timedelta(hours=2)])
+    _seed_sessions(p["id"], [now - timedelta(days=1)])
+
+    db = _TestSessionLocal()
+    try:
+        result = compact_sessions(db, retention_days=180, batch_size=2, now=now)
+        assert result["compacted"] == 3
+        assert result["batches"] == 2
+
+        assert db.query(Session).count() == 1
+        summaries = db.query(SessionDailySummary).all()
+        assert len(summaries) == 1
+        summary = summaries[0]
+        assert summary.sessions == 3
+        assert summary.questions == 30
+        assert summary.correct == 24
+        assert summary.hints_used == 3
+        assert summary.points_earned == 39.0
+        assert summary.response_ms_total == 3 * 2000 * 10
+
+        # Running again is a no-op
+        assert compact_sessions(db, retention_days=180, now=now)["compacted"] == 0
+    finally:
+        db.close()
+
+
+def test_analytics_include_compacted_history():
+    w, p = _new_player()
+    old = datetime.utcnow() - timedelta(days=365)
+    _seed_sessions(p["id"], [old, old + timedelta(minutes=5)])
+
+    before = client.get(f"/api/worlds/{w['id']}/analytics").json()
+
+    db = _TestSessionLocal()
+    try:
+        compact_sessions(db, retention_days=30)
+    finally:
+        db.close()
+
+    after = client.get(f"/api/worlds/{w['id']}/analytics").json()
+    assert after["total_sessions"] == before["total_sessions"] == 2
+    assert after["accuracy_by_mode_difficulty"] == before["accuracy_by_mode_difficulty"]
+    assert after["players"] == before["players"]
+    assert after["response_time_trend"] == before["response_time_trend"]
+
+
+def test_freed_pages_are_only_vacuumed_with_incremental_auto_vacuum(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'vacuum.db'}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    now = datetime(2026, 6, 1, 12, 0)
+
+    def compact_old_sessions():
+        db.add_all(Session(player_id=player.id, mode="read", difficulty="hour", questions=10, correct=5,
+                           created_at=now - timedelta(days=200)) for _ in range(3))
+        db.commit()
+        return compact_sessions(db, retention_days=180, now=now)
+
+    try:
+        world = World(name="W", join_code="Vacuum")
+        db.add(world)
+        db.flush()
+        player = Player(nickname="Old", world_id=world.id)
+        db.add(player)
+        db.commit()
+
+        assert compact_old_sessions()["vacuumed"] is False
+        enable_incremental_vacuum(db)
+        assert compact_old_sessions()["vacuumed"] is True
+    finally:
+        db.close()
+        engine.dispose()
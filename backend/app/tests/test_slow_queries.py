@@ -0,0 +1,68 @@
+"""Slow-query log: fingerprints, plan capture, route labels and the summary."""
+import json
+
+from sqlalchemy import create_engine, text
+
+from app.database import Base
+from app.slow_queries import SlowQueryLog, fingerprint, normalize, read_entries, summarize
+from .conftest import client, _test_engine
+
+
+def test_fingerprint_ignores_literals_and_in_list_length():
+    a = "SELECT * FROM players WHERE id IN (?, ?, ?) AND nickname = 'Ann'"
+    b = "SELECT *  FROM players\n WHERE id IN (?, ?) AND nickname = 'Bob'"
+    assert normalize(a) == "SELECT * FROM players WHERE id IN (?...) AND nickname = ?"
+    assert fingerprint(a) == fingerprint(b)
+    assert fingerprint(a) != fingerprint("SELECT * FROM worlds WHERE id IN (?, ?)")
+
+
+def test_slow_statements_are_logged_with_their_plan(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'slow.db'}")
+    Base.metadata.create_all(bind=engine)
+    log_path = tmp_path / "slow.log"
+    slow_log = SlowQueryLog(str(log_path), threshold_ms=0, max_bytes=1_000_000, backup_count=2).install(engine)
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT id FROM players WHERE world_id = :w"), {"w": 7}).all()
+    finally:
+        slow_log.uninstall()
+        engine.dispose()
+
+    entries = [e for e in read_entries(log_path) if "FROM players" in e["statement"]]
+    assert len(entries) == 1
+    entry = entries[0]
+    assert entry["route"] is None
+    assert entry["params"] == "(7,)"
+    assert entry["fingerprint"] == fingerprint(entry["statement"])
+    assert any("ix_players_world_id" in line for line in entry["plan"]), entry["plan"]
+
+
+def test_entries_carry_the_route_template(tmp_path):
+    world = client.post("/api/worlds", json={"name": "Slow"}).json()
+    log_path = tmp_path / "slow.log"
+    slow_log = SlowQueryLog(str(log_path), threshold_ms=0, max_bytes=1_000_000, backup_count=2).install(_test_engine)
+    try:
+        assert client.get(f"/api/worlds/{world['id']}").status_code == 200
+    finally:
+        slow_log.uninstall()
+
+    routes = {e["route"] for e in read_entries(log_path)}
+    assert routes == {"GET /api/worlds/{world_id}"}
+
+
+def test_summary_groups_by_fingerprint(tmp_path):
+    log_path = tmp_path / "slow.log"
+    rows = [
+        {"ms": 120.0, "route": "GET /a", "statement": "SELECT 1 FROM t WHERE id = ?", "plan": ["SCAN t"]},
+        {"ms": 300.0, "route": "GET /b", "statement": "SELECT 1 FROM t WHERE id = ?", "plan": ["SCAN t"]},
+        {"ms": 150.0, "route": None, "statement": "UPDATE t SET x = ?", "plan": []},
+    ]
+    (tmp_path / "slow.log.1").write_text(json.dumps({**rows[0], "fingerprint": fingerprint(rows[0]["statement"])}) + "\n")
+    log_path.write_text("".join(json.dumps({**r, "fingerprint": fingerprint(r["statement"])}) + "\n" for r in rows[1:]))
+
+    summary = {g["statement"]: g for g in summarize(read_entries(log_path))}
+    select = summary["SELECT ? FROM t WHERE id = ?"]
+    assert (select["count"], select["total_ms"], select["max_ms"]) == (2, 420.0, 300.0)
+    assert select["routes"] == {"GET /a": 1, "GET /b": 1}
+    assert select["slowest"]["route"] == "GET /b"
+    assert summary["UPDATE t SET x = ?"]["routes"] == {"(no request)": 1}
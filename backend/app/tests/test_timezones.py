@@ -0,0 +1,20 @@
+from datetime import date, datetime, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from app.timezones import DEFAULT_TZ, TimeZoneError, local_date, zone
+
+
+def test_local_date_treats_naive_times_as_utc():
+    # 14:30 UTC is already the next day in Brisbane (UTC+10)
+    assert local_date(datetime(2026, 10, 20, 14, 30)) == date(2026, 10, 21)
+    assert local_date(datetime(2026, 10, 20, 14, 30, tzinfo=timezone.utc)) == date(2026, 10, 21)
+    assert local_date(datetime(2026, 10, 20, 2, 0), ZoneInfo("America/Los_Angeles")) == date(2026, 10, 19)
+
+
+def test_zone_lookup():
+    assert zone(None) is DEFAULT_TZ
+    assert zone("America/Los_Angeles") == ZoneInfo("America/Los_Angeles")
+    with pytest.raises(TimeZoneError):
+        zone("Mars/Olympus")
@@ -0,0 +1,91 @@
+"""Request tracing: span nesting, sampling and the offline breakdown."""
+from contextlib import contextmanager
+
+from app.tracing import Tracer, breakdown, read_traces, root_of
+from .conftest import client, _test_engine
+
+
+@contextmanager
+def _tracing(path, sample_rate=1.0, slow_request_ms=0.0):
+    tracer = Tracer(str(path), sample_rate, slow_request_ms, max_bytes=10_000_000, backup_count=1)
+    tracer.install(_test_engine)
+    try:
+        yield tracer
+    finally:
+        tracer.uninstall()
+
+
+def _player():
+    world = client.post("/api/worlds", json={"name": "Traced"}).json()
+    return client.post("/api/players", json={"nickname": "Tess", "world_id": world["id"]}).json()
+
+
+def _submit(player_id, **headers):
+    return client.post("/api/sessions?sync=true", headers=headers, json={
+        "player_id": player_id, "mode": "read", "difficulty": "hour",
+        "questions": 10, "correct": 9, "hints_used": 0, "max_streak": 6, "avg_response_ms": 3000,
+    })
+
+
+def test_session_submit_is_traced_from_request_to_sql(tmp_path):
+    player = _player()
+    path = tmp_path / "traces.jsonl"
+    with _tracing(path):
+        assert _submit(player["id"]).status_code == 200
+
+    traces = list(read_traces(path))
+    assert len(traces) == 1
+    spans = traces[0]
+    root = root_of(spans)
+    assert root["name"] == "POST /api/sessions"
+    assert root["attributes"]["http.response.status_code"] == 200
+    assert root["attributes"]["sampled"] is True
+
+    by_id = {s["span_id"]: s for s in spans}
+    top = {s["name"] for s in spans if s["parent_id"] == root["span_id"]}
+    assert {"raw_session_points", "award_session_points", "record_points", "commit",
+            "update_quest_progress", "generate_quests"} <= top
+    # The session INSERT is flushed by the commit, so it nests under it
+    insert = next(s for s in spans if s["attributes"].get("db.statement", "").startswith("INSERT INTO sessions"))
+    assert by_id[insert["parent_id"]]["name"] == "commit"
+    assert all(s["parent_id"] in by_id for s in spans if s is not root)
+
+    rows = {r["name"]: r for r in breakdown(spans)}
+    # Scoring is pure CPU; the award's UPDATEs are counted as its own I/O
+    assert rows["raw_session_points"]["io_ms"] == 0
+    assert 0 < rows["award_session_points"]["io_ms"] <= rows["award_session_points"]["ms"]
+    assert rows["commit"]["io_ms"] == rows["commit"]["ms"]
+    assert 0 < rows["generate_quests"]["io_ms"] <= rows["generate_quests"]["ms"]
+    assert abs(sum(r["ms"] for r in rows.values()) - root["ms"]) < 0.01
+
+
+def test_sampling_and_slow_request_capture(tmp_path):
+    player = _player()
+    unsampled = tmp_path / "unsampled.jsonl"
+    with _tracing(unsampled, sample_rate=0.0):
+        _submit(player["id"])
+    assert list(read_traces(unsampled)) == []
+
+    slow = tmp_path / "slow.jsonl"
+    with _tracing(slow, sample_rate=0.0, slow_request_ms=0.001):
+        _submit(player["id"])
+    (spans,) = read_traces(slow)
+    assert root_of(spans)["attributes"]["sampled"] is False
+
+
+def test_traceparent_is_honoured(tmp_path):
+    player = _player()
+    path = tmp_path / "traces.jsonl"
+    trace_id, parent_id = "4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7"
+    with _tracing(path, sample_rate=0.0):
+        _submit(player["id"], traceparent=f"00-{trace_id}-{parent_id}-01")
+    (spans,) = read_traces(path)
+    root = root_of(spans)
+    assert root["trace_id"] == trace_id
+    assert root["parent_id"] == parent_id
+
+    # An upstream decision not to sample wins over the local sample rate
+    declined = tmp_path / "declined.jsonl"
+    with _tracing(declined, sample_rate=1.0):
+        _submit(player["id"], traceparent=f"00-{trace_id}-{parent_id}-00")
+    assert list(read_traces(declined)) == []
@@ -1,5 +1,20 @@
+import asyncio
+import json
+from dataclasses import asdict, replace
+
+import pytest
+from sqlalchemy import literal, select
+
+from app.models import Player
+from app.scoring import tier_ceiling_sql
+from app.tier_config import reload_tier_config, watch_tier_config
 from app.tiers import (
     TIERS,
+    TierConfigError,
+    compile_tiers,
+    current_table,
+    install_tier_table,
+    load_tier_file,
     MAX_TIER,
     get_tier,
     get_tier_name,
@@ -10,6 +25,8 @@ from app.tiers import (
     validate_trial,
     tier_list_for_api,
 )
+from app.trial_stats import rebuild_world_stats, world_tier_summary
+from .conftest import client, _TestSessionLocal
 
 
 def test_stone_trial_pass():
@@ -91,3 +108,225 @@ def test_tier_list_for_api():
         assert "min_power" in item
         assert "max_power" in item
         assert "skill" in item
+
+
+@pytest.fixture
+def restore_tiers():
+    original = current_table()
+    yield
+    install_tier_table(original)
+
+
+def _config(**stone_changes) -> dict:
+    tiers = [asdict(t) for t in TIERS]
+    tiers[1].update(stone_changes)
+    return {"tiers": tiers}
+
+
+def test_builtin_tiers_round_trip_through_json(tmp_path):
+    path = tmp_path / "tiers.json"
+    path.write_text(json.dumps(_config()))
+    assert load_tier_file(path).tiers == tuple(TIERS)
+
+
+def test_toml_config_replaces_lookups(tmp_path, restore_tiers):
+    path = tmp_path / "tiers.toml"
+    path.write_text(
+        '[[tiers]]\nindex = 0\nname = "Sand"\ncolor = "#EEDD88"\nmin_power = 0\nmax_power = 49\n'
+        'quest_run_mix = { hour = 1.0 }\n'
+        '[[tiers]]\nindex = 1\nname = "Glass"\ncolor = "#AADDFF"\nmin_power = 50\nmax_power = 100\n'
+        '[tiers.trial]\ndifficulty = "hour"\nquestions = 5\nmin_correct = 4\nmax_hints = 1\nspeed_gate = false\n'
+    )
+    assert reload_tier_config(str(path))
+
+    assert get_tier_name(0) == "Sand"
+    assert get_tier_ceiling(0) == 50
+    assert get_tier_ceiling(5) == 100
+    assert validate_trial(tier_index=1, correct=4, hints_used=1, time_ms=None) is True
+    db = _TestSessionLocal()
+    try:
+        assert db.scalar(select(tier_ceiling_sql(literal(0)))) == 50
+    finally:
+        db.close()
+    assert [t["name"] for t in client.get("/api/tiers").json()] == ["Sand", "Glass"]
+
+
+@pytest.mark.parametrize("changes", [
+    {"min_power": 150},
+    {"trial": None},
+    {"quest_run_mix": {"hour": 0.5, "half": 0.2}},
+    {"set_clock_advanced_hint_progress_threshold": 120},
+    {"mystery": 1},
+    {"min_power": "100"},
+    {"name": 5},
+    {"set_clock_advanced_hint_penalty": True},
+    {"trial": {"difficulty": "hour", "questions": "10", "min_correct": 9, "max_hints": 3, "speed_gate": False}},
+    {"trial": {"difficulty": "hour", "questions": 10, "min_correct": 9, "max_hints": 3, "speed_gate": "no"}},
+])
+def test_invalid_config_keeps_current_table(tmp_path, restore_tiers, changes):
+    path = tmp_path / "tiers.json"
+    path.write_text(json.dumps(_config(**changes)))
+    before = current_table()
+    with pytest.raises(TierConfigError):
+        load_tier_file(path)
+    assert reload_tier_config(str(path)) is False
+    assert current_table() is before
+
+
+def test_watcher_swaps_table_when_file_changes(tmp_path, restore_tiers):
+    path = tmp_path / "tiers.json"
+    path.write_text(json.dumps(_config()))
+    install_tier_table(load_tier_file(path))
+
+    async def scenario():
+        watcher = asyncio.create_task(watch_tier_config(str(path), poll_seconds=0.01))
+        await asyncio.sleep(0.05)
+        path.write_text(json.dumps(_config(name="Cobblestone")))
+        for _ in range(200):
+            if get_tier_name(1) == "Cobblestone":
+                break
+            await asyncio.sleep(0.01)
+        watcher.cancel()
+
+    asyncio.run(scenario())
+    assert get_tier_name(1) == "Cobblestone"
+
+
+def test_watcher_survives_a_failing_poll(tmp_path, restore_tiers, monkeypatch):
+    from app import tier_config
+
+    path = tmp_path / "tiers.json"
+    path.write_text(json.dumps(_config()))
+    install_tier_table(load_tier_file(path))
+    real_reload = tier_config.reload_in_background
+    calls = []
+
+    async def flaky_reload(target):
+        calls.append(target)
+        if len(calls) == 1:
+            raise RuntimeError("worker thread unavailable")
+        return await real_reload(target)
+
+    monkeypatch.setattr(tier_config, "reload_in_background", flaky_reload)
+
+    async def scenario():
+        watcher = asyncio.create_task(watch_tier_config(str(path), poll_seconds=0.01))
+        await asyncio.sleep(0.05)
+        path.write_text(json.dumps(_config(name="Cobble")))
+        await asyncio.sleep(0.05)
+        path.write_text(json.dumps(_config(name="Cobblestone")))
+        for _ in range(200):
+            if get_tier_name(1) == "Cobblestone":
+                break
+            await asyncio.sleep(0.01)
+        assert not watcher.done()
+        watcher.cancel()
+
+    asyncio.run(scenario())
+    assert len(calls) >= 2
+    assert get_tier_name(1) == "Cobblestone"
+
+
+def test_briefing_and_legacy_lookups_follow_a_reload(tmp_path, restore_tiers):
+    from app import tier_trials
+
+    path = tmp_path / "tiers.json"
+    path.write_text(json.dumps({"tiers": [asdict(t) for t in TIERS[:3]]}))
+    assert reload_tier_config(str(path))
+    assert tier_trials.TIER_NAMES == {0: "Wood", 1: "Stone", 2: "Coal"}
+
+    w = client.post("/api/worlds", json={"name": "W"}).json()
+    p = client.post("/api/players", json={"nickname": "Top", "world_id": w["id"]}).json()
+    db = _TestSessionLocal()
+    try:
+        db.query(Player).filter(Player.id == p["id"]).update({"current_tier": 2, "clock_power": 250.0})
+        db.commit()
+    finally:
+        db.close()
+    briefing = client.get(f"/api/players/{p['id']}/briefing").json()
+    assert briefing["tier_name"] == "Coal"
+    assert briefing["next_tier_name"] is None
+    assert briefing["next_tier_threshold"] is None
+    assert briefing["tier_progress_pct"] == 50.5  # (250 - 200) / (299 - 200)
+
+
+def test_compiled_table_is_immutable():
+    table = compile_tiers([replace(t) for t in TIERS])
+    with pytest.raises(AttributeError):
+        table.tiers = ()
+    assert isinstance(table.tiers, tuple)
+
+
+def _trial_world():
+    w = client.post("/api/worlds", json={"name": "Trials"}).json()
+    players = [client.post("/api/players", json={"nickname": n, "world_id": w["id"]}).json() for n in "ABC"]
+    db = _TestSessionLocal()
+    try:
+        db.query(Player).filter(Player.world_id == w["id"]).update({"clock_power": 150.0})
+        db.commit()
+    finally:
+        db.close()
+    return w, players
+
+
+def _attempt(player_id, tier, correct):
+    r = client.post("/api/trials", json={
+        "player_id": player_id, "tier": tier, "questions": 10, "correct": correct, "hints_used": 0,
+    })
+    assert r.status_code == 200
+    return r.json()
+
+
+def _counters(world_id):
+    db = _TestSessionLocal()
+    try:
+        return [
+            (s.tier, s.attempts, s.passes, s.players_attempted, s.players_passed, s.questions, s.correct)
+            for s in world_tier_summary(db, world_id)
+        ]
+    finally:
+        db.close()
+
+
+def test_player_trial_history_and_world_summary():
+    w, (a, b, c) = _trial_world()
+    assert not _attempt(a["id"], 1, 5)["passed"]
+    assert _attempt(a["id"], 1, 9)["passed"]
+    assert not _attempt(b["id"], 1, 6)["passed"]
+    assert not _attempt(b["id"], 1, 7)["passed"]
+
+    history = client.get(f"/api/players/{a['id']}/trials").json()
+    assert [t["correct"] for t in history["trials"]] == [9, 5]
+    (stone,) = history["tiers"]
+    assert (stone["tier"], stone["tier_name"], stone["attempts"], stone["passes"], stone["best_correct"]) == (
+        1, "Stone", 2, 1, 9,
+    )
+    assert client.get(f"/api/players/{c['id']}/trials").json() == {"player_id": c["id"], "tiers": [], "trials": []}
+    assert client.get(f"/api/players/{a['id']}/trials", params={"tier": 2}).json()["trials"] == []
+    assert client.get("/api/players/99999/trials").status_code == 404
+
+    (summary,) = client.get(f"/api/worlds/{w['id']}/trials").json()
+    assert summary == {
+        "tier": 1, "tier_name": "Stone", "attempts": 4, "passes": 1, "pass_rate_pct": 25.0,
+        "players_attempted": 2, "players_passed": 1, "accuracy_pct": 67.5,
+    }
+    assert client.get("/api/worlds/99999/trials").status_code == 404
+
+
+def test_world_trial_counters_match_a_rebuild_and_follow_player_deletes():
+    w, (a, b, _) = _trial_world()
+    _attempt(a["id"], 1, 5)
+    _attempt(a["id"], 1, 10)
+    _attempt(b["id"], 1, 3)
+    counted = _counters(w["id"])
+
+    db = _TestSessionLocal()
+    try:
+        rebuild_world_stats(db, w["id"])
+        db.commit()
+    finally:
+        db.close()
+    assert _counters(w["id"]) == counted == [(1, 3, 1, 2, 1, 30, 18)]
+
+    assert client.delete(f"/api/players/{b['id']}").status_code == 200
+    assert _counters(w["id"]) == [(1, 2, 1, 1, 1, 20, 15)]
@@ -0,0 +1,153 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models import TierTrial, World
+from .conftest import client, _TestSessionLocal
+
+
+def _populated_world():
+    w = client.post("/api/worlds", json={"name": "Export Me", "pin": "1234"}).json()
+    players = [
+        client.post("/api/players", json={"nickname": name, "world_id": w["id"]}).json()
+        for name in ["A", "B"]
+    ]
+    for p in players:
+        client.post("/api/sessions", json={
+            "player_id": p["id"], "mode": "read", "difficulty": "hour",
+            "questions": 10, "correct": 9, "avg_response_ms": 1500,
+        })
+        now = datetime.now(timezone.utc)
+        client.post("/api/challenges/quest-run", json={
+            "player_id": p["id"],
+            "started_at": (now - timedelta(minutes=10)).isoformat(),
+            "ended_at": now.isoformat(),
+            "duration_seconds": 600,
+            "completed": True,
+        })
+    return w, players
+
+
+def test_export_streams_ndjson():
+    w, players = _populated_world()
+    r = client.get(f"/api/worlds/{w['id']}/export")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+
+    records = [json.loads(line) for line in r.text.splitlines()]
+    assert records[0]["type"] == "header"
+    assert records[1] == {"type": "world", "data": records[1]["data"]}
+    types = [rec["type"] for rec in records[2:]]
+    assert types.count("players") == 2
+    assert types.count("sessions") == 2
+    assert types.count("quest_runs") == 2
+    # parents come before children
+    assert types.index("players") < types.index("sessions")
+
+
+def test_export_unknown_world():
+    assert client.get("/api/worlds/999/export").status_code == 404
+
+
+def test_import_round_trip_remaps_ids():
+    w, players = _populated_world()
+    body = client.get(f"/api/worlds/{w['id']}/export").content
+
+    r = client.post("/api/worlds/import", content=body, headers={"Content-Type": "application/x-ndjson"})
+    assert r.status_code == 200
+    result = r.json()
+    new_world = result["world"]
+    assert new_world["id"] != w["id"]
+    assert new_world["name"] == "Export Me"
+    assert new_world["join_code"] != w["join_code"]
+    assert result["counts"]["players"] == 2
+    assert result["counts"]["sessions"] == 2
+
+    imported = client.get(f"/api/players/world/{new_world['id']}").json()
+    assert sorted(p["nickname"] for p in imported) == ["A", "B"]
+    assert {p["id"] for p in imported}.isdisjoint({p["id"] for p in players})
+    assert all(p["clock_power"] > 0 for p in imported)
+
+    # A second export of the imported world has the same shape
+    again = client.get(f"/api/worlds/{new_world['id']}/export").text.splitlines()
+    assert len(again) == len(body.decode().splitlines())
+
+
+def test_import_rebuilds_world_trial_counters():
+    w, players = _populated_world()
+    db = _TestSessionLocal()
+    try:
+        db.add_all([
+            TierTrial(player_id=players[0]["id"], tier=1, passed=False, questions=10, correct=6),
+            TierTrial(player_id=players[0]["id"], tier=1, passed=True, questions=10, correct=10),
+        ])
+        db.commit()
+    finally:
+        db.close()
+    body = client.get(f"/api/worlds/{w['id']}/export").content
+
+    new_world = client.post("/api/worlds/import", content=body).json()["world"]
+    (summary,) = client.get(f"/api/worlds/{new_world['id']}/trials").json()
+    assert (summary["attempts"], summary["passes"], summary["players_attempted"]) == (2, 1, 1)
+
+
+def test_import_rejects_malformed_stream():
+    r = client.post("/api/worlds/import", content=b'{"type": "world", "data": {}}\n')
+    assert r.status_code == 400
+
+    header = json.dumps({"type": "header", "format": "clockquest-world", "version": 1})
+    r = client.post("/api/worlds/import", content=f"{header}\nnot json\n".encode())
+    assert r.status_code == 400
+
+
+def test_import_turns_schema_violations_into_400():
+    header = json.dumps({"type": "header", "format": "clockquest-world", "version": 1})
+    nameless = json.dumps({"type": "world", "data": {"join_code": "NoName"}})
+    r = client.post("/api/worlds/import", content=f"{header}\n{nameless}\n".encode())
+    assert r.status_code == 400
+    assert "world rejected" in r.json()["detail"]
+
+    # An old export with two active cards of one type hits the partial unique index
+    card = {"player_id": 1, "quest_type": "daily_play", "description": "Play", "target": 10,
+            "completed": False, "local_date": "2026-01-05"}
+    lines = [
+        header,
+        json.dumps({"type": "world", "data": {"name": "Dupes"}}),
+        json.dumps({"type": "players", "data": {"id": 1, "nickname": "A"}}),
+        json.dumps({"type": "quests", "data": card}),
+        json.dumps({"type": "quests", "data": card}),
+    ]
+    r = client.post("/api/worlds/import", content="\n".join(lines).encode())
+    assert r.status_code == 400
+    assert "quests" in r.json()["detail"]
+    # Rolled back: the world row from the same import is gone
+    db = _TestSessionLocal()
+    try:
+        assert db.query(World).filter(World.name == "Dupes").count() == 0
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize("record_type, data", [
+    # A list cannot be bound at all
+    ("sessions", {"mode": "read", "difficulty": "hour", "questions": [10], "correct": 5}),
+    # Rejected by the Boolean type
+    ("quests", {"quest_type": "daily_play", "description": "Play", "target": 10, "completed": "yes",
+                "local_date": "2026-01-05"}),
+])
+def test_import_turns_type_invalid_rows_into_400(record_type, data):
+    lines = [
+        json.dumps({"type": "header", "format": "clockquest-world", "version": 1}),
+        json.dumps({"type": "world", "data": {"name": "Typed"}}),
+        json.dumps({"type": "players", "data": {"id": 1, "nickname": "A"}}),
+        json.dumps({"type": record_type, "data": {"player_id": 1, **data}}),
+    ]
+    r = client.post("/api/worlds/import", content="\n".join(lines).encode())
+    assert r.status_code == 400, r.text
+    assert record_type in r.json()["detail"]
+    db = _TestSessionLocal()
+    try:
+        assert db.query(World).filter(World.name == "Typed").count() == 0
+    finally:
+        db.close()
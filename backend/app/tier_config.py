@@ -0,0 +1,106 @@
+"""Hot reload of the tier configuration file.
+
+While the app runs, ``watch_tier_config`` polls the file's mtime and size. On
+a change, or on SIGHUP, the file is parsed and validated in a worker thread
+and the compiled ``TierTable`` is swapped in with ``tiers.install_tier_table``.
+Requests never wait on a reload: they keep reading the table they already
+have until the new reference is assigned. An invalid file is logged and
+ignored, and the previous table stays active. So is any unexpected failure
+during a poll: the watcher logs it and keeps polling.
+
+Run from backend/:
+    python -m app.tier_config --dump tiers.json     # write the built-in tiers
+    python -m app.tier_config --check tiers.toml    # validate a file
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import signal
+from dataclasses import asdict
+
+from .tiers import TIERS, TierConfigError, install_tier_table, load_tier_file
+
+logger = logging.getLogger(__name__)
+
+
+def reload_tier_config(path: str) -> bool:
+    """Load ``path`` and make it the active tier table. Returns False if it was rejected."""
+    try:
+        table = load_tier_file(path)
+    except (OSError, TierConfigError) as exc:
+        logger.error("Tier config reload rejected, keeping current tiers: %s", exc)
+        return False
+    except Exception:
+        logger.exception("Tier config reload failed, keeping current tiers")
+        return False
+    install_tier_table(table)
+    logger.info("Loaded %d tiers from %s", len(table.tiers), path)
+    return True
+
+
+def _stamp(path: str) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+async def reload_in_background(path: str) -> bool:
+    return await asyncio.to_thread(reload_tier_config, path)
+
+
+async def watch_tier_config(path: str, poll_seconds: float) -> None:
+    """Background task: reload ``path`` whenever it changes on disk."""
+    last = _stamp(path)
+    while True:
+        await asyncio.sleep(poll_seconds)
+        try:
+            stamp = _stamp(path)
+            if stamp is not None and stamp != last:
+                last = stamp
+                await reload_in_background(path)
+        except Exception:
+            logger.exception("Tier config poll failed, keeping current tiers")
+
+
+def install_reload_signal(path: str) -> bool:
+    """Reload on SIGHUP. Returns False where signal handlers are unavailable."""
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(signal.SIGHUP, lambda: loop.create_task(reload_in_background(path)))
+    except (AttributeError, NotImplementedError, RuntimeError):
+        return False
+    return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Inspect tier configuration files.")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--dump", metavar="PATH", help="write the built-in tiers as JSON ('-' for stdout)")
+    group.add_argument("--check", metavar="PATH", help="validate a JSON or TOML tier file")
+    args = parser.parse_args()
+
+    if args.dump:
+        text = json.dumps({"tiers": [asdict(t) for t in TIERS]}, indent=2, ensure_ascii=False) + "\n"
+        if args.dump == "-":
+            print(text, end="")
+        else:
+            with open(args.dump, "w", encoding="utf-8") as out:
+                out.write(text)
+        return
+
+    try:
+        table = load_tier_file(args.check)
+    except (OSError, TierConfigError) as exc:
+        raise SystemExit(f"Invalid: {exc}")
+    print(f"OK: {len(table.tiers)} tiers, top tier {table.tiers[-1].name!r}")
+
+
+if __name__ == "__main__":
+    main()
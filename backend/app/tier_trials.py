@@ -5,7 +5,8 @@ All tier data is defined in tiers.py (single source of truth).
 """
 
 from .tiers import (
-    TIERS,
+    current_table,
+    current_tiers,
     get_tier_name,
     get_tier_color,
     get_trial_config,
@@ -14,7 +15,16 @@ from .tiers import (
     validate_trial,
 )
 
-# Legacy dict-style lookups for existing code that uses TIER_NAMES[i] / TIER_COLORS[i]
-TIER_NAMES: dict[int, str] = {t.index: t.name for t in TIERS}
-TIER_COLORS: dict[int, str] = {t.index: t.color for t in TIERS}
-TRIAL_DEFINITIONS: dict[int, dict] = get_trial_definitions()
+
+def __getattr__(name: str):
+    """Legacy dict-style lookups (``TIER_NAMES[i]`` / ``TIER_COLORS[i]``).
+
+    Built from the active table on each access, so they follow tier config reloads.
+    """
+    if name == "TIER_NAMES":
+        return {t.index: t.name for t in current_table().tiers}
+    if name == "TIER_COLORS":
+        return {t.index: t.color for t in current_table().tiers}
+    if name == "TRIAL_DEFINITIONS":
+        return get_trial_definitions()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
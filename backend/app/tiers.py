@@ -2,9 +2,21 @@
 
 Single source of truth for tier names, colors, power thresholds,
 skills, and trial definitions. Add future game settings per tier here.
+
+``TIERS`` is the built-in tier list. A deployment can replace it with a JSON
+or TOML file (``settings.tier_config_path``). The file is validated and
+compiled into an immutable ``TierTable``, and the active table is swapped with a
+single assignment, so a lookup sees either the old table or the new one and
+never a mix of both. Helpers below always read the active table. Code that needs
+several lookups to agree should take one ``current_table()`` snapshot.
 """
 
+import json
+import tomllib
 from dataclasses import dataclass, field
+from pathlib import Path
+
+from .config import settings
 
 
 @dataclass(frozen=True)
@@ -241,11 +253,184 @@ TIERS: list[TierDefinition] = [
 MAX_TIER = len(TIERS) - 1
 
 
-# --- Helper lookups (derived from TIERS, not duplicated) ---
+# --- Compiled, swappable tier table ---
+
+class TierConfigError(ValueError):
+    """Raised when a tier configuration is malformed."""
+
+
+TRIAL_KEYS = {"difficulty", "questions", "min_correct", "max_hints", "speed_gate"}
+# Expected type of each trial value; a bool is not accepted where an int is
+TRIAL_TYPES = {"difficulty": str, "questions": int, "min_correct": int, "max_hints": int, "speed_gate": bool}
+_INT_FIELDS = (
+    "index", "min_power", "max_power",
+    "set_clock_advanced_hint_progress_threshold", "set_clock_advanced_hint_penalty",
+)
+_REQUIRED_FIELDS = {"index", "name", "color", "min_power", "max_power"}
+_ALL_FIELDS = set(TierDefinition.__dataclass_fields__)
+
+
+@dataclass(frozen=True)
+class TierTable:
+    """Immutable lookup structures compiled from a validated tier list."""
+    tiers: tuple[TierDefinition, ...]
+    ceilings: tuple[int, ...]
+    api_list: tuple[dict, ...]
+    source: str = "built-in"
+
+    @property
+    def max_tier(self) -> int:
+        return len(self.tiers) - 1
+
+
+def _is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _check_types(label: str, tier: TierDefinition) -> None:
+    """Reject wrongly typed fields up front, so later comparisons cannot raise TypeError."""
+    for name in _INT_FIELDS:
+        if not _is_int(getattr(tier, name)):
+            raise TierConfigError(f"{label}: {name} must be an integer")
+    for name in ("name", "color"):
+        if not isinstance(getattr(tier, name), str) or not getattr(tier, name):
+            raise TierConfigError(f"{label}: {name} must be a non-empty string")
+    if tier.skill is not None and not isinstance(tier.skill, str):
+        raise TierConfigError(f"{label}: skill must be a string")
+    if isinstance(tier.trial, dict):
+        for key, expected in TRIAL_TYPES.items():
+            value = tier.trial.get(key)
+            if key in tier.trial and not (_is_int(value) if expected is int else isinstance(value, expected)):
+                raise TierConfigError(f"{label}: trial {key} must be {expected.__name__}")
+
+
+def _check_mix(tier_name: str, name: str, mix) -> None:
+    if not isinstance(mix, dict) or not all(
+        isinstance(k, str) and isinstance(v, (int, float)) and not isinstance(v, bool) and v >= 0
+        for k, v in mix.items()
+    ):
+        raise TierConfigError(f"{tier_name}: {name} must map names to non-negative numbers")
+    if mix and abs(sum(mix.values()) - 1.0) > 1e-6:
+        raise TierConfigError(f"{tier_name}: {name} proportions must sum to 1.0")
+
+
+def _validate(tiers: list[TierDefinition]) -> None:
+    if not tiers:
+        raise TierConfigError("at least one tier is required")
+    for position, tier in enumerate(tiers):
+        label = f"tier {position} ({tier.name})"
+        _check_types(label, tier)
+        if tier.index != position:
+            raise TierConfigError(f"{label}: index must be {position}")
+        if tier.min_power > tier.max_power:
+            raise TierConfigError(f"{label}: min_power is above max_power")
+        expected_min = 0 if position == 0 else tiers[position - 1].max_power + 1
+        if tier.min_power != expected_min:
+            raise TierConfigError(f"{label}: min_power must be {expected_min}")
+        if position == 0 and tier.trial is not None:
+            raise TierConfigError(f"{label}: the starting tier cannot have a trial")
+        if position > 0:
+            trial = tier.trial
+            if not isinstance(trial, dict) or set(trial) != TRIAL_KEYS:
+                raise TierConfigError(f"{label}: trial must have exactly {sorted(TRIAL_KEYS)}")
+            if not 0 <= trial["min_correct"] <= trial["questions"] or trial["max_hints"] < 0:
+                raise TierConfigError(f"{label}: trial min_correct/max_hints out of range")
+        _check_mix(label, "quest_run_mix", tier.quest_run_mix)
+        _check_mix(label, "time_format_mix", tier.time_format_mix)
+        if not 0 <= tier.set_clock_advanced_hint_progress_threshold <= 100:
+            raise TierConfigError(f"{label}: set_clock_advanced_hint_progress_threshold must be 0-100")
+        if tier.set_clock_advanced_hint_penalty < 0:
+            raise TierConfigError(f"{label}: set_clock_advanced_hint_penalty must be >= 0")
+
+
+def compile_tiers(tiers: list[TierDefinition], source: str = "built-in") -> TierTable:
+    """Validate ``tiers`` and build the lookup table used by the helpers."""
+    _validate(tiers)
+    top = tiers[-1].max_power
+    return TierTable(
+        tiers=tuple(tiers),
+        ceilings=tuple(min(t.max_power + 1, top) for t in tiers),
+        api_list=tuple(
+            {
+                "index": t.index,
+                "name": t.name,
+                "color": t.color,
+                "min_power": t.min_power,
+                "max_power": t.max_power,
+                "skill": t.skill,
+                "quest_run_mix": t.quest_run_mix,
+                "time_format_mix": t.time_format_mix,
+                "set_clock_advanced_hint_progress_threshold": t.set_clock_advanced_hint_progress_threshold,
+                "set_clock_advanced_hint_penalty": t.set_clock_advanced_hint_penalty,
+            }
+            for t in tiers
+        ),
+        source=source,
+    )
+
+
+def parse_tier_config(data, source: str = "config") -> TierTable:
+    """Build a table from decoded JSON/TOML: ``{"tiers": [{...}, ...]}``."""
+    if not isinstance(data, dict) or not isinstance(data.get("tiers"), list):
+        raise TierConfigError("config must contain a 'tiers' list")
+    tiers = []
+    for position, raw in enumerate(data["tiers"]):
+        if not isinstance(raw, dict):
+            raise TierConfigError(f"tier {position}: expected a table/object")
+        missing, unknown = _REQUIRED_FIELDS - set(raw), set(raw) - _ALL_FIELDS
+        if missing or unknown:
+            raise TierConfigError(f"tier {position}: missing {sorted(missing)}, unknown {sorted(unknown)}")
+        try:
+            tiers.append(TierDefinition(**raw))
+        except TypeError as exc:
+            raise TierConfigError(f"tier {position}: {exc}") from exc
+    return compile_tiers(tiers, source)
+
+
+def load_tier_file(path: str | Path) -> TierTable:
+    """Read and validate a ``.toml`` or ``.json`` tier file."""
+    path = Path(path)
+    try:
+        if path.suffix == ".toml":
+            data = tomllib.loads(path.read_text())
+        else:
+            data = json.loads(path.read_text())
+    except (tomllib.TOMLDecodeError, json.JSONDecodeError) as exc:
+        raise TierConfigError(f"{path}: {exc}") from exc
+    try:
+        return parse_tier_config(data, source=str(path))
+    except TierConfigError as exc:
+        raise TierConfigError(f"{path}: {exc}") from exc
+
+
+_active = compile_tiers(TIERS)
+
+
+def current_table() -> TierTable:
+    return _active
+
+
+def install_tier_table(table: TierTable) -> TierTable:
+    """Make ``table`` the active one (a single atomic reference swap). Returns the previous table."""
+    global _active
+    previous, _active = _active, table
+    return previous
+
+
+if settings.tier_config_path:
+    install_tier_table(load_tier_file(settings.tier_config_path))
+
+
+# --- Helper lookups (read the active table, not TIERS directly) ---
+
+def current_tiers() -> tuple[TierDefinition, ...]:
+    return _active.tiers
+
 
 def get_tier(index: int) -> TierDefinition:
     """Get tier by index, clamped to valid range."""
-    return TIERS[max(0, min(index, MAX_TIER))]
+    table = _active
+    return table.tiers[max(0, min(index, table.max_tier))]
 
 
 def get_tier_name(index: int) -> str:
@@ -258,7 +443,8 @@ def get_tier_color(index: int) -> str:
 
 def get_tier_ceiling(tier_index: int) -> int:
     """Max clock power achievable at this tier (need trial to go beyond)."""
-    return min(get_tier(tier_index).max_power + 1, 1000)
+    table = _active
+    return table.ceilings[max(0, min(tier_index, table.max_tier))]
 
 
 def get_power_thresholds(tier_index: int) -> tuple[int, int]:
@@ -270,7 +456,7 @@ def get_power_thresholds(tier_index: int) -> tuple[int, int]:
 def get_mastered_skills(current_tier: int) -> list[str]:
     """Return skills the player has mastered based on their tier."""
     return [
-        t.skill for t in TIERS
+        t.skill for t in _active.tiers
         if t.skill is not None and t.index <= current_tier
     ]
 
@@ -290,7 +476,7 @@ def get_trial_definitions() -> dict[int, dict]:
     """Get all trial definitions as {tier_index: config} dict."""
     return {
         t.index: t.trial
-        for t in TIERS
+        for t in _active.tiers
         if t.trial is not None
     }
 
@@ -321,19 +507,4 @@ def tier_list_for_api() -> list[dict]:
     set_clock_advanced_hint_progress_threshold is a per-tier percentage (0-100)
     of progress within that tier where Set The Clock enters advanced hint mode.
     """
-    return [
-        {
-            "index": t.index,
-            "name": t.name,
-            "color": t.color,
-            "min_power": t.min_power,
-            "max_power": t.max_power,
-            "skill": t.skill,
-            "quest_run_mix": t.quest_run_mix,
-            "time_format_mix": t.time_format_mix,
-            "set_clock_advanced_hint_progress_threshold": t.set_clock_advanced_hint_progress_threshold,
-            "set_clock_advanced_hint_penalty": t.set_clock_advanced_hint_penalty,
-        }
-        for t in TIERS
-    ]
-
+    return list(_active.api_list)
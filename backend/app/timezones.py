@@ -0,0 +1,67 @@
+"""World calendars.
+
+Each world may set an IANA time zone (``worlds.time_zone``). Worlds without
+one use ``settings.default_time_zone``. Days, streaks and calendar buckets
+all follow the player's world calendar.
+
+Local dates are worked out once, when a row is written
+(``quest_runs.local_date``, ``quests.local_date``, the bucket key in
+``player_point_buckets``). Readers compare stored dates and never convert
+timestamps. A world's zone is fixed when it is created, so stored dates never
+go stale.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session as DbSession
+
+from .config import settings
+from .models import World
+
+DEFAULT_TZ = ZoneInfo(settings.default_time_zone)
+
+
+class TimeZoneError(ValueError):
+    """Raised for a time zone name the zoneinfo database does not know."""
+
+
+@lru_cache(maxsize=256)
+def zone(name: str | None) -> ZoneInfo:
+    """The ZoneInfo for a stored ``worlds.time_zone`` value (None -> default)."""
+    if not name:
+        return DEFAULT_TZ
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError) as exc:
+        raise TimeZoneError(f"Unknown time zone {name!r}") from exc
+
+
+def local_date(moment: datetime | None = None, tz: ZoneInfo = DEFAULT_TZ) -> date:
+    """Calendar date of ``moment`` (naive values are UTC) in ``tz``."""
+    if moment is None:
+        moment = datetime.now(timezone.utc)
+    elif moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(tz).date()
+
+
+def world_zone(db: DbSession, world_id: int) -> ZoneInfo:
+    return zone(db.execute(select(World.time_zone).where(World.id == world_id)).scalar())
+
+
+def zone_groups(db: DbSession) -> list[tuple[ZoneInfo, object]]:
+    """(zone, SELECT of the ids of worlds on it) for every calendar in use."""
+    names = set(db.execute(select(World.time_zone).distinct()).scalars())
+    groups = []
+    for name in {settings.default_time_zone if not n else n for n in names} or {settings.default_time_zone}:
+        if name == settings.default_time_zone:
+            matches = or_(World.time_zone.is_(None), World.time_zone == name)
+        else:
+            matches = World.time_zone == name
+        groups.append((zone(name), select(World.id).where(matches)))
+    return groups
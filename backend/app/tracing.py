@@ -0,0 +1,468 @@
+"""Request tracing: a span tree per sampled request, exported as OTLP/JSON.
+
+``TracingMiddleware`` opens a server span for each HTTP request it samples.
+Nested spans come from:
+- ``@traced`` functions (the scoring and quest engine entry points);
+- ``Session.commit`` (flush plus COMMIT, so its INSERTs nest under it);
+- every SQL statement on the installed engines.
+
+The current span lives in a context variable. It follows the request into
+the threadpool where sync endpoints run, like ``request_context.current_scope``.
+When a request is not sampled no span is current, and every hook returns
+straight away.
+
+Sampling is decided per request:
+- a valid W3C ``traceparent`` header decides on its own: traced (keeping its
+  trace id) when its sampled flag is set, not traced when it is clear;
+- a request without one is traced with probability ``trace_sample_rate``;
+- with ``trace_slow_request_ms`` set, every request is recorded and unsampled
+  ones are kept only if they took at least that long. This costs a span
+  object per statement on every request.
+
+Each finished trace is one line in the file: an OTLP
+``ExportTraceServiceRequest`` in JSON, which is the format the OpenTelemetry
+Collector's file exporter writes and its ``otlpjsonfile`` receiver reads.
+Lines go through a ``QueueHandler`` like the slow-query log, so request
+threads never wait on file I/O.
+
+Run from backend/ to break down the slowest traced requests:
+    python -m app.tracing [FILE] [--route "POST /api/sessions"] [--top N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .request_context import route_label
+from .slow_queries import read_entries
+
+logger = logging.getLogger("clockquest.traces")
+
+SERVICE_NAME = "clockquest"
+MAX_STATEMENT_CHARS = 1000
+# OTLP span kinds and status codes
+KIND_INTERNAL, KIND_SERVER, KIND_CLIENT = 1, 2, 3
+STATUS_ERROR = 2
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class _Trace:
+    __slots__ = ("trace_id", "sampled", "spans")
+
+    def __init__(self, trace_id: str, sampled: bool):
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.spans: list[Span] = []
+
+
+class Span:
+    __slots__ = ("trace", "name", "span_id", "parent_id", "kind", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, trace: _Trace, name: str, parent_id: str | None, kind: int = KIND_INTERNAL,
+                 attributes: dict | None = None):
+        self.trace = trace
+        self.name = name
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.error: str | None = None
+        self.end_ns: int | None = None
+        self.start_ns = time.time_ns()
+        trace.spans.append(self)
+
+    def child(self, name: str, kind: int = KIND_INTERNAL, attributes: dict | None = None) -> "Span":
+        return Span(self.trace, name, self.span_id, kind, attributes)
+
+    def end(self, error: str | None = None) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.error = self.error or error
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+
+_current: ContextVar[Span | None] = ContextVar("current_span", default=None)
+_active: "Tracer | None" = None
+
+
+def current_span() -> Span | None:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Child span of the current one; does nothing when the request is not traced."""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    child = parent.child(name, attributes=attributes)
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as exc:
+        child.end(error=repr(exc))
+        raise
+    finally:
+        _current.reset(token)
+        child.end()
+
+
+def traced(name: str | None = None):
+    """Decorator: run the function in a span named after it (or ``name``)."""
+    def decorate(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def run(*args, **kwargs):
+            if _current.get() is None:
+                return fn(*args, **kwargs)
+            with span(label):
+                return fn(*args, **kwargs)
+        return run
+    return decorate
+
+
+def _attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def to_otlp(trace: _Trace) -> dict:
+    """The trace as an OTLP ``ExportTraceServiceRequest`` (protobuf JSON mapping)."""
+    spans = []
+    for s in trace.spans:
+        record = {
+            "traceId": trace.trace_id,
+            "spanId": s.span_id,
+            "name": s.name,
+            "kind": s.kind,
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns or s.start_ns),
+            "attributes": [_attribute(k, v) for k, v in s.attributes.items()],
+        }
+        if s.parent_id:
+            record["parentSpanId"] = s.parent_id
+        if s.error:
+            record["status"] = {"code": STATUS_ERROR, "message": s.error}
+        spans.append(record)
+    return {"resourceSpans": [{
+        "resource": {"attributes": [_attribute("service.name", SERVICE_NAME)]},
+        "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+    }]}
+
+
+class Tracer:
+    """Samples requests, instruments engines and sessions, and writes finished traces."""
+
+    def __init__(self, path: str, sample_rate: float, slow_request_ms: float, max_bytes: int, backup_count: int):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.slow_request_ms = slow_request_ms
+        self.engines = []
+        file_handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True,
+        )
+        file_handler.setFormatter(logging.Formatter("%(message)s"))
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._handler = logging.handlers.QueueHandler(self._queue)
+        self._listener = logging.handlers.QueueListener(self._queue, file_handler)
+
+    def install(self, *engines) -> "Tracer":
+        global _active
+        for target in dict.fromkeys(engines):  # the same engine may be passed twice
+            event.listen(target, "before_cursor_execute", self._sql_started)
+            event.listen(target, "after_cursor_execute", self._sql_finished)
+            event.listen(target, "handle_error", self._sql_failed)
+            self.engines.append(target)
+        event.listen(Session, "before_commit", self._commit_started)
+        event.listen(Session, "after_commit", self._commit_finished)
+        event.listen(Session, "after_rollback", self._commit_failed)
+        logger.addHandler(self._handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        self._listener.start()
+        _active = self
+        return self
+
+    def uninstall(self) -> None:
+        global _active
+        if _active is self:
+            _active = None
+        for target in self.engines:
+            event.remove(target, "before_cursor_execute", self._sql_started)
+            event.remove(target, "after_cursor_execute", self._sql_finished)
+            event.remove(target, "handle_error", self._sql_failed)
+        self.engines = []
+        event.remove(Session, "before_commit", self._commit_started)
+        event.remove(Session, "after_commit", self._commit_finished)
+        event.remove(Session, "after_rollback", self._commit_failed)
+        logger.removeHandler(self._handler)
+        self._listener.stop()  # flushes queued traces
+
+    def start_request(self, scope) -> Span | None:
+        """Root span for an HTTP request, or None when it is not recorded."""
+        trace_id, parent_id, sampled = None, None, None
+        for key, value in scope.get("headers", ()):
+            if key == b"traceparent":
+                match = _TRACEPARENT.match(value.decode("latin-1").strip().lower())
+                if match:
+                    trace_id, parent_id = match.group(1), match.group(2)
+                    sampled = int(match.group(3), 16) & 1 == 1
+                break
+        if sampled is None:
+            sampled = random.random() < self.sample_rate
+        if not sampled and self.slow_request_ms <= 0:
+            return None
+        trace = _Trace(trace_id or f"{random.getrandbits(128):032x}", sampled)
+        return Span(trace, route_label(scope) or "http", parent_id, KIND_SERVER, {
+            "http.request.method": scope.get("method", ""),
+            "url.path": scope.get("path", ""),
+        })
+
+    def finish_request(self, root: Span, scope, status: int | None) -> None:
+        route = getattr(scope.get("route"), "path", None)
+        if route:
+            root.name = route_label(scope)
+            root.attributes["http.route"] = route
+        if status is not None:
+            root.attributes["http.response.status_code"] = status
+            if status >= 500:
+                root.error = root.error or f"HTTP {status}"
+        root.end()
+        trace = root.trace
+        if not trace.sampled and root.duration_ms < self.slow_request_ms:
+            return
+        root.attributes["sampled"] = trace.sampled
+        logger.info(json.dumps(to_otlp(trace), separators=(",", ":")))
+
+    def _sql_started(self, conn, cursor, statement, parameters, context, executemany):
+        parent = _current.get()
+        if parent is None:
+            return
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "SQL"
+        conn.info["trace_sql_span"] = parent.child(f"sql {operation}", KIND_CLIENT, {
+            "db.system": "sqlite",
+            "db.operation": operation,
+            "db.statement": statement[:MAX_STATEMENT_CHARS],
+            "db.executemany": executemany,
+        })
+
+    def _sql_finished(self, conn, cursor, statement, parameters, context, executemany):
+        sql_span = conn.info.pop("trace_sql_span", None)
+        if sql_span is not None:
+            sql_span.end()
+
+    def _sql_failed(self, context):
+        conn = context.connection
+        sql_span = conn.info.pop("trace_sql_span", None) if conn is not None else None
+        if sql_span is not None:
+            sql_span.end(error=repr(context.original_exception))
+
+    # The commit span is made current so the flush's statements nest under it.
+    def _commit_started(self, session):
+        parent = _current.get()
+        if parent is None:
+            return
+        commit = parent.child("commit")
+        session.info["trace_commit"] = (commit, parent)
+        _current.set(commit)
+
+    def _commit_finished(self, session):
+        started = session.info.pop("trace_commit", None)
+        if started is not None:
+            commit, parent = started
+            commit.end()
+            _current.set(parent)
+
+    def _commit_failed(self, session):
+        started = session.info.pop("trace_commit", None)
+        if started is not None:
+            commit, parent = started
+            commit.end(error="rolled back")
+            _current.set(parent)
+
+
+class TracingMiddleware:
+    """Root span per HTTP request; a no-op unless a ``Tracer`` is installed."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        tracer = _active
+        if tracer is None or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        root = tracer.start_request(scope)
+        if root is None:
+            await self.app(scope, receive, send)
+            return
+
+        status = None
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        token = _current.set(root)
+        try:
+            await self.app(scope, receive, send_with_status)
+        except BaseException as exc:
+            root.error = repr(exc)
+            raise
+        finally:
+            _current.reset(token)
+            tracer.finish_request(root, scope, status)
+
+
+def install_from_settings(*engines) -> Tracer | None:
+    if not settings.trace_path:
+        return None
+    return Tracer(
+        settings.trace_path,
+        settings.trace_sample_rate,
+        settings.trace_slow_request_ms,
+        settings.trace_max_bytes,
+        settings.trace_backups,
+    ).install(*engines)
+
+
+# --- Offline analysis -------------------------------------------------------
+
+def _value(attribute: dict):
+    (kind, value), = attribute["value"].items()
+    return int(value) if kind == "intValue" else value
+
+
+def read_traces(path: Path):
+    """Traces in an OTLP/JSON lines file (rotations included), each a list of flat span dicts."""
+    for entry in read_entries(path):
+        by_trace: dict[str, list[dict]] = {}
+        for resource in entry.get("resourceSpans", []):
+            for scope in resource.get("scopeSpans", []):
+                for s in scope.get("spans", []):
+                    by_trace.setdefault(s["traceId"], []).append({
+                        "trace_id": s["traceId"],
+                        "span_id": s["spanId"],
+                        "parent_id": s.get("parentSpanId"),
+                        "name": s["name"],
+                        "kind": s.get("kind", KIND_INTERNAL),
+                        "ms": (int(s["endTimeUnixNano"]) - int(s["startTimeUnixNano"])) / 1e6,
+                        "start": int(s["startTimeUnixNano"]),
+                        "attributes": {a["key"]: _value(a) for a in s.get("attributes", [])},
+                        "error": s.get("status", {}).get("message"),
+                    })
+        yield from by_trace.values()
+
+
+def root_of(spans: list[dict]) -> dict:
+    ids = {s["span_id"] for s in spans}
+    return next(s for s in spans if s["parent_id"] not in ids)
+
+
+def _children(spans: list[dict]) -> dict[str | None, list[dict]]:
+    children: dict[str | None, list[dict]] = {}
+    for s in sorted(spans, key=lambda s: s["start"]):
+        children.setdefault(s["parent_id"], []).append(s)
+    return children
+
+
+def _io_ms(s: dict, children: dict) -> float:
+    """Time in ``s``'s subtree spent in SQL statements and COMMIT."""
+    # A commit's flush statements are its children; the rest is the COMMIT itself
+    if s["kind"] == KIND_CLIENT or s["name"] == "commit":
+        return s["ms"]
+    return sum(_io_ms(c, children) for c in children.get(s["span_id"], []))
+
+
+def breakdown(spans: list[dict]) -> list[dict]:
+    """Per direct child of the root (grouped by name): count, total, I/O and the rest.
+
+    A final ``(request)`` row holds the root's own time: admission, routing,
+    validation, waiting for a pooled connection, serialization and anything
+    else not in a child span.
+    """
+    children = _children(spans)
+    root = root_of(spans)
+    rows: dict[str, dict] = {}
+    for child in children.get(root["span_id"], []):
+        row = rows.setdefault(child["name"], {"name": child["name"], "count": 0, "ms": 0.0, "io_ms": 0.0})
+        row["count"] += 1
+        row["ms"] += child["ms"]
+        row["io_ms"] += _io_ms(child, children)
+    for row in rows.values():
+        row["other_ms"] = row["ms"] - row["io_ms"]
+    own = root["ms"] - sum(row["ms"] for row in rows.values())
+    result = sorted(rows.values(), key=lambda r: -r["ms"])
+    result.append({"name": "(request)", "count": 1, "ms": own, "io_ms": 0.0, "other_ms": own})
+    return result
+
+
+def format_tree(spans: list[dict]) -> list[str]:
+    children = _children(spans)
+    lines = []
+
+    def walk(s, depth):
+        detail = s["attributes"].get("db.statement", "") if s["kind"] == KIND_CLIENT else ""
+        detail = " ".join(detail.split())[:100]
+        error = f"  !! {s['error']}" if s["error"] else ""
+        lines.append(f"{s['ms']:>9.2f}ms  {'  ' * depth}{s['name']}  {detail}{error}".rstrip())
+        for c in children.get(s["span_id"], []):
+            walk(c, depth + 1)
+
+    walk(root_of(spans), 0)
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Break down the slowest traced requests.")
+    parser.add_argument("file", nargs="?", default=settings.trace_path, help="trace file (rotations included)")
+    parser.add_argument("--route", help='only requests for this route, e.g. "POST /api/sessions"')
+    parser.add_argument("--top", type=int, default=1, help="how many of the slowest traces to show")
+    args = parser.parse_args()
+    if not args.file:
+        raise SystemExit("No trace file given and CLOCKQUEST_TRACE_PATH is not set")
+
+    traces = [t for t in read_traces(Path(args.file)) if not args.route or root_of(t)["name"] == args.route]
+    for spans in sorted(traces, key=lambda t: -root_of(t)["ms"])[:args.top]:
+        root = root_of(spans)
+        print(f"{root['name']}  {root['ms']:.1f}ms  trace {root['trace_id']} ({len(spans)} spans)")
+        print(f"  {'span':<32} {'count':>5} {'total ms':>9} {'io ms':>9} {'other ms':>9}")
+        for row in breakdown(spans):
+            print(f"  {row['name']:<32} {row['count']:>5} {row['ms']:>9.2f} {row['io_ms']:>9.2f} "
+                  f"{row['other_ms']:>9.2f}")
+        print()
+        for line in format_tree(spans):
+            print(f"  {line}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Tier trial history and per-tier attempt aggregates.
+
+A player's per-tier summary is a grouped query over ``ix_tier_trials_player_tier``
+(player_id, tier, passed), answered from the index alone for the counts.
+
+A world's summary comes from ``world_tier_trial_stats``: one row of counters
+per world and tier, bumped by ``record_trial`` in the same transaction as the
+trial insert. Reading it costs one row per tier however many players and
+trials the world holds. Paths that add or remove trials in bulk (world
+import, player delete) keep the counters right with ``rebuild_world_stats``
+and ``forget_player_trials``.
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import case, delete, distinct, func, literal, select, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session as DbSession
+
+from .models import Player, TierTrial, WorldTierTrialStats
+
+_PASSED = case((TierTrial.passed, 1), else_=0)
+
+
+def prior_attempts(db: DbSession, player_id: int, tier: int) -> tuple[bool, bool]:
+    """(attempted before, passed before) for a player and tier; read before inserting a trial."""
+    attempts, passes = db.execute(
+        select(func.count(), func.coalesce(func.sum(_PASSED), 0))
+        .where(TierTrial.player_id == player_id, TierTrial.tier == tier)
+    ).one()
+    return attempts > 0, passes > 0
+
+
+def record_trial(
+    db: DbSession,
+    world_id: int,
+    trial: TierTrial,
+    first_attempt: bool,
+    first_pass: bool,
+) -> None:
+    """Add one trial to its world's tier counters (in the caller's transaction)."""
+    values = {
+        "attempts": 1,
+        "passes": int(trial.passed),
+        "players_attempted": int(first_attempt),
+        "players_passed": int(trial.passed and first_pass),
+        "questions": trial.questions,
+        "correct": trial.correct,
+    }
+    stmt = insert(WorldTierTrialStats).values(world_id=world_id, tier=trial.tier, **values)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["world_id", "tier"],
+        set_={name: getattr(WorldTierTrialStats, name) + stmt.excluded[name] for name in values},
+    ))
+
+
+def _grouped_counts(where):
+    return (
+        select(
+            TierTrial.tier,
+            func.count().label("attempts"),
+            func.sum(_PASSED).label("passes"),
+            func.count(distinct(TierTrial.player_id)).label("players_attempted"),
+            func.count(distinct(case((TierTrial.passed, TierTrial.player_id)))).label("players_passed"),
+            func.sum(TierTrial.questions).label("questions"),
+            func.sum(TierTrial.correct).label("correct"),
+        )
+        .where(where)
+        .group_by(TierTrial.tier)
+    )
+
+
+def forget_player_trials(db: DbSession, player_id: int, world_id: int) -> None:
+    """Take a player's trials out of their world's counters; call before deleting the player."""
+    for row in db.execute(_grouped_counts(TierTrial.player_id == player_id)).mappings():
+        db.execute(
+            update(WorldTierTrialStats)
+            .where(WorldTierTrialStats.world_id == world_id, WorldTierTrialStats.tier == row["tier"])
+            .values({
+                getattr(WorldTierTrialStats, name): getattr(WorldTierTrialStats, name) - row[name]
+                for name in ("attempts", "passes", "players_attempted", "players_passed", "questions", "correct")
+            })
+        )
+
+
+def rebuild_world_stats(db: DbSession, world_id: int) -> None:
+    """Recompute a world's counters from its trials."""
+    db.execute(delete(WorldTierTrialStats).where(WorldTierTrialStats.world_id == world_id))
+    counts = _grouped_counts(
+        TierTrial.player_id.in_(select(Player.id).where(Player.world_id == world_id))
+    ).subquery()
+    db.execute(insert(WorldTierTrialStats).from_select(
+        ["world_id", "tier", "attempts", "passes", "players_attempted", "players_passed", "questions", "correct"],
+        select(
+            literal(world_id), counts.c.tier, counts.c.attempts,
+            counts.c.passes, counts.c.players_attempted, counts.c.players_passed, counts.c.questions,
+            counts.c.correct,
+        ),
+    ))
+
+
+def player_tier_summary(db: DbSession, player_id: int):
+    """Per-tier attempts, passes, best score and first/last attempt for one player."""
+    return db.execute(
+        select(
+            TierTrial.tier,
+            func.count().label("attempts"),
+            func.sum(_PASSED).label("passes"),
+            func.max(TierTrial.correct).label("best_correct"),
+            func.min(TierTrial.created_at).label("first_attempt_at"),
+            func.max(TierTrial.created_at).label("last_attempt_at"),
+        )
+        .where(TierTrial.player_id == player_id)
+        .group_by(TierTrial.tier)
+        .order_by(TierTrial.tier)
+    ).mappings().all()
+
+
+def player_trials(db: DbSession, player_id: int, tier: int | None = None, limit: int = 100) -> list[TierTrial]:
+    """A player's trials, newest first."""
+    stmt = select(TierTrial).where(TierTrial.player_id == player_id)
+    if tier is not None:
+        stmt = stmt.where(TierTrial.tier == tier)
+    return db.execute(stmt.order_by(TierTrial.id.desc()).limit(limit)).scalars().all()
+
+
+def world_tier_summary(db: DbSession, world_id: int) -> list[WorldTierTrialStats]:
+    return db.execute(
+        select(WorldTierTrialStats)
+        .where(WorldTierTrialStats.world_id == world_id, WorldTierTrialStats.attempts > 0)
+        .order_by(WorldTierTrialStats.tier)
+    ).scalars().all()
@@ -0,0 +1,241 @@
+"""Streaming NDJSON export and import of a whole world.
+
+Export format, one JSON object per line, parents always before children::
+
+    {"type": "header", "format": "clockquest-world", "version": 1}
+    {"type": "world", "data": {...}}
+    {"type": "players", "data": {...}}        # one line per row
+    {"type": "sessions", "data": {...}}
+    ...
+
+Export reads each table with ``yield_per`` so rows are streamed off the
+cursor in fixed-size partitions; memory stays flat however large the world.
+Import buffers one batch at a time, remaps ``world_id``/``player_id`` to the
+newly inserted ids and bulk-inserts each batch with a single executemany.
+Rows the schema rejects (a missing NOT NULL value, a second active quest card
+of one type) or the driver cannot bind (a list where a number belongs) are
+reported as ``WorldImportError`` like any other bad input.
+"""
+
+from __future__ import annotations
+
+import json
+from datetime import date, datetime
+from typing import Iterator
+
+from sqlalchemy import Date, DateTime, insert, select
+from sqlalchemy.exc import StatementError
+from sqlalchemy.orm import Session as DbSession
+
+from .join_codes import generate_join_code
+from .quests import quest_run_local_date
+from .timezones import DEFAULT_TZ, TimeZoneError, local_date, zone
+from .trial_stats import rebuild_world_stats
+from .models import World, Player, Session, SessionDailySummary, PlayerPointBucket, TierTrial, Quest, QuestRun
+
+FORMAT_NAME = "clockquest-world"
+FORMAT_VERSION = 1
+EXPORT_BATCH_SIZE = 1000
+IMPORT_BATCH_SIZE = 1000
+
+# Child tables keyed by player_id, in export order.
+PLAYER_TABLES = {
+    "sessions": Session.__table__,
+    "session_daily_summaries": SessionDailySummary.__table__,
+    "player_point_buckets": PlayerPointBucket.__table__,
+    "tier_trials": TierTrial.__table__,
+    "quests": Quest.__table__,
+    "quest_runs": QuestRun.__table__,
+}
+
+
+class WorldImportError(ValueError):
+    """Raised when an import stream is malformed."""
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialise {type(value).__name__}")
+
+
+def _line(record_type: str, data: dict) -> bytes:
+    return (json.dumps({"type": record_type, "data": data}, default=_json_default) + "\n").encode()
+
+
+def export_world(db: DbSession, world_id: int) -> Iterator[bytes]:
+    """Yield the world and everything under it as NDJSON lines."""
+    yield (json.dumps({"type": "header", "format": FORMAT_NAME, "version": FORMAT_VERSION}) + "\n").encode()
+
+    world_table = World.__table__
+    world = db.execute(select(world_table).where(world_table.c.id == world_id)).mappings().first()
+    if world is None:
+        return
+    yield _line("world", dict(world))
+
+    players = Player.__table__
+    tables = {"players": players, **PLAYER_TABLES}
+    for name, table in tables.items():
+        if table is players:
+            stmt = select(players).where(players.c.world_id == world_id).order_by(players.c.id)
+        else:
+            stmt = (
+                select(table)
+                .join(players, players.c.id == table.c.player_id)
+                .where(players.c.world_id == world_id)
+                .order_by(table.c.id)
+            )
+        result = db.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE)).mappings()
+        for row in result:
+            yield _line(name, dict(row))
+
+
+def _temporal_parsers(table) -> dict:
+    parsers = {}
+    for column in table.c:
+        if isinstance(column.type, DateTime):
+            parsers[column.name] = datetime.fromisoformat
+        elif isinstance(column.type, Date):
+            parsers[column.name] = date.fromisoformat
+    return parsers
+
+
+class WorldImporter:
+    """Incremental importer: feed it lines, then call ``finish``.
+
+    Everything runs inside the caller's transaction; the caller commits after
+    ``finish`` or rolls back on error so a failed import leaves nothing behind.
+    """
+
+    def __init__(self, db: DbSession, batch_size: int = IMPORT_BATCH_SIZE):
+        self.db = db
+        self.batch_size = batch_size
+        self.world_id: int | None = None
+        self.zone = DEFAULT_TZ
+        self.player_ids: dict[int, int] = {}
+        self.counts: dict[str, int] = {}
+        self._seen_header = False
+        self._pending_type: str | None = None
+        self._pending: list[dict] = []
+        self._line_no = 0
+        self._tables = {"players": Player.__table__, **PLAYER_TABLES}
+        self._parsers = {name: _temporal_parsers(table) for name, table in self._tables.items()}
+        self._parsers["world"] = _temporal_parsers(World.__table__)
+
+    def feed_line(self, raw: bytes | str) -> None:
+        self._line_no += 1
+        if not raw.strip():
+            return
+        try:
+            record = json.loads(raw)
+        except json.JSONDecodeError as exc:
+            raise WorldImportError(f"line {self._line_no}: invalid JSON ({exc.msg})") from exc
+        if not isinstance(record, dict):
+            raise WorldImportError(f"line {self._line_no}: expected an object")
+
+        record_type = record.get("type")
+        if not self._seen_header:
+            if record_type != "header" or record.get("format") != FORMAT_NAME:
+                raise WorldImportError("stream must start with a clockquest-world header")
+            if record.get("version") != FORMAT_VERSION:
+                raise WorldImportError(f"unsupported format version {record.get('version')}")
+            self._seen_header = True
+            return
+
+        data = record.get("data")
+        if not isinstance(data, dict):
+            raise WorldImportError(f"line {self._line_no}: missing data object")
+        if record_type == "world":
+            self._insert_world(data)
+            return
+        if record_type not in self._tables:
+            raise WorldImportError(f"line {self._line_no}: unknown record type {record_type!r}")
+        if self.world_id is None:
+            raise WorldImportError(f"line {self._line_no}: {record_type} before world")
+
+        if record_type != self._pending_type:
+            self._flush()
+            self._pending_type = record_type
+        self._pending.append(self._convert(record_type, data))
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+
+    def finish(self) -> dict[str, int]:
+        self._flush()
+        if self.world_id is None:
+            raise WorldImportError("stream contained no world")
+        # Trials were bulk-inserted; derive the world's tier counters from them
+        rebuild_world_stats(self.db, self.world_id)
+        return self.counts
+
+    def _convert(self, record_type: str, data: dict) -> dict:
+        table = self._tables[record_type] if record_type != "world" else World.__table__
+        parsers = self._parsers[record_type]
+        row = {}
+        for column in table.c:
+            if column.name == "id" or column.name not in data:
+                continue
+            value = data[column.name]
+            if value is not None and column.name in parsers:
+                try:
+                    value = parsers[column.name](value)
+                except (TypeError, ValueError) as exc:
+                    raise WorldImportError(f"line {self._line_no}: bad {column.name} value") from exc
+            row[column.name] = value
+
+        if record_type == "players":
+            row["world_id"] = self.world_id
+            row["_old_id"] = data.get("id")
+        elif record_type != "world":
+            old_player = data.get("player_id")
+            if old_player not in self.player_ids:
+                raise WorldImportError(f"line {self._line_no}: unknown player_id {old_player}")
+            row["player_id"] = self.player_ids[old_player]
+            if "world_id" in table.c:
+                row["world_id"] = self.world_id
+            # Exports predating quest_runs.local_date / quests.local_date
+            if row.get("local_date") is None:
+                if record_type == "quest_runs" and row.get("started_at"):
+                    row["local_date"] = quest_run_local_date(row["started_at"], self.zone)
+                elif record_type == "quests":
+                    row["local_date"] = local_date(row.get("created_at"), self.zone)
+        return row
+
+    def _insert_world(self, data: dict) -> None:
+        if self.world_id is not None:
+            raise WorldImportError(f"line {self._line_no}: more than one world")
+        row = self._convert("world", data)
+        try:
+            self.zone = zone(row.get("time_zone"))
+        except TimeZoneError as exc:
+            raise WorldImportError(f"line {self._line_no}: {exc}") from exc
+        join_code = row.get("join_code") or generate_join_code()
+        while self.db.query(World.id).filter(World.join_code == join_code).first():
+            join_code = generate_join_code()
+        row["join_code"] = join_code
+        table = World.__table__
+        try:
+            self.world_id = self.db.execute(insert(table).returning(table.c.id), [row]).scalar_one()
+        except StatementError as exc:
+            raise WorldImportError(f"line {self._line_no}: world rejected ({exc.orig})") from exc
+        self.counts["world"] = 1
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        record_type, rows = self._pending_type, self._pending
+        self._pending = []
+        table = self._tables[record_type]
+
+        try:
+            if record_type == "players":
+                old_ids = [row.pop("_old_id") for row in rows]
+                new_ids = self.db.execute(
+                    insert(table).returning(table.c.id, sort_by_parameter_order=True), rows
+                ).scalars().all()
+                self.player_ids.update(zip(old_ids, new_ids))
+            else:
+                self.db.execute(insert(table), rows)
+        except StatementError as exc:
+            raise WorldImportError(f"{record_type} before line {self._line_no} rejected ({exc.orig})") from exc
+        self.counts[record_type] = self.counts.get(record_type, 0) + len(rows)
@@ -0,0 +1,102 @@
+"""Helpers shared by the benchmark scripts.
+
+Benchmarks run against a throwaway SQLite file (not :memory:) so timings
+include real page I/O, and seed rows through the raw DB-API cursor so setup
+does not dominate the run.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+import app.models  # noqa: F401 — register all tables on Base.metadata
+
+MODES = ["read", "set", "speedrun", "quest"]
+DIFFICULTIES = ["hour", "half", "quarter", "five_min", "one_min", "interval"]
+
+
+@contextmanager
+def temp_database(foreign_keys: bool = False):
+    """Yield (engine, SessionLocal) bound to a fresh schema in a temp file."""
+    fd, path = tempfile.mkstemp(suffix=".db", prefix="clockquest-bench-")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    if foreign_keys:
+        @event.listens_for(engine, "connect")
+        def _fk_on(dbapi_connection, _record):
+            dbapi_connection.execute("PRAGMA foreign_keys=ON")
+    Base.metadata.create_all(bind=engine)
+    try:
+        yield engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+
+def seed_world(engine, players: int, sessions_per_player: int, *, quest_runs_per_player: int = 0,
+               seed: int = 0) -> int:
+    """Insert one world with synthetic players, sessions and quest runs. Returns world id."""
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        cur.execute(
+            "INSERT INTO worlds (name, join_code, created_at) VALUES (?, ?, ?)",
+            ("Bench", f"Bench{rng.random()}", start),
+        )
+        world_id = cur.lastrowid
+        cur.executemany(
+            "INSERT INTO players (nickname, world_id, clock_power, current_tier, created_at) VALUES (?, ?, ?, ?, ?)",
+            [(f"kid{i}", world_id, rng.uniform(0, 1000), rng.randint(0, 10), start) for i in range(players)],
+        )
+        first_player = cur.execute("SELECT MIN(id) FROM players WHERE world_id = ?", (world_id,)).fetchone()[0]
+
+        def session_rows():
+            for pid in range(first_player, first_player + players):
+                for _ in range(sessions_per_player):
+                    questions = rng.randint(5, 20)
+                    yield (
+                        pid, rng.choice(MODES), rng.choice(DIFFICULTIES), questions,
+                        rng.randint(0, questions), rng.randint(0, 3), rng.randint(0, questions),
+                        rng.randint(800, 9000), None, rng.uniform(0, 25),
+                        start + timedelta(minutes=rng.randint(0, 60 * 24 * 365)),
+                    )
+
+        cur.executemany(
+            "INSERT INTO sessions (player_id, mode, difficulty, questions, correct, hints_used, max_streak,"
+            " avg_response_ms, speedrun_score, points_earned, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            session_rows(),
+        )
+
+        def quest_run_rows():
+            for pid in range(first_player, first_player + players):
+                for _ in range(quest_runs_per_player):
+                    began = start + timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+                    yield (pid, began, began + timedelta(minutes=10), 600, began.date(), True, began)
+
+        cur.executemany(
+            "INSERT INTO quest_runs (player_id, started_at, ended_at, duration_seconds, local_date, completed,"
+            " created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            quest_run_rows(),
+        )
+        raw.commit()
+    finally:
+        raw.close()
+    return world_id
+
+
+@contextmanager
+def timer(label: str):
+    began = time.perf_counter()
+    yield
+    print(f"{label:<48} {time.perf_counter() - began:8.3f}s")
@@ -0,0 +1,42 @@
+"""Benchmark world analytics across growing session counts.
+
+Usage (from backend/):
+    python -m benchmarks.bench_analytics --sizes 10000 100000 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from app.analytics import world_analytics
+
+from ._common import temp_database, seed_world
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 500_000])
+    parser.add_argument("--players", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'sessions':>10} {'best (s)':>10} {'us/session':>12}")
+    for size in args.sizes:
+        with temp_database() as (engine, SessionLocal):
+            world_id = seed_world(engine, args.players, max(1, size // args.players))
+            best = float("inf")
+            for _ in range(args.repeat):
+                db = SessionLocal()
+                try:
+                    began = time.perf_counter()
+                    result = world_analytics(db, world_id)
+                    best = min(best, time.perf_counter() - began)
+                finally:
+                    db.close()
+            n = result["total_sessions"]
+            print(f"{n:>10} {best:>10.3f} {best / n * 1e6:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
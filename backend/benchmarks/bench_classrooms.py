@@ -0,0 +1,251 @@
+"""Simulate whole classrooms playing at once and report per-endpoint latency.
+
+Each class is a teacher plus ``--kids`` players. The teacher creates the world
+and polls the world leaderboard and analytics. Each kid joins with the code,
+creates a player, loads the briefing and then, until time runs out, plays
+sessions, records quest runs, polls leaderboards and reloads the briefing,
+with exponential think time between actions. Once a kid has the power for the
+next tier, they fetch its trial config and attempt it.
+
+By default the app runs in-process (httpx ASGITransport, lifespan included,
+so the quest worker and other background tasks run as in production) against
+a throwaway SQLite file. With ``--url`` the same load goes to a running server,
+e.g. ``uvicorn app.main:app``. In that mode a "database is locked" failure is
+only an HTTP 500 to the client, so check the server log.
+
+Usage (from backend/):
+    python -m benchmarks.bench_classrooms --classes 4 --seconds 60
+    python -m benchmarks.bench_classrooms --classes 10 --url http://127.0.0.1:8000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+MODES = ["read", "set", "speedrun", "quest"]
+DIFFICULTIES = ["hour", "half", "quarter", "five_min", "one_min", "interval"]
+LOCKED = "database is locked"
+
+
+@dataclass
+class EndpointStats:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+    locked: int = 0
+    rejected: int = 0  # 429 from admission control
+
+
+class Recorder:
+    """Times requests and files them under a route template such as ``GET /api/players/{id}``."""
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.stats: dict[str, EndpointStats] = defaultdict(EndpointStats)
+
+    async def call(self, route: str, method: str, url: str, **kwargs) -> httpx.Response | None:
+        stats = self.stats[f"{method} {route}"]
+        began = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except Exception as exc:  # in-process: unhandled app errors surface here
+            stats.latencies.append(time.perf_counter() - began)
+            stats.errors += 1
+            stats.locked += LOCKED in str(exc)
+            return None
+        stats.latencies.append(time.perf_counter() - began)
+        if response.status_code == 429:
+            stats.rejected += 1
+        elif response.status_code >= 500:
+            stats.errors += 1
+            stats.locked += LOCKED in response.text
+        elif response.status_code >= 400:
+            stats.errors += 1
+        return response if response.status_code < 400 else None
+
+
+async def _pause(rng: random.Random, mean: float, deadline: float) -> bool:
+    """Think for a while; False once the run is over."""
+    await asyncio.sleep(min(rng.expovariate(1 / mean) if mean > 0 else 0, max(0.0, deadline - time.monotonic())))
+    return time.monotonic() < deadline
+
+
+async def _kid(rec: Recorder, rng: random.Random, join_code: str, name: str, args, deadline: float) -> None:
+    await asyncio.sleep(rng.uniform(0, args.ramp))
+    world = await rec.call("/api/worlds/join/{code}", "GET", f"/api/worlds/join/{join_code}")
+    if world is None:
+        return
+    player = await rec.call("/api/players", "POST", "/api/players",
+                            json={"nickname": name, "world_id": world.json()["id"]})
+    if player is None:
+        return
+    pid = player.json()["id"]
+    briefing = await rec.call("/api/players/{id}/briefing", "GET", f"/api/players/{pid}/briefing")
+    next_threshold = briefing.json()["next_tier_threshold"] if briefing else None
+    tier, power = 0, 0.0
+    world_id = world.json()["id"]
+
+    while await _pause(rng, args.think, deadline):
+        roll = rng.random()
+        if next_threshold is not None and power >= next_threshold:
+            config = await rec.call("/api/trials/config/{tier}", "GET", f"/api/trials/config/{tier + 1}")
+            if config is not None:
+                trial = config.json()
+                result = await rec.call("/api/trials", "POST", "/api/trials", json={
+                    "player_id": pid, "tier": tier + 1, "questions": trial["questions"],
+                    "correct": trial["questions"] if rng.random() < 0.7 else trial["min_correct"] - 1,
+                    "hints_used": 0, "time_ms": 20_000,
+                })
+                if result is not None and result.json()["passed"]:
+                    tier += 1
+            briefing = await rec.call("/api/players/{id}/briefing", "GET", f"/api/players/{pid}/briefing")
+            next_threshold = briefing.json()["next_tier_threshold"] if briefing else None
+        elif roll < 0.55:
+            questions = rng.randint(5, 20)
+            result = await rec.call("/api/sessions", "POST", "/api/sessions", json={
+                "player_id": pid, "mode": rng.choice(MODES), "difficulty": rng.choice(DIFFICULTIES),
+                "questions": questions, "correct": rng.randint(questions // 2, questions),
+                "hints_used": rng.randint(0, 2), "max_streak": rng.randint(0, questions),
+                "avg_response_ms": rng.randint(1500, 9000),
+            })
+            if result is not None:
+                power = result.json()["new_clock_power"]
+        elif roll < 0.70:
+            ended = datetime.now(timezone.utc)
+            minutes = rng.randint(2, 12)
+            await rec.call("/api/challenges/quest-run", "POST", "/api/challenges/quest-run", json={
+                "player_id": pid, "started_at": (ended - timedelta(minutes=minutes)).isoformat(),
+                "ended_at": ended.isoformat(), "duration_seconds": minutes * 60, "completed": True,
+            })
+        elif roll < 0.85:
+            period = rng.choice(["all", "today", "week"])
+            await rec.call("/api/leaderboard", "GET", "/api/leaderboard",
+                           params={"scope": "world", "world_id": world_id, "period": period})
+        elif roll < 0.90:
+            await rec.call("/api/leaderboard/streaks", "GET", "/api/leaderboard/streaks",
+                           params={"scope": "world", "world_id": world_id})
+        else:
+            briefing = await rec.call("/api/players/{id}/briefing", "GET", f"/api/players/{pid}/briefing")
+            if briefing is not None:
+                next_threshold = briefing.json()["next_tier_threshold"]
+
+
+async def _classroom(rec: Recorder, number: int, args, deadline: float) -> None:
+    rng = random.Random(args.seed * 10_000 + number)
+    world = await rec.call("/api/worlds", "POST", "/api/worlds", json={"name": f"Class {number}"})
+    if world is None:
+        return
+    code, world_id = world.json()["join_code"], world.json()["id"]
+    kids = [
+        _kid(rec, random.Random(rng.random()), code, f"kid{number}-{i}", args, deadline)
+        for i in range(args.kids)
+    ]
+
+    async def teacher():
+        polls = 0
+        while await _pause(rng, args.teacher_poll, deadline):
+            polls += 1
+            await rec.call("/api/leaderboard", "GET", "/api/leaderboard",
+                           params={"scope": "world", "world_id": world_id, "period": "today"})
+            if polls % 6 == 0:
+                await rec.call("/api/worlds/{id}/analytics", "GET", f"/api/worlds/{world_id}/analytics")
+
+    await asyncio.gather(teacher(), *kids)
+
+
+def _percentile(ordered: list[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def report(stats: dict[str, EndpointStats], seconds: float) -> None:
+    total = sum(len(s.latencies) for s in stats.values())
+    errors = sum(s.errors for s in stats.values())
+    locked = sum(s.locked for s in stats.values())
+    rejected = sum(s.rejected for s in stats.values())
+    print(f"{'endpoint':<40} {'count':>7} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'max ms':>8} {'err':>5} {'429':>5}")
+    for name in sorted(stats, key=lambda n: -len(stats[n].latencies)):
+        s = stats[name]
+        ordered = sorted(s.latencies)
+        print(
+            f"{name:<40} {len(ordered):>7} {len(ordered) / seconds:>7.1f} "
+            f"{_percentile(ordered, 50) * 1000:>8.1f} {_percentile(ordered, 95) * 1000:>8.1f} "
+            f"{_percentile(ordered, 99) * 1000:>8.1f} {(ordered[-1] if ordered else 0) * 1000:>8.1f} "
+            f"{s.errors:>5} {s.rejected:>5}"
+        )
+    share = (lambda n: f"{n / total:.2%}") if total else (lambda n: "-")
+    print(
+        f"\n{total} requests in {seconds:.1f}s = {total / seconds:.1f} req/s; "
+        f"errors {errors} ({share(errors)}), database is locked {locked} ({share(locked)}), "
+        f"rate-limited {rejected} ({share(rejected)})"
+    )
+
+
+@asynccontextmanager
+async def _in_process_client():
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://classroom.test", timeout=60) as client:
+            yield client
+
+
+async def run(args) -> None:
+    if args.url:
+        client_cm = httpx.AsyncClient(base_url=args.url, timeout=60,
+                                      limits=httpx.Limits(max_connections=args.connections))
+    else:
+        client_cm = _in_process_client()
+    async with client_cm as client:
+        rec = Recorder(client)
+        began = time.monotonic()
+        deadline = began + args.seconds
+        await asyncio.gather(*(_classroom(rec, n, args, deadline) for n in range(args.classes)))
+        elapsed = time.monotonic() - began
+    print(f"{args.classes} classes x {args.kids} kids, think {args.think}s, "
+          f"{'server ' + args.url if args.url else 'in-process'}\n")
+    report(rec.stats, elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--classes", type=int, default=4)
+    parser.add_argument("--kids", type=int, default=30, help="players per class")
+    parser.add_argument("--seconds", type=float, default=30.0, help="length of the run")
+    parser.add_argument("--think", type=float, default=2.0, help="mean seconds between a kid's actions")
+    parser.add_argument("--teacher-poll", type=float, default=5.0, help="mean seconds between teacher polls")
+    parser.add_argument("--ramp", type=float, default=5.0, help="kids join spread over this many seconds")
+    parser.add_argument("--url", help="drive a running server instead of the in-process app")
+    parser.add_argument("--connections", type=int, default=200, help="HTTP connection limit with --url")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    scratch = None
+    if not args.url:
+        # The app builds its engines at import: point it at a scratch file first
+        scratch = tempfile.mkdtemp(prefix="clockquest-classrooms-")
+        os.environ["CLOCKQUEST_DATABASE_URL"] = f"sqlite:///{os.path.join(scratch, 'load.db')}"
+    try:
+        asyncio.run(run(args))
+    finally:
+        if scratch:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Benchmark deleting a large world.
+
+Compares the database-level ON DELETE CASCADE path used by DELETE
+/api/worlds/{id} with the old ORM cascade, which loaded every child row and
+deleted it one statement at a time.
+
+Usage (from backend/):
+    python -m benchmarks.bench_delete_world --players 300 --sessions 200 --quest-runs 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import resource
+
+from sqlalchemy.orm import selectinload
+
+from app.models import Player, World
+
+from ._common import temp_database, seed_world, timer
+
+
+def _orm_cascade_delete(db, world_id: int) -> None:
+    """Emulate the pre-passive_deletes behaviour: load and delete every child."""
+    relations = ("sessions", "session_summaries", "tier_trials", "quests", "quest_runs")
+    players = selectinload(World.players)
+    world = db.get(
+        World, world_id, options=[players] + [players.selectinload(getattr(Player, r)) for r in relations],
+    )
+    for player in world.players:
+        for relation in relations:
+            for child in getattr(player, relation):
+                db.delete(child)
+        db.delete(player)
+    db.delete(world)
+    db.commit()
+
+
+def _passive_delete(db, world_id: int) -> None:
+    db.delete(db.get(World, world_id))
+    db.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=300)
+    parser.add_argument("--sessions", type=int, default=200, help="sessions per player")
+    parser.add_argument("--quest-runs", type=int, default=100, help="quest runs per player")
+    args = parser.parse_args()
+
+    rows = args.players * (1 + args.sessions + args.quest_runs)
+    print(f"World with {args.players} players, {rows} rows total")
+    for label, delete in (("ORM cascade (load + row-by-row)", _orm_cascade_delete),
+                          ("ON DELETE CASCADE (passive_deletes)", _passive_delete)):
+        with temp_database(foreign_keys=True) as (engine, SessionLocal):
+            world_id = seed_world(engine, args.players, args.sessions, quest_runs_per_player=args.quest_runs)
+            db = SessionLocal()
+            try:
+                rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                with timer(label):
+                    delete(db, world_id)
+                rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                print(f"{'':<48} peak RSS +{(rss_after - rss_before) / 1024:.1f} MiB")
+            finally:
+                db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Benchmark GET /api/players/world/{id} on a large world.
+
+Compares the old unpaginated ORM + Pydantic listing with keyset pages, a
+deep page, a full cursor walk and a sparse ?fields= projection, all through
+the real ASGI app (including gzip).
+
+Usage (from backend/):
+    python -m benchmarks.bench_player_listing --players 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from fastapi.testclient import TestClient
+
+from app.database import get_db
+from app.main import app
+from app.models import Player
+from app.schemas import PlayerResponse
+
+from ._common import temp_database, seed_world
+
+
+def _best(fn, repeat: int) -> tuple[float, object]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        began = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - began)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=10_000)
+    parser.add_argument("--page", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with temp_database() as (engine, SessionLocal):
+        world_id = seed_world(engine, args.players, 0)
+
+        def override():
+            db = SessionLocal()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override
+        client = TestClient(app, headers={"Accept-Encoding": "gzip"})
+        url = f"/api/players/world/{world_id}"
+
+        def legacy():
+            db = SessionLocal()
+            try:
+                players = db.query(Player).filter(Player.world_id == world_id).all()
+                return [PlayerResponse.model_validate(p).model_dump_json() for p in players]
+            finally:
+                db.close()
+
+        def walk(params):
+            cursor, pages = None, 0
+            while True:
+                r = client.get(url, params={**params, **({"after": cursor} if cursor else {})})
+                pages += 1
+                cursor = r.headers.get("x-next-cursor")
+                if not cursor:
+                    return pages
+
+        deep_cursor = None
+        r = client.get(url, params={"limit": args.players - args.page, "fields": "id"})
+        deep_cursor = r.headers.get("x-next-cursor")
+
+        cases = [
+            ("legacy: ORM .all() + PlayerResponse", legacy),
+            (f"first page (limit={args.page})", lambda: client.get(url, params={"limit": args.page})),
+            (f"last page via cursor (limit={args.page})",
+             lambda: client.get(url, params={"limit": args.page, "after": deep_cursor})),
+            (f"first page by power (limit={args.page})",
+             lambda: client.get(url, params={"limit": args.page, "order": "clock_power"})),
+            ("full walk, pages of 1000", lambda: walk({"limit": 1000})),
+            ("full walk, fields=id,nickname", lambda: walk({"limit": 1000, "fields": "id,nickname"})),
+        ]
+        print(f"{args.players} players in world")
+        for label, fn in cases:
+            best, _ = _best(fn, args.repeat)
+            print(f"{label:<48} {best * 1000:9.2f} ms")
+        app.dependency_overrides.pop(get_db, None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Benchmark a mixed read/write workload on shared vs split engines.
+
+"shared" is the old setup: one engine with the default pool and SQLite's
+default rollback journal, so readers and writers take turns on the file lock.
+"split" is ``database.create_engines``: WAL, one serialized writer connection
+and a pool of query_only readers.
+
+Reader threads repeatedly run the world leaderboard query. Writer threads
+insert a session and bump clock power in one transaction, as submit does.
+
+Usage (from backend/):
+    python -m benchmarks.bench_read_write_split --readers 8 --writers 4 --seconds 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.database import Base, create_engines, enable_sqlite_foreign_keys
+
+from ._common import seed_world
+
+LEADERBOARD = text(
+    "SELECT id, nickname, clock_power FROM players WHERE world_id = :world ORDER BY clock_power DESC LIMIT 100"
+)
+INSERT_SESSION = text(
+    "INSERT INTO sessions (player_id, mode, difficulty, questions, correct, hints_used, max_streak, points_earned,"
+    " created_at) VALUES (:player, 'read', 'hour', 10, 8, 0, 5, 13, :now)"
+)
+BUMP_POWER = text("UPDATE players SET clock_power = clock_power + 1 WHERE id = :player")
+
+
+def _shared_engines(url: str):
+    engine = create_engine(url, connect_args={"check_same_thread": False, "timeout": 30})
+    enable_sqlite_foreign_keys(engine)
+    return engine, engine
+
+
+def _run(writer, reader, world_id: int, first_player: int, players: int, args) -> dict:
+    stop = threading.Event()
+    counts = {"reads": 0, "writes": 0, "locked": 0}
+    lock = threading.Lock()
+
+    def bump(key):
+        with lock:
+            counts[key] += 1
+
+    def read_loop():
+        while not stop.is_set():
+            try:
+                with reader.connect() as conn:
+                    conn.execute(LEADERBOARD, {"world": world_id}).all()
+                bump("reads")
+            except OperationalError:
+                bump("locked")
+
+    def write_loop(offset):
+        i = offset
+        while not stop.is_set():
+            player = first_player + i % players
+            i += args.writers
+            try:
+                with writer.begin() as conn:
+                    conn.execute(INSERT_SESSION, {"player": player, "now": datetime.utcnow()})
+                    conn.execute(BUMP_POWER, {"player": player})
+                bump("writes")
+            except OperationalError:
+                bump("locked")
+
+    threads = [threading.Thread(target=read_loop) for _ in range(args.readers)]
+    threads += [threading.Thread(target=write_loop, args=(n,)) for n in range(args.writers)]
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=500)
+    parser.add_argument("--sessions", type=int, default=50, help="seeded sessions per player")
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    for label, factory in (("shared engine, rollback journal", _shared_engines),
+                           ("split engines, WAL", lambda url: create_engines(url, read_pool_size=args.readers))):
+        fd, path = tempfile.mkstemp(suffix=".db", prefix="clockquest-bench-")
+        os.close(fd)
+        try:
+            writer, reader = factory(f"sqlite:///{path}")
+            Base.metadata.create_all(bind=writer)
+            world_id = seed_world(writer, args.players, args.sessions)
+            with writer.connect() as conn:
+                first_player = conn.execute(text("SELECT MIN(id) FROM players")).scalar()
+            counts = _run(writer, reader, world_id, first_player, args.players, args)
+            writer.dispose()
+            reader.dispose()
+        finally:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+        print(
+            f"{label:<34} reads {counts['reads'] / args.seconds:8.0f}/s   "
+            f"writes {counts['writes'] / args.seconds:7.0f}/s   locked errors {counts['locked']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
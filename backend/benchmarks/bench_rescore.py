@@ -0,0 +1,46 @@
+"""Benchmark offline re-scoring of a large session history.
+
+Seeds synthetic players whose stored points and power do not match the
+scorer (seed_world writes random values), then times a dry run and a real
+rescore that rewrites almost every row.
+
+Usage (from backend/):
+    python -m benchmarks.bench_rescore --players 2000 --sessions 500
+"""
+
+from __future__ import annotations
+
+import argparse
+
+from app.rescore import rescore_players
+
+from ._common import temp_database, seed_world, timer
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=2000)
+    parser.add_argument("--sessions", type=int, default=500, help="sessions per player")
+    parser.add_argument("--chunk-size", type=int, default=500, help="players per transaction")
+    parser.add_argument("--rebuild-buckets", action="store_true")
+    args = parser.parse_args()
+
+    with temp_database() as (engine, SessionLocal):
+        seed_world(engine, args.players, args.sessions)
+        print(f"{args.players} players, {args.players * args.sessions} sessions")
+        db = SessionLocal()
+        try:
+            with timer("dry run"):
+                report = rescore_players(db, dry_run=True, chunk_size=args.chunk_size)
+            print(f"{'':<48} {report.sessions_changed} sessions / {report.players_changed} players differ")
+            with timer("rescore + write back"):
+                rescore_players(db, rebuild_buckets=args.rebuild_buckets, chunk_size=args.chunk_size)
+            with timer("second pass (nothing to write)"):
+                report = rescore_players(db, dry_run=True, chunk_size=args.chunk_size)
+            assert report.sessions_changed == 0 and report.players_changed == 0
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()